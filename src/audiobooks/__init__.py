@@ -1,10 +1,50 @@
-# Import all modules/packages to make them available from the audiobooks
-# package.
-from . import audible_processor
-from . import cloudlibrary_processor
-from . import config
-from . import data
-from . import db
-from . import display
-from . import html_creator
-from . import utils
+# Make all modules/packages available from the audiobooks package.
+#
+# The modules are imported when they are first used rather than when the
+# package is imported, so that index.cgi imports only the modules that a page
+# view needs and not, for example, the CSV processors.
+import sys
+
+# SUBMODULES lists the modules and packages available as attributes of the
+# audiobooks package.
+SUBMODULES = (
+    "audible_processor",
+    "bulk_processor",
+    "cloudlibrary_processor",
+    "compression",
+    "conditional",
+    "config",
+    "data",
+    "db",
+    "display",
+    "entities",
+    "html_creator",
+    "names",
+    "page_cache",
+    "response",
+    "server",
+    "static_export",
+    "timing",
+    "utils",
+)
+
+
+def __dir__():
+    return sorted(set(globals()) | set(SUBMODULES))
+
+
+def __getattr__(name):
+    """
+    Import and return the submodule name on its first use. Importing the
+    submodule stores it as an attribute of the package, so this function
+    isn't called again for the same submodule.
+
+    __import__() is used rather than importlib.import_module() because only
+    the former is reported by python -X importtime.
+    """
+    if name in SUBMODULES:
+        # sys.modules holds the submodule even while it is being imported, as
+        # it is when a submodule imports a package that imports it in turn.
+        __import__(f"{__name__}.{name}")
+        return sys.modules[f"{__name__}.{name}"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
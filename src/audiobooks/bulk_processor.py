@@ -0,0 +1,405 @@
+"""
+Streaming bulk loading of the records parsed from a CSV file.
+
+The processors' save_data() functions save each CSV row as it is read, and
+each author, narrator, translator, book, status, acquisition type, book
+author, acquisition, and note is saved with its own statement, so a CSV file
+with 10,000 rows executes more than 100,000 statements.
+
+save_data() instead reads the records from an iterator in chunks of
+chunk_size records and saves each chunk with a few statements per table:
+
+    reader     the processor's save_data_bulk() reads the CSV rows one at a
+               time, and read_records() converts and validates them in
+               batches as the chunk is filled, so the file is never held in
+               memory. With more than one worker, the batches are converted
+               by a pool of worker processes while the main process saves
+               the records, and the records are yielded in the order of the
+               rows.
+    resolver   a Dimension resolves the people, statuses, and acquisition
+               types of the chunk against its in-memory dict of IDs, and the
+               chunk's books are looked up by title
+    writer     the new values, then the chunk's book authors, book narrators,
+               book translators, acquisitions, and notes, are inserted with a
+               single executemany() call per table
+
+Only the main process writes to the database. Each chunk is saved within a
+savepoint, but only to make the chunk atomic: a chunk that fails is rolled
+back to its savepoint and the exception is raised, so a caller that catches
+it and commits keeps exactly the earlier chunks. No chunk is skipped, and
+the save scripts roll back the whole transaction. Memory use depends on the
+chunk size and the number of distinct people, not on the number of rows, and
+nothing is logged per row.
+
+The rows are inserted in the order in which save_data() in the processors
+would insert them, so both ways of loading a CSV file create the same rows
+with the same IDs.
+
+A record is a dict with the following keys:
+
+    title, book_pub_date, audio_pub_date, hours, minutes
+    authors, translators, narrators: lists of (surname, forename) tuples
+    acquisition_type, acquisition_date, discontinued, audible_credits,
+        price_in_cents
+    status, finish_date, rating, comments
+
+The values are converted as they are for the processors' save_data(), with
+None in place of an empty value.
+"""
+
+import collections
+import itertools
+import logging
+logger = logging.getLogger(__name__)
+import multiprocessing
+import time
+
+from . import db
+
+# CHUNK_SIZE is the default number of records saved at a time.
+CHUNK_SIZE = 1000
+
+# BATCH_SIZE is the number of CSV rows converted at a time by read_records().
+BATCH_SIZE = 500
+
+# MAX_PARAMETERS is the number of values passed at a time to the functions
+# that select the rows matching a list of values. SQLite 3.32.0 and later
+# allow 32,766 parameters in a statement, and earlier versions allow 999.
+MAX_PARAMETERS = 500
+
+# PROGRESS_SECONDS is the minimum interval at which save_data() reports its
+# progress.
+PROGRESS_SECONDS = 5
+
+# SAVEPOINT is the name of the savepoint set for each chunk.
+SAVEPOINT = "bulk_chunk"
+
+
+class Dimension:
+    """
+    An in-memory dict mapping the values of a dimension table, such as
+    tbl_author, to their IDs. It's loaded from rows containing an ID followed
+    by the value or values identifying a row, and new values are inserted
+    with insert_many(). select_rows_after(id) returns the rows with IDs
+    greater than id, which include the rows just inserted.
+    """
+
+    def __init__(self, rows, select_rows_after, insert_many):
+        self.ids = get_ids(rows)
+        self.last_id = max((row[0] for row in rows), default=0)
+        self.select_rows_after = select_rows_after
+        self.insert_many = insert_many
+
+    def save(self, rows):
+        """
+        rows is a dict mapping each value, in the order in which it was
+        found, to the row to insert for it. Insert the rows of the values not
+        already in the table.
+        """
+        new_rows = [row for (value, row) in rows.items() if value not in self.ids]
+        if not new_rows:
+            return
+        self.insert_many(new_rows)
+        inserted_rows = self.select_rows_after(self.last_id)
+        for (value, value_id) in get_ids(inserted_rows).items():
+            self.ids.setdefault(value, value_id)
+        self.last_id = max(row[0] for row in inserted_rows)
+
+
+class BulkWriter:
+    """
+    Save chunks of records for a user and vendor, keeping the dimensions'
+    IDs and the counts of the distinct names and their occurrences between
+    chunks.
+    """
+
+    def __init__(self, user_id, vendor_id):
+        self.user_id = user_id
+        self.vendor_id = vendor_id
+        self.authors = Dimension(
+            db.author.select_authors(),
+            db.author.select_authors_after,
+            db.author.insert_many)
+        self.translators = Dimension(
+            db.translator.select_translators(),
+            db.translator.select_translators_after,
+            db.translator.insert_many)
+        self.narrators = Dimension(
+            db.narrator.select_narrators(),
+            db.narrator.select_narrators_after,
+            db.narrator.insert_many)
+        # tbl_acquisition_type and tbl_status have a few rows, which are
+        # selected again after new ones are inserted.
+        self.acquisition_types = Dimension(
+            db.acquisition_type.select_acquisition_types(),
+            lambda acquisition_type_id: db.acquisition_type.select_acquisition_types(),
+            db.acquisition_type.insert_many)
+        self.statuses = Dimension(
+            db.status.select_statuses(),
+            lambda status_id: db.status.select_statuses(),
+            db.status.insert_many)
+        self.rating_ids = get_rating_ids()
+        self.names = {"authors": set(), "translators": set(), "narrators": set()}
+        self.occurrences = {"authors": 0, "translators": 0, "narrators": 0}
+
+    def get_name_counts(self, key):
+        """
+        Return a dict containing the number of distinct names in the records'
+        lists of names under key and the number of their occurrences.
+        """
+        return {"distinct": len(self.names[key]), "occurrences": self.occurrences[key]}
+
+    def save_chunk(self, records):
+        """
+        Save the list of records.
+        """
+        # Save the dimension values: the people, statuses, acquisition types,
+        # and books.
+        for (key, dimension) in (
+                ("authors", self.authors),
+                ("translators", self.translators),
+                ("narrators", self.narrators)):
+            names = {name: name for record in records for name in record[key]}
+            dimension.save(names)
+            self.names[key].update(names)
+            self.occurrences[key] += sum(len(record[key]) for record in records)
+        self.acquisition_types.save(
+            {record["acquisition_type"]: record["acquisition_type"] for record in records})
+        self.statuses.save(
+            {record["status"]: record["status"] for record in records if record["status"] is not None})
+        book_ids = self.save_books(records)
+
+        # Save the rows referring to the dimension values. The book authors,
+        # book narrators, book translators, and acquisitions already in the
+        # database are skipped by their insert_many() functions, and the
+        # notes already in the database are selected for the chunk's books.
+        notes = set(select_in_batches(
+            db.note.select_note_keys_for_books, list(dict.fromkeys(book_ids.values()))))
+        book_authors = []
+        book_translators = []
+        book_narrators = []
+        acquisitions = []
+        new_notes = []
+        for record in records:
+            book_id = book_ids[record["title"]]
+            for name in record["authors"]:
+                book_authors.append((book_id, self.authors.ids[name]))
+            for name in record["translators"]:
+                book_translators.append((book_id, self.translators.ids[name]))
+            for name in record["narrators"]:
+                book_narrators.append((book_id, self.narrators.ids[name]))
+            acquisitions.append((
+                self.user_id,
+                book_id,
+                self.vendor_id,
+                self.acquisition_types.ids[record["acquisition_type"]],
+                record["acquisition_date"],
+                record["discontinued"],
+                record["audible_credits"],
+                record["price_in_cents"],
+            ))
+            status_id = None
+            if record["status"] is not None:
+                status_id = self.statuses.ids[record["status"]]
+            note = (
+                self.user_id,
+                book_id,
+                status_id,
+                record["finish_date"],
+                get_rating_id(self.rating_ids, record["rating"]),
+                record["comments"],
+            )
+            if note not in notes:
+                notes.add(note)
+                new_notes.append(note)
+        if book_authors:
+            db.book_author.insert_many(book_authors)
+        if book_translators:
+            db.book_translator.insert_many(book_translators)
+        if book_narrators:
+            db.book_narrator.insert_many(book_narrators)
+        db.acquisition.insert_many(acquisitions)
+        if new_notes:
+            db.note.insert_many(new_notes)
+
+    def save_books(self, records):
+        """
+        Insert the records' books that aren't in the database, and return a
+        dict mapping the title of each of the records' books to its ID.
+        """
+        titles = list(dict.fromkeys(record["title"] for record in records))
+        book_ids = get_ids(select_in_batches(db.book.select_ids_for_titles, titles))
+        new_books = {}
+        for record in records:
+            if record["title"] not in book_ids:
+                new_books.setdefault(record["title"], (
+                    record["title"],
+                    record["book_pub_date"],
+                    record["audio_pub_date"],
+                    record["hours"],
+                    record["minutes"],
+                ))
+        if new_books:
+            db.book.insert_many(list(new_books.values()))
+            book_ids.update(get_ids(select_in_batches(db.book.select_ids_for_titles, list(new_books))))
+        return book_ids
+
+
+# Functions are listed in alphabetical order.
+
+def empty_to_none(value):
+    """
+    Return None if the CSV value is empty; otherwise, return the value.
+    """
+    if value == "":
+        return None
+    return value
+
+
+def get_ids(rows):
+    """
+    Given result set rows containing an ID followed by the value or values
+    identifying a row, return a dict mapping each value, or tuple of values,
+    to its ID. If a value appears more than once, its first ID is used.
+    """
+    ids = {}
+    for row in rows:
+        if len(row) == 2:
+            key = row[1]
+        else:
+            key = tuple(row[1:])
+        ids.setdefault(key, row[0])
+    return ids
+
+
+def get_rating_id(rating_ids, rating):
+    """
+    Return the ID of the rating with the given number of stars, or None if
+    rating is None or not the number of stars of a rating.
+    """
+    if rating is None:
+        return None
+    try:
+        stars = float(rating)
+    except ValueError:
+        return None
+    return rating_ids.get(stars)
+
+
+def get_rating_ids():
+    """
+    Return a dict mapping the number of stars of each rating, as a float, to
+    the rating's ID.
+    """
+    return {float(stars): rating_id for (rating_id, stars) in db.rating.select_ratings()}
+
+
+def get_records(get_record, batch):
+    """
+    Return the list of records returned by get_record() for the CSV rows in
+    batch, a list of (line_num, csv_row) tuples. A ValueError raised for a
+    row is raised again with the row's line number.
+    """
+    records = []
+    for (line_num, csv_row) in batch:
+        try:
+            records.append(get_record(csv_row))
+        except ValueError as exc:
+            raise ValueError(f"Line {line_num}: {exc}") from exc
+    return records
+
+
+def read_batches(csv_reader, batch_size=BATCH_SIZE):
+    """
+    Yield lists of at most batch_size (line_num, csv_row) tuples containing
+    the rows read by csv_reader and the line numbers at which they end.
+    """
+    batch = []
+    for csv_row in csv_reader:
+        batch.append((csv_reader.line_num, csv_row))
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def read_records(csv_reader, get_record, workers=1):
+    """
+    Yield the record returned by get_record() for each row read by
+    csv_reader, in the order of the rows. A ValueError raised for a row is
+    raised again with the row's line number.
+
+    If workers is greater than 1, the rows are converted in batches by a pool
+    of worker processes, and get_record must be a module-level function so
+    that it can be sent to them. At most two batches per worker are read
+    ahead of the records yielded.
+    """
+    if workers <= 1:
+        for batch in read_batches(csv_reader):
+            yield from get_records(get_record, batch)
+        return
+    with multiprocessing.Pool(processes=workers) as pool:
+        pending = collections.deque()
+        for batch in read_batches(csv_reader):
+            pending.append(pool.apply_async(get_records, (get_record, batch)))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().get()
+        while pending:
+            yield from pending.popleft().get()
+
+
+def save_data(user_id, vendor_id, records, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Save the records, read from an iterable, for the user and vendor in
+    chunks of chunk_size records, each within a savepoint. If a chunk fails,
+    roll it back to its savepoint and raise the exception. If progress isn't
+    None, call progress(row_count, seconds) with the number of records saved
+    and the elapsed time at most every PROGRESS_SECONDS seconds.
+
+    Return the import report, a dict containing the number of records and
+    the counts of the distinct author, translator, and narrator names and
+    their occurrences.
+    """
+    if chunk_size < 1:
+        raise ValueError(f"Invalid chunk size {chunk_size}")
+    writer = BulkWriter(user_id, vendor_id)
+    records = iter(records)
+    row_count = 0
+    start = time.perf_counter()
+    last_progress = start
+    while True:
+        chunk = list(itertools.islice(records, chunk_size))
+        if not chunk:
+            break
+        db.set_savepoint(SAVEPOINT)
+        try:
+            writer.save_chunk(chunk)
+        except Exception:
+            logger.error("Rolling back the chunk after record %s", row_count)
+            db.rollback_to_savepoint(SAVEPOINT)
+            raise
+        db.release_savepoint(SAVEPOINT)
+        row_count += len(chunk)
+        now = time.perf_counter()
+        logger.info("Saved %s records (%.0f records/s)", row_count, row_count / (now - start))
+        if progress is not None and now - last_progress >= PROGRESS_SECONDS:
+            progress(row_count, now - start)
+            last_progress = now
+    return {
+        "rows": row_count,
+        "authors": writer.get_name_counts("authors"),
+        "translators": writer.get_name_counts("translators"),
+        "narrators": writer.get_name_counts("narrators"),
+    }
+
+
+def select_in_batches(select_rows, values):
+    """
+    Return the rows returned by select_rows() for the list of values, passing
+    at most MAX_PARAMETERS values to each call.
+    """
+    rows = []
+    for start in range(0, len(values), MAX_PARAMETERS):
+        rows.extend(select_rows(values[start:start + MAX_PARAMETERS]))
+    return rows
@@ -6,13 +6,61 @@ import csv
 import logging
 logger = logging.getLogger(__name__)
 
+from . import bulk_processor
 from . import db
+from . import names
+
+
+def get_record(csv_row):
+    """
+    Convert and validate a row of the CSV data file and return it as a
+    record for bulk_processor.save_data().
+    """
+    (
+        csv_title,
+        csv_authors,
+        csv_narrators,
+        csv_hours,
+        csv_minutes,
+        csv_book_pub_date,
+        csv_audio_pub_date,
+        csv_acquisition_date,
+        csv_status,
+        csv_finished_date,
+        csv_rating,
+        csv_comments,
+    ) = csv_row
+    if csv_acquisition_date == "":
+        raise ValueError("csv_acquistion_date must not be empty")
+    # The cloudLibrary CSV data has no translators, discontinued
+    # dates, credits, or prices.
+    return {
+        "title": csv_title,
+        "book_pub_date": bulk_processor.empty_to_none(csv_book_pub_date),
+        "audio_pub_date": bulk_processor.empty_to_none(csv_audio_pub_date),
+        "hours": csv_hours,
+        "minutes": csv_minutes,
+        "authors": names.parse_names(csv_authors, "author"),
+        "translators": [],
+        "narrators": names.parse_names(csv_narrators, "narrator"),
+        "acquisition_type": "library benefit",
+        "acquisition_date": csv_acquisition_date,
+        "discontinued": None,
+        "audible_credits": None,
+        "price_in_cents": None,
+        "status": bulk_processor.empty_to_none(csv_status),
+        "finish_date": bulk_processor.empty_to_none(csv_finished_date),
+        "rating": bulk_processor.empty_to_none(csv_rating),
+        "comments": bulk_processor.empty_to_none(csv_comments),
+    }
 
 
 def save_data(username, csv_file):
     """
     Given the CSV data file for the given vendor, parse the data fields
-    and load the data into the database.
+    and load the data into the database. Return the import report, a dict
+    containing the number of CSV rows and the counts of the distinct author,
+    translator, and narrator names and their occurrences.
     """
     user_id = db.user.select_user_id(username)
     if user_id is None:
@@ -21,11 +69,17 @@ def save_data(username, csv_file):
     vendor = "cloudLibrary"
     vendor_id = db.vendor.save(vendor)
 
+    authors = names.NameResolver("author", db.author.save)
+    translators = names.NameResolver("translator", db.translator.save)
+    narrators = names.NameResolver("narrator", db.narrator.save)
+
     with open(csv_file, "r") as csv_file:
         csv_reader = csv.reader(csv_file)
         # Skip the header line.
         row = next(csv_reader)
+        row_count = 0
         for csv_row in csv_reader:
+            row_count += 1
             (
                 csv_title,
                 csv_authors,
@@ -46,35 +100,19 @@ def save_data(username, csv_file):
             csv_translators = ""
             csv_acquisition_type = "library benefit"
 
-            # Process authors.
-            logger.debug(f"csv_authors: '{csv_authors}'")
-            csv_author_strings = csv_authors.split(" & ")
-            logger.debug(f"csv_author_strings: '{csv_author_strings}'")
-            author_ids = save_authors(csv_author_strings)
-
-            # Process translators.
-            logger.debug(f"csv_translators: '{csv_translators}'")
-            if csv_translators == "":
-                translator_ids = []
-            else:
-                csv_translator_strings = csv_translators.split(" & ")
-                logger.debug(f"csv_translator_strings: '{csv_translator_strings}'")
-                translator_ids = save_translators(csv_translator_strings)
-
-            # Process narrators.
-            logger.debug(f"csv_narrators: '{csv_narrators}'")
-            if csv_narrators == "":
-                narrator_ids = []
-            else:
-                csv_narrator_strings = csv_narrators.split(" & ")
-                logger.debug(f"csv_narrator_strings: '{csv_narrator_strings}'")
-                narrator_ids = save_narrators(csv_narrator_strings)
-
-            logger.debug(f"csv_title: '{csv_title}'")
-            logger.debug(f"csv_pub_date: '{csv_book_pub_date}'")
-            logger.debug(f"csv_audio_pub_date: {csv_audio_pub_date}'")
-            logger.debug(f"hours: {csv_hours}")
-            logger.debug(f"minutes: {csv_minutes}")
+            # Process authors, translators, and narrators.
+            logger.debug("csv_authors: '%s'", csv_authors)
+            author_ids = authors.resolve(csv_authors)
+            logger.debug("csv_translators: '%s'", csv_translators)
+            translator_ids = translators.resolve(csv_translators)
+            logger.debug("csv_narrators: '%s'", csv_narrators)
+            narrator_ids = narrators.resolve(csv_narrators)
+
+            logger.debug("csv_title: '%s'", csv_title)
+            logger.debug("csv_pub_date: '%s'", csv_book_pub_date)
+            logger.debug("csv_audio_pub_date: %s'", csv_audio_pub_date)
+            logger.debug("hours: %s", csv_hours)
+            logger.debug("minutes: %s", csv_minutes)
             book_id = save_book(
                 csv_title,
                 csv_book_pub_date,
@@ -108,6 +146,37 @@ def save_data(username, csv_file):
                 csv_rating,
                 csv_comments,
             )
+    return {
+        "rows": row_count,
+        "authors": authors.get_counts(),
+        "translators": translators.get_counts(),
+        "narrators": narrators.get_counts(),
+    }
+
+
+def save_data_bulk(username, csv_file, chunk_size=bulk_processor.CHUNK_SIZE, progress=None,
+                   workers=1):
+    """
+    Given the CSV data file for the given vendor, stream its rows through
+    get_record() into bulk_processor.save_data(), which saves chunk_size
+    rows at a time with a few statements per table rather than several
+    statements per row. progress is passed to bulk_processor.save_data().
+    If workers is greater than 1, the rows are converted and validated by a
+    pool of worker processes. Return the import report, as save_data() does.
+    """
+    user_id = db.user.select_user_id(username)
+    if user_id is None:
+        raise ValueError(f"Invalid username {username}")
+
+    vendor = "cloudLibrary"
+    vendor_id = db.vendor.save(vendor)
+
+    with open(csv_file, "r") as csv_file:
+        csv_reader = csv.reader(csv_file)
+        # Skip the header line.
+        row = next(csv_reader)
+        records = bulk_processor.read_records(csv_reader, get_record, workers)
+        return bulk_processor.save_data(user_id, vendor_id, records, chunk_size, progress)
 
 
 def save_acquisition(
@@ -133,113 +202,30 @@ def save_acquisition(
         discontinued, audible_credits, price_in_cents)
 
 
-def save_author(csv_author_surname, csv_author_forename):
-    """
-    This function accepts a single author. Multiple authors for a book must
-    be entered manually (one book from cloudLibrary).
-    """
-    logger.debug(f"csv_author_surname: '{csv_author_surname}'")
-    logger.debug(f"csv_author_forename: '{csv_author_forename}'")
-    surname = csv_author_surname.strip()
-    forename = csv_author_forename.strip()
-    if surname == "":
-        surname = None
-    if forename == "":
-        raise ValueError("The author's forename may not be empty")
-    author_id = db.author.save(surname, forename)
-    logger.debug(f"author ID: {author_id}")
-    return author_id
-
-
 def save_book(title, book_pub_date, audio_pub_date, hours, minutes):
-    logger.debug(f"title: '{title}'")
-    logger.debug(f"book_pub_date: '{book_pub_date}'")
-    logger.debug(f"audio_pub_date: '{audio_pub_date}'")
-    logger.debug(f"hours: {hours}")
-    logger.debug(f"minutes: {minutes}")
+    logger.debug("title: '%s'", title)
+    logger.debug("book_pub_date: '%s'", book_pub_date)
+    logger.debug("audio_pub_date: '%s'", audio_pub_date)
+    logger.debug("hours: %s", hours)
+    logger.debug("minutes: %s", minutes)
     if book_pub_date == "":
         book_pub_date = None
     if audio_pub_date == "":
         audio_pub_date = None
     book_id = db.book.save(
         title, book_pub_date, audio_pub_date, hours, minutes)
-    logger.debug(f"book_id: {book_id}")
+    logger.debug("book_id: %s", book_id)
     return book_id
 
 
-def save_authors(author_strings):
-    """
-    author_strings is a list of authors formatted as "surname, forename",
-    where multiple words may appear in each of surname and forename. If the
-    author has a single name (e.g., "Homer", "Aeschylus", "Colette"), the
-    surname is saved as NULL in the database.
-    """
-    author_ids = []
-    for author_string in author_strings:
-        logger.debug(f"author_string: '{author_string}'")
-        names = author_string.split(",")
-        if len(names) == 1:
-            forename = names[0]
-        elif len(names) == 2:
-            surname = names[0]
-            forename = names[1]
-        else:
-            raise ValueError("Author name '{name_string}' formatted incorrectly with too many commas.")
-        surname = surname.strip()
-        if surname == "":
-            surname = None
-        forename = forename.strip()
-        if forename == "":
-            raise ValueError(f"The author's forename '{forename}' must not be empty.")
-        logger.debug(f"surname: '{surname}'")
-        logger.debug(f"forename: {forename}'")
-        author_id = db.author.save(surname, forename)
-        logger.debug(f"author ID: {author_id}")
-        author_ids.append(author_id)
-    return author_ids
-
-
-def save_narrators(narrator_strings):
-    """
-    narrator_strings is a list of narrators formatted as "surname, forename",
-    where multiple words may appear in each of surname and forename. If the
-    narrator has a single name, the surname is saved as NULL in the database.
-    """
-    narrator_ids = []
-    for narrator_string in narrator_strings:
-        logger.debug(f"narrator_string: '{narrator_string}'")
-        names = narrator_string.split(",")
-        if len(names) == 1:
-            forename = names[0]
-            surname = None
-        elif len(names) == 2:
-            surname = names[0]
-            forename = names[1]
-        else:
-            raise ValueError("Narrator name '{name_string}' formatted incorrectly with too many commas.")
-        if surname is not None:
-            surname = surname.strip()
-            if surname == "":
-                surname = None
-        forename = forename.strip()
-        if forename == "":
-            raise ValueError(f"The narrator's forename '{forename}' must not be empty.")
-        logger.debug(f"surname: '{surname}'")
-        logger.debug(f"forename: {forename}'")
-        narrator_id = db.narrator.save(surname, forename)
-        logger.debug(f"narrator ID: {narrator_id}")
-        narrator_ids.append(narrator_id)
-    return narrator_ids
-
-
 def save_note(user_id, book_id, csv_status, csv_finished_date,
             csv_rating, csv_comments):
-    logger.debug(f"user_id: {user_id}")
-    logger.debug(f"book_id: {book_id}")
-    logger.debug(f"csv_status: '{csv_status}'")
-    logger.debug(f"csv_finished_date: '{csv_finished_date}'")
-    logger.debug(f"csv_rating: {csv_rating}")
-    logger.debug(f"csv_comments: '{csv_comments}'")
+    logger.debug("user_id: %s", user_id)
+    logger.debug("book_id: %s", book_id)
+    logger.debug("csv_status: '%s'", csv_status)
+    logger.debug("csv_finished_date: '%s'", csv_finished_date)
+    logger.debug("csv_rating: %s", csv_rating)
+    logger.debug("csv_comments: '%s'", csv_comments)
 
     status_id = None
     if csv_status != "":
@@ -260,35 +246,3 @@ def save_note(user_id, book_id, csv_status, csv_finished_date,
     note_id = db.note.save(user_id, book_id, status_id, finished_date,
                         rating_id, comments)
     return note_id
-
-
-def save_translators(translator_strings):
-    """
-    translatorstrings is a list of translators formatted as "surname, forename",
-    where multiple words may appear in each of surname and forename. If the
-    translator has a single name, the surname is saved as NULL in the database.
-    """
-    logger.debug(f"translator_strings: '{translator_strings}'")
-    translator_ids = []
-    for translator_string in translator_strings:
-        logger.debug(f"translator_string: '{translator_string}'")
-        names = translator_string.split(",")
-        if len(names) == 1:
-            forename = names[0]
-        elif len(names) == 2:
-            surname = names[0]
-            forename = names[1]
-        else:
-            raise ValueError("Translator name '{name_string}' formatted incorrectly with too many commas.")
-        surname = surname.strip()
-        if surname == "":
-            surname = None
-        forename = forename.strip()
-        if forename == "":
-            raise ValueError(f"The translator's forename '{forename}' must not be empty.")
-        logger.debug(f"surname: '{surname}'")
-        logger.debug(f"forename: {forename}'")
-        translator_id = db.translator.save(surname, forename)
-        logger.debug(f"translator ID: {translator_id}")
-        translator_ids.append(translator_id)
-    return translator_ids
@@ -0,0 +1,104 @@
+"""
+Gzip compression of responses for browsers that accept it.
+
+The large pages, such as the books and authors tables, are highly repetitive
+and compress to a small fraction of their size. Responses smaller than
+MINIMUM_SIZE are sent uncompressed, since compressing them saves little.
+
+A compressed response's body is compressed as it is generated, so a streamed
+page is still sent to the browser in chunks.
+"""
+
+import itertools
+import os
+import zlib
+
+from . import response
+
+# MINIMUM_SIZE is the size in bytes below which a response isn't compressed.
+MINIMUM_SIZE = 1024
+
+# COMPRESSION_LEVEL is the zlib compression level, from 1 (fastest) to 9
+# (smallest).
+COMPRESSION_LEVEL = 6
+
+
+def accepts_gzip(environ=None):
+    """
+    Return True if the request's Accept-Encoding header, read from environ,
+    accepts the gzip content coding. environ is a CGI or WSGI environment and
+    defaults to os.environ.
+
+    A coding with q=0 is not accepted, and "*" stands for any coding not
+    listed.
+    """
+    if environ is None:
+        environ = os.environ
+    qualities = {}
+    for coding in environ.get("HTTP_ACCEPT_ENCODING", "").split(","):
+        (name, semicolon, parameters) = coding.partition(";")
+        name = name.strip().lower()
+        if name == "":
+            continue
+        quality = 1.0
+        for parameter in parameters.split(";"):
+            (key, equals, parameter_value) = parameter.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(parameter_value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name] = quality
+    quality = qualities.get("gzip", qualities.get("x-gzip", qualities.get("*", 0.0)))
+    return quality > 0.0
+
+
+def compress_response(page_response):
+    """
+    Return a Response containing page_response with its body compressed with
+    gzip, or page_response itself if its body is smaller than MINIMUM_SIZE or
+    if it is already compressed.
+
+    Only as many chunks of the body as are needed to reach MINIMUM_SIZE are
+    generated before the response is returned.
+    """
+    if page_response.get_header("Content-Encoding") is not None:
+        return page_response
+    body = iter(page_response.body)
+    first_chunks = []
+    size = 0
+    for chunk in body:
+        first_chunks.append(chunk)
+        size += len(response.encode(chunk))
+        if size >= MINIMUM_SIZE:
+            break
+    else:
+        page_response.body = first_chunks
+        return page_response
+
+    compressed_response = response.Response(
+        generate_gzip(itertools.chain(first_chunks, body)),
+        page_response.status,
+        list(page_response.headers))
+    compressed_response.set_header("Content-Encoding", "gzip")
+    return compressed_response
+
+
+def generate_gzip(chunks):
+    """
+    Generate the gzip-compressed bytes of the chunks.
+
+    The compressor is flushed after the first chunk, so the browser can start
+    rendering the start of the page while the rest is generated.
+    """
+    # A wbits value of 31 makes zlib write the gzip header and trailer.
+    compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, 31)
+    first_chunk = True
+    for chunk in chunks:
+        compressed = compressor.compress(response.encode(chunk))
+        if first_chunk:
+            compressed += compressor.flush(zlib.Z_SYNC_FLUSH)
+            first_chunk = False
+        if compressed:
+            yield compressed
+    yield compressor.flush()
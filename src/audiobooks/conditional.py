@@ -0,0 +1,104 @@
+"""
+HTTP conditional GET support.
+
+Each page gets an ETag made from the database's data version and the query
+parameter that selected the page, and a Last-Modified time taken from the
+time of the last commit. A request whose If-None-Match or If-Modified-Since
+header shows that the browser already has the current page is answered with
+a bodiless 304 Not Modified response.
+"""
+
+import calendar
+import email.utils
+import hashlib
+import os
+import time
+
+from . import db
+from . import page_cache
+
+
+def get_etag(page, value=None, content_encoding=None):
+    """
+    Return the quoted ETag of the page selected by the query parameter named
+    page with the given value.
+
+    If content_encoding is not None, the ETag is for the page compressed with
+    that content coding, which must have a different ETag from the
+    uncompressed page.
+    """
+    if value is None:
+        value = ""
+    key = f"{page}={value}"
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+    if content_encoding is not None:
+        digest += f"-{content_encoding}"
+    return f'"{page_cache.get_database_stamp()}-{digest}"'
+
+
+def get_last_modified():
+    """
+    Return the time of the last commit to the database in seconds since the
+    epoch, truncated to whole seconds as HTTP dates are.
+
+    The time is the time at which the data version was last incremented, or
+    the modification time of the database file if the database has no data
+    version.
+    """
+    row = db.get_data_version_row()
+    if row is not None:
+        (version, updated) = row
+        return calendar.timegm(time.strptime(updated, "%Y-%m-%d %H:%M:%S"))
+    return int(os.stat(db.db_path).st_mtime)
+
+
+def get_validator_headers(etag, last_modified):
+    """
+    Return a list of the (name, value) header tuples that let the browser
+    revalidate the page.
+
+    Cache-Control: no-cache makes the browser revalidate the page on every
+    request instead of guessing how long the page stays fresh.
+    """
+    headers = [
+        ("ETag", etag),
+        ("Last-Modified", email.utils.formatdate(last_modified, usegmt=True)),
+        ("Cache-Control", "no-cache"),
+    ]
+    return headers
+
+
+def is_not_modified(etag, last_modified, environ=None):
+    """
+    Return True if the request's If-None-Match or If-Modified-Since header,
+    read from environ, shows that the browser's copy of the page is current.
+    environ is a CGI or WSGI environment and defaults to os.environ.
+
+    If-None-Match takes precedence over If-Modified-Since, as RFC 9110
+    requires. Only GET and HEAD requests can be answered with 304.
+    """
+    if environ is None:
+        environ = os.environ
+    if environ.get("REQUEST_METHOD", "GET") not in ("GET", "HEAD"):
+        return False
+
+    if_none_match = environ.get("HTTP_IF_NONE_MATCH")
+    if if_none_match is not None:
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            if tag == "*" or tag == etag:
+                return True
+        return False
+
+    if_modified_since = environ.get("HTTP_IF_MODIFIED_SINCE")
+    if if_modified_since is not None:
+        try:
+            since = email.utils.parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            return False
+        return last_modified <= since.timestamp()
+    return False
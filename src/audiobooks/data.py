@@ -1,13 +1,111 @@
 """
-Functions that return data as dicts and lists.
+Functions that return data as entities, dicts, and lists.
+
+Books, authors, narrators, translators, acquisitions, and notes are returned
+as the slotted classes in the entities module, which support the same
+dict-style access (book["title"], author["display_name"], etc.) as the dicts
+this module used to return.
+
+Authors, narrators, translators, and books are kept in a request-scoped
+identity map so that each entity is selected and built at most once per
+request. The entities returned by get_author(), get_narrator(),
+get_translator(), and get_book() are shared and must not be modified by the
+caller. Call reset_cache() at the end of each request.
 """
 
+import logging
+logger = logging.getLogger(__name__)
+
 from . import db
+from . import entities
+from . import timing
+
+# identity_map maps an entity kind to a dict mapping the entity's ID to the
+# entity. IDs of entities that don't exist aren't stored, so the identity map
+# holds at most one entity per row of tbl_author, tbl_book, tbl_narrator, and
+# tbl_translator, however many IDs are requested.
+identity_map = {
+    "author": {},
+    "book": {},
+    "narrator": {},
+    "translator": {},
+}
+
+# cache_stats maps an entity kind to the identity map's hit and miss counts
+# for the current request.
+cache_stats = {
+    kind: {"hits": 0, "misses": 0} for kind in identity_map
+}
+
+
+def build_acquisition(row):
+    """
+    Given a result set row from db.acquisition, return an Acquisition
+    containing the acquisition's attributes.
+    """
+    acquisition = entities.Acquisition(*row)
+    return acquisition
+
+
+def build_author(row):
+    """
+    Given a result set row containing an author's id, surname, and forename,
+    return a Person containing the author's attributes, excluding the books
+    attribute.
+    """
+    author = entities.Person(*row)
+    return author
+
+
+def build_book(row, authors, translators, narrators, acquisition, notes):
+    """
+    Given a result set row from db.book and the book's related records,
+    return a Book containing the book's attributes. The computed attributes
+    are computed when they are first used.
+    """
+    book = entities.Book(
+        *row,
+        authors=authors,
+        translators=translators,
+        narrators=narrators,
+        acquisition=acquisition,
+        notes=notes,
+    )
+    return book
+
+
+def build_narrator(row):
+    """
+    Given a result set row containing a narrator's id, surname, and forename,
+    return a Person containing the narrator's attributes, excluding the books
+    attribute.
+    """
+    narrator = entities.Person(*row)
+    return narrator
+
+
+def build_note(row):
+    """
+    Given a result set row from db.note, return a Note containing the note's
+    attributes.
+    """
+    note = entities.Note(*row)
+    return note
+
+
+def build_translator(row):
+    """
+    Given a result set row containing a translator's id, surname, and
+    forename, return a Person containing the translator's attributes,
+    excluding the books attribute.
+    """
+    translator = entities.Person(*row)
+    return translator
 
 
 def get_acquisition_for_book(book_id):
     """
-    Given a book's ID, return a dict containing the acquisition's attributes.
+    Given a book's ID, return an Acquisition containing the acquisition's attributes.
 
     An acquisition's attributes are:
         id
@@ -24,24 +122,13 @@ def get_acquisition_for_book(book_id):
     row = db.acquisition.select_acquisition_for_book(book_id)
     acquisition = None
     if row is not None:
-        (id, username, vendor_name, acquisition_type, acquisition_date,
-            discontinued, audible_credits, price_in_cents) = row
-        acquisition = {
-            "id": id,
-            "username": username,
-            "vendor_name": vendor_name,
-            "acquisition_type": acquisition_type,
-            "acquisition_date": acquisition_date,
-            "discontinued": discontinued,
-            "audible_credits": audible_credits,
-            "price_in_cents": price_in_cents,
-        }
+        acquisition = build_acquisition(row)
     return acquisition
 
 
 def get_author(author_id):
     """
-    Return a dict containing the author's attributes, excluding the books
+    Return a Person containing the author's attributes, excluding the books
     attribute.
 
     An author's attributes are:
@@ -52,42 +139,17 @@ def get_author(author_id):
         reverse_name  -- surname + ", " + forename
         name_sort_key -- (surname + " " + forename).upper()
 
+    The entity is shared through the identity map and must not be modified.
+
     Return None if the author doesn't exist.
     """
-    author = None
-    row = db.author.select(author_id)
-    if row is not None:
-        id, surname, forename = row
-        author = {
-            "id": id,
-            "surname": surname,
-            "forename": forename
-        }
-
-        # Compute the display_name attribute.
-        if author["surname"] is None:
-            author["display_name"] = author["forename"]
-        else:
-            author["display_name"] = author["forename"] + " " + author["surname"]
-
-        # Compute the reverse_name attribute.
-        if surname is None:
-            author["reverse_name"] = author["forename"]
-        else:
-            author["reverse_name"] = author["surname"] + ", " + author["forename"]
-
-        # Compute the name_sort_key attribute.
-        if surname is None:
-            name_sort_key = author["forename"].upper()
-        else:
-            name_sort_key = author["surname"] + " " + author["forename"]
-        author["name_sort_key"] = name_sort_key.upper()
-    return author
+    return get_cached("author", author_id, load_author)
 
 
+@timing.timed("data")
 def get_author_with_books(author_id):
     """
-    Given an author's ID, return a dict containing the author's attributes
+    Given an author's ID, return a Person containing the author's attributes
     including the books written by the author.
 
     An author's attributes are:
@@ -97,14 +159,15 @@ def get_author_with_books(author_id):
         display_name
         reverse_name
         name_sort_key
-        books -- a list of book dicts
+        books -- a list of Books
 
     Return None if the author doesn't exist.
     """
     author = get_author(author_id)
     if author is not None:
-        # Get the books written by the author and store the list as the
-        # books attribute.
+        # Copy the shared author, then get the books written by the author and
+        # store the list as the books attribute.
+        author = author.copy()
         author["books"] = []
         rows = db.book.select_ids_for_author(author_id)
         for row in rows:
@@ -140,9 +203,10 @@ def get_authors_for_book(book_id):
     return authors
 
 
+@timing.timed("data")
 def get_authors_with_books():
     """
-    Return a list of sorted author dicts, where the author attributes include
+    Return a list of sorted author Persons, where the author attributes include
     the books written by the author and the list is sorted by the
     author["name_sort_key"] attribute.
 
@@ -153,21 +217,33 @@ def get_authors_with_books():
         display_name
         reverse_name
         name_sort_key
-        books -- a list of book dicts
+        books -- a list of Books
+
+    Each book is loaded once by get_books_by_id() and the same Book is
+    shared by all of the book's authors. The authors' book lists are built
+    from a single pass over tbl_book_author.
     """
-    authors = []
-    rows = db.author.select_ids()
-    for row in rows:
-        (author_id,) = row
-        author = get_author_with_books(author_id)
-        authors.append(author)
+    books_by_id = get_books_by_id()
+
+    authors_by_id = {}
+    for row in db.author.select_authors():
+        author = build_author(row)
+        author["books"] = []
+        authors_by_id[author["id"]] = author
+
+    for row in db.book_author.select_book_authors():
+        (book_id, author_id) = row
+        authors_by_id[author_id]["books"].append(books_by_id[book_id])
+
+    authors = authors_by_id.values()
     sorted_authors = sorted(authors, key=lambda author: author["name_sort_key"])
     return sorted_authors
 
 
+@timing.timed("data")
 def get_book(book_id):
     """
-    Given a book's ID, return a dict containing the book's attributes.
+    Given a book's ID, return a Book containing the book's attributes.
 
     A book's attributes are:
         id
@@ -176,11 +252,11 @@ def get_book(book_id):
         audio_pub_date
         hours
         minutes
-        authors -- a list of author dicts
-        translators -- a list of translator dicts
-        narrators -- a list of narrator dicts
+        authors -- a list of author Persons
+        translators -- a list of translator Persons
+        narrators -- a list of narrator Persons
         acquisition
-        notes -- a list of note dicts
+        notes -- a list of Notes
         title_sort_key
         length_sort_key
         length
@@ -189,59 +265,14 @@ def get_book(book_id):
         status_string
         acquisition_date
 
+    The entity is shared through the identity map and must not be modified.
+
     Return None if the book's ID is not in the database.
     """
-    row = db.book.select_book(book_id)
-    if row is None:
-        return None
-
-    (id, title, book_pub_date, audio_pub_date, hours, minutes,) = row
-    book = {
-        "id": id,
-        "title": title,
-        "book_pub_date": book_pub_date,
-        "audio_pub_date": audio_pub_date,
-        "hours": hours,
-        "minutes": minutes,
-    }
-    book["authors"] = get_authors_for_book(book_id)
-    book["translators"] = get_translators_for_book(book_id)
-    book["narrators"] = get_narrators_for_book(book_id)
-
-    acquisition = get_acquisition_for_book(book_id)
-    book["acquisition"] = acquisition
-
-    notes = get_notes_for_book(book_id)
-    book["notes"] = notes
-
-    # Create computed attributes.
-    # Create a key for sorting by title.
-    book["title_sort_key"] = get_title_sort_key(book["title"])
-
-    # Create a key for sorting by length.
-    book["length_sort_key"] = 60 * int(book["hours"]) + int(book["minutes"])
-
-    # Convert hours and minutes to an hh:mm string.
-    book["length"] = f'{book["hours"]}:{book["minutes"]:02d}'
-
-    # Get a combined rating for the book from the first notes record.
-    book["rating"] = get_rating(book["notes"][0])
-
-    # Convert the finish_date to a string.
-    book["finish_date_string"] = book["notes"][0]["finish_date"]
-    if book["finish_date_string"] is None:
-        book["finish_date_string"] = ""
-
-    # Convert the status to a string.
-    book["status_string"] = book["notes"][0]["status"]
-    if book["status_string"] is None:
-        book["status_string"] = ""
-
-    # Compute the acquisition_date attribute.
-    book["acquisition_date"] = book["acquisition"]["acquisition_date"]
-    return book
+    return get_cached("book", book_id, load_book)
 
 
+@timing.timed("data")
 def get_books():
     """
     Return a list of all books, where the list is sorted by the
@@ -254,11 +285,11 @@ def get_books():
         audio_pub_date
         hours
         minutes
-        authors -- a list of author dicts
-        translators -- a list of translator dicts
-        narrators -- a list of narrator dicts
+        authors -- a list of author Persons
+        translators -- a list of translator Persons
+        narrators -- a list of narrator Persons
         acquisition
-        notes -- a list of note dicts
+        notes -- a list of Notes
         title_sort_key
         length_sort_key
         length
@@ -267,19 +298,101 @@ def get_books():
         status_string
         acquisition_date
     """
-    books = []
-    rows = db.book.select_ids()
-    for row in rows:
-        (book_id,) = row
-        book = get_book(book_id)
-        books.append(book)
+    books = get_books_by_id().values()
     sorted_books = sorted(books, key=lambda book: book["title_sort_key"])
     return sorted_books
 
 
+def get_books_by_id():
+    """
+    Return a dict mapping each book's ID to a Book containing the book's
+    attributes, in the order of the book IDs. The attributes are the same as
+    those returned by get_book().
+
+    Rather than calling get_book() for each book, which issues about ten
+    queries per book, select each of the books' relations once for the whole
+    library and assemble the books in memory. The result is the same as
+    calling get_book() for each book ID.
+
+    The books, authors, narrators, and translators are stored in the identity
+    map, and entities already in the identity map are reused rather than
+    rebuilt.
+    """
+    authors_by_book = group_people_by_book(
+        db.author.select_authors_for_books(), "author", build_author)
+    translators_by_book = group_people_by_book(
+        db.translator.select_translators_for_books(), "translator",
+        build_translator)
+    narrators_by_book = group_people_by_book(
+        db.narrator.select_narrators_for_books(), "narrator", build_narrator)
+
+    # Like get_acquisition_for_book(), keep only the first acquisition of a
+    # book.
+    acquisitions_by_book = {}
+    for row in db.acquisition.select_acquisitions_for_books():
+        book_id = row[0]
+        if book_id not in acquisitions_by_book:
+            acquisitions_by_book[book_id] = build_acquisition(row[1:])
+
+    notes_by_book = {}
+    for row in db.note.select_notes_for_books():
+        book_id = row[0]
+        notes_by_book.setdefault(book_id, []).append(build_note(row[1:]))
+
+    books = identity_map["book"]
+    books_by_id = {}
+    for row in db.book.select_books():
+        book_id = row[0]
+        if book_id in books:
+            cache_stats["book"]["hits"] += 1
+        else:
+            cache_stats["book"]["misses"] += 1
+            books[book_id] = build_book(
+                row,
+                authors=authors_by_book.get(book_id, []),
+                translators=translators_by_book.get(book_id, []),
+                narrators=narrators_by_book.get(book_id, []),
+                acquisition=acquisitions_by_book.get(book_id),
+                notes=notes_by_book.get(book_id, []),
+            )
+        books_by_id[book_id] = books[book_id]
+    return books_by_id
+
+
+def get_cache_stats():
+    """
+    Return a dict mapping each entity kind ("author", "book", "narrator",
+    "translator") to a dict containing the identity map's hits and misses
+    for the current request.
+    """
+    stats = {kind: dict(counts) for kind, counts in cache_stats.items()}
+    return stats
+
+
+def get_cached(kind, entity_id, load):
+    """
+    Return the entity of the given kind and ID from the identity map.
+
+    On a miss, call load(entity_id) to select and build the entity and store
+    it in the identity map. If load() returns None because the entity doesn't
+    exist, return None without storing it.
+    """
+    entities = identity_map[kind]
+    entity_id = int(entity_id)
+    entity = entities.get(entity_id)
+    if entity is not None:
+        cache_stats[kind]["hits"] += 1
+    else:
+        cache_stats[kind]["misses"] += 1
+        entity = load(entity_id)
+        if entity is not None:
+            entities[entity_id] = entity
+    return entity
+
+
 def get_narrator(narrator_id):
     """
-    Given a narrator's ID, return a dict containing the narrator's attributes
+    Given a narrator's ID, return a Person containing the narrator's attributes
     except the books attribute.
 
     A narrator's attributes are:
@@ -288,29 +401,17 @@ def get_narrator(narrator_id):
         forename
         display_name
 
+    The entity is shared through the identity map and must not be modified.
+
     Return None if the narrator doesn't exist.
     """
-    narrator = None
-    row = db.narrator.select_narrator(narrator_id)
-    if row is not None:
-        id, surname, forename = row
-        narrator = {
-            "id": id,
-            "surname": surname,
-            "forename": forename
-        }
-
-        # Compute the display_name attribute.
-        if narrator["surname"] is None:
-            narrator["display_name"] = narrator["forename"]
-        else:
-            narrator["display_name"] = narrator["forename"] + " " + narrator["surname"]
-    return narrator
+    return get_cached("narrator", narrator_id, load_narrator)
 
 
+@timing.timed("data")
 def get_narrator_with_books(narrator_id):
     """
-    Given a narrator's ID, return a dict containing the narrator's attributes
+    Given a narrator's ID, return a Person containing the narrator's attributes
     including the books narrated by the narrator.
 
     A narrator's attributes are:
@@ -318,14 +419,15 @@ def get_narrator_with_books(narrator_id):
         surname
         forename
         display_name
-        books -- a list of book dicts
+        books -- a list of Books
 
     Return None if the narrator doesn't exist.
     """
     narrator = get_narrator(narrator_id)
     if narrator is not None:
-        # Get the books narrated by the narrator and store the list as the
-        # books attribute.
+        # Copy the shared narrator, then get the books narrated by the
+        # narrator and store the list as the books attribute.
+        narrator = narrator.copy()
         narrator["books"] = []
         rows = db.book.select_ids_for_narrator(narrator_id)
         for row in rows:
@@ -337,7 +439,7 @@ def get_narrator_with_books(narrator_id):
 
 def get_narrators_for_book(book_id):
     """
-    Given a book's ID, return a list of dicts containing the attributes of
+    Given a book's ID, return a list of Persons containing the attributes of
     the narrators of the book.
 
     A narrator's attributes are:
@@ -345,7 +447,7 @@ def get_narrators_for_book(book_id):
         surname
         forename
         display_name
-        books -- a list of book dicts
+        books -- a list of Books
 
     Return an empty list if no narrators are found.
     """
@@ -360,7 +462,7 @@ def get_narrators_for_book(book_id):
 
 def get_note(note_id):
     """
-    Given a note's ID, return a dict containing the note's attributes.
+    Given a note's ID, return a Note containing the note's attributes.
 
     A note's attributes are:
         id
@@ -376,23 +478,13 @@ def get_note(note_id):
     note = None
     row = db.note.select_note(note_id)
     if row is not None:
-        (id, username, status, finish_date, rating_stars, rating_description,
-            comments) = row
-        note = {
-            "id": id,
-            "username": username,
-            "status": status,
-            "finish_date": finish_date,
-            "rating_stars": rating_stars,
-            "rating_description": rating_description,
-            "comments": comments,
-        }
+        note = build_note(row)
     return note
 
 
 def get_notes_for_book(book_id):
     """
-    Given a book's ID, return a list of dicts containing the note attributes.
+    Given a book's ID, return a list of Notes containing the note attributes.
 
     A note's attributes are:
         id
@@ -416,16 +508,14 @@ def get_notes_for_book(book_id):
 
 def get_rating(note):
     """
-    From a note dict, return a rating string that is a combination of the
+    From a note, return a rating string that is a combination of the
     rating_stars and rating_description values. Return an empty string if these
     are None.
     """
-    rating = ""
-    if note["rating_stars"] is not None:
-        rating = str(note["rating_stars"]) + " " + note["rating_description"]
-    return rating
+    return note["rating"]
 
 
+@timing.timed("data")
 def get_summary():
     """
     Return a dict containing the summary's attributes.
@@ -495,21 +585,12 @@ def get_title_sort_key(title):
     or "An" from the beginning of the title and converting the result to
     an uppercase string.
     """
-    if title.startswith("A "):
-        title_sort_key = title[2:]
-    elif title.startswith("An "):
-        title_sort_key = title[3:]
-    elif title.startswith("The "):
-        title_sort_key = title[4:]
-    else:
-        title_sort_key = title
-    title_sort_key = title_sort_key.upper()
-    return title_sort_key
+    return entities.get_title_sort_key(title)
 
 
 def get_translator(translator_id):
     """
-    Return a dict containing the translator's attributes, excluding the books
+    Return a Person containing the translator's attributes, excluding the books
     attribute.
 
     A translator's attributes are:
@@ -518,30 +599,16 @@ def get_translator(translator_id):
         forename
         display_name  -- forename + " " + surname
 
+    The entity is shared through the identity map and must not be modified.
+
     Return None if the translator doesn't exist.
     """
-    translator = None
-    row = db.translator.select_translator(translator_id)
-    if row is not None:
-        # Store the attributes selected from the database.
-        id, surname, forename = row
-        translator = {
-            "id": id,
-            "surname": surname,
-            "forename": forename
-        }
-
-        # Compute the display_name attribute.
-        if translator["surname"] is None:
-            translator["display_name"] = translator["forename"]
-        else:
-            translator["display_name"] = translator["forename"] + " " + translator["surname"]
-    return translator
+    return get_cached("translator", translator_id, load_translator)
 
 
 def get_translators_for_book(book_id):
     """
-    Given a book's ID, return a list of dicts containing the attributes of
+    Given a book's ID, return a list of Persons containing the attributes of
     the translators of the book.
 
     A translator's attributes are:
@@ -561,9 +628,10 @@ def get_translators_for_book(book_id):
     return translators
 
 
+@timing.timed("data")
 def get_translator_with_books(translator_id):
     """
-    Given a translator's ID, return a dict containing the translator's
+    Given a translator's ID, return a Person containing the translator's
     attributes including the books translated by the translator.
 
     A translator's attributes are:
@@ -571,12 +639,14 @@ def get_translator_with_books(translator_id):
         surname
         forename
         display_name
-        books -- a list of book dicts
+        books -- a list of Books
 
     Return None if the translator doesn't exist.
     """
     translator = get_translator(translator_id)
     if translator is not None:
+        # Copy the shared translator before adding the books attribute.
+        translator = translator.copy()
         translator["books"] = []
         rows = db.book.select_ids_for_translator(translator_id)
         for row in rows:
@@ -584,3 +654,99 @@ def get_translator_with_books(translator_id):
             book = get_book(book_id)
             translator["books"].append(book)
     return translator
+
+
+def group_people_by_book(rows, kind, build_person):
+    """
+    rows are result set rows containing a book ID followed by a person's id,
+    surname, and forename, as returned by db.author.select_authors_for_books()
+    and its narrator and translator counterparts. kind is the person's
+    identity map kind: "author", "narrator", or "translator".
+
+    Return a dict mapping each book ID to a list of Persons. Each Person is
+    taken from the identity map or, if it isn't there, created by
+    build_person() and stored in the identity map, so it is shared by all of
+    the person's books.
+    """
+    people = identity_map[kind]
+    people_by_book = {}
+    for row in rows:
+        (book_id, person_id) = row[:2]
+        if person_id in people:
+            cache_stats[kind]["hits"] += 1
+        else:
+            cache_stats[kind]["misses"] += 1
+            people[person_id] = build_person(row[1:])
+        people_by_book.setdefault(book_id, []).append(people[person_id])
+    return people_by_book
+
+
+def load_author(author_id):
+    """
+    Select the author and return a Person containing the author's attributes,
+    bypassing the identity map. Return None if the author doesn't exist.
+    """
+    author = None
+    row = db.author.select(author_id)
+    if row is not None:
+        author = build_author(row)
+    return author
+
+
+def load_book(book_id):
+    """
+    Select the book and its related records and return a Book containing the
+    book's attributes, bypassing the identity map for the book itself. Return
+    None if the book's ID is not in the database.
+    """
+    row = db.book.select_book(book_id)
+    if row is None:
+        return None
+
+    book = build_book(
+        row,
+        authors=get_authors_for_book(book_id),
+        translators=get_translators_for_book(book_id),
+        narrators=get_narrators_for_book(book_id),
+        acquisition=get_acquisition_for_book(book_id),
+        notes=get_notes_for_book(book_id),
+    )
+    return book
+
+
+def load_narrator(narrator_id):
+    """
+    Select the narrator and return a Person containing the narrator's
+    attributes, bypassing the identity map. Return None if the narrator
+    doesn't exist.
+    """
+    narrator = None
+    row = db.narrator.select_narrator(narrator_id)
+    if row is not None:
+        narrator = build_narrator(row)
+    return narrator
+
+
+def load_translator(translator_id):
+    """
+    Select the translator and return a Person containing the translator's
+    attributes, bypassing the identity map. Return None if the translator
+    doesn't exist.
+    """
+    translator = None
+    row = db.translator.select_translator(translator_id)
+    if row is not None:
+        translator = build_translator(row)
+    return translator
+
+
+def reset_cache():
+    """
+    Empty the identity map and reset its hit and miss counts. Call this at the
+    end of each request so that the next request sees fresh data.
+    """
+    logger.debug(f"Identity map statistics: {cache_stats}")
+    for kind in identity_map:
+        identity_map[kind].clear()
+        cache_stats[kind]["hits"] = 0
+        cache_stats[kind]["misses"] = 0
@@ -2,36 +2,89 @@
 db is a wrapper for connecting to the database, managing transactions,
 and interacting with the database.
 
-Make all modules available on import of the package.
+Make all modules available as attributes of the package. The table modules
+are imported when they are first used, so that a page view imports only the
+modules for the tables it queries and not, for example, db.user and argon2.
 
-The database connection is stored in db.conn.
+The database connection is stored in db.conn. If instrumentation is enabled,
+the connection is a db.query_log.InstrumentedConnection, which records the
+statements executed on it.
+
+Every commit increments the data version stored in tbl_data_version, so a
+reader can check whether the data changed with get_data_version(). The
+version is read from the database itself, so it can't disagree with the data.
 """
 
 import logging
 logger = logging.getLogger(__name__)
+import pathlib
 import sqlite3
+import sys
+
+from . import data_version
+from . import query_log
 
-from . import acquisition
-from . import acquisition_type
-from . import author
-from . import book
-from . import book_author
-from . import book_narrator
-from . import book_translator
-from . import counts
-from . import narrator
-from . import note
-from . import rating
-from . import status
-from . import translator
-from . import user
-from . import vendor
+# SUBMODULES lists the table modules available as attributes of the package.
+SUBMODULES = (
+    "acquisition",
+    "acquisition_type",
+    "author",
+    "book",
+    "book_author",
+    "book_narrator",
+    "book_translator",
+    "counts",
+    "data_version",
+    "migration",
+    "narrator",
+    "note",
+    "query_log",
+    "query_plan",
+    "rating",
+    "status",
+    "translator",
+    "user",
+    "vendor",
+)
 
 # db.conn is a singleton containing the connection to the SQLite database file.
 conn = None
 
+# db.db_path is the path of the connected database file.
+db_path = None
+
+# db.upsert_returning is True if the SQLite library supports an upsert with a
+# RETURNING clause (SQLite 3.35.0 or later), so that a table module's save()
+# can select or insert a row and return its ID with a single statement. It can
+# be set to False to use the SELECT and INSERT statements instead.
+#
+# The table modules' upsert() functions use INSERT ... ON CONFLICT DO UPDATE
+# with a no-op update that sets a column to its own value, so that RETURNING
+# returns the ID of the existing row. ON CONFLICT DO NOTHING returns no row
+# when the row exists. The people's save() functions use an upsert only for a
+# surname that isn't NULL, since the UNIQUE constraint on (surname, forename)
+# doesn't apply to a NULL surname.
+upsert_returning = sqlite3.sqlite_version_info >= (3, 35, 0)
+
 # Functions are listed in alphabetical order.
 
+def __dir__():
+    return sorted(set(globals()) | set(SUBMODULES))
+
+
+def __getattr__(name):
+    """
+    Import and return the table module name on its first use, as the
+    audiobooks package's __getattr__() does.
+    """
+    if name in SUBMODULES:
+        # sys.modules holds the submodule even while it is being imported, as
+        # it is when a submodule imports a package that imports it in turn.
+        __import__(f"{__name__}.{name}")
+        return sys.modules[f"{__name__}.{name}"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def begin_transaction():
     global conn
     conn.execute("BEGIN TRANSACTION")
@@ -39,23 +92,76 @@ def begin_transaction():
 
 def close():
     global conn
+    global db_path
     if conn is not None:
         conn.close()
         conn = None
+        db_path = None
 
 
 def commit():
+    """
+    Increment the data version and commit the transaction.
+    """
     global conn
+    data_version.increment()
     conn.execute("COMMIT")
 
 
-def connect(db_file):
+def connect(db_file, read_only=False):
+    """
+    Connect to the database file. If read_only is True, open the file
+    read-only so that the connection can't change the database.
+
+    If query_log.is_enabled() returns True, the connection is a
+    query_log.InstrumentedConnection.
+    """
     global conn
-    conn = sqlite3.connect(database=db_file, isolation_level=None)
+    global db_path
+    factory = sqlite3.Connection
+    if query_log.is_enabled():
+        factory = query_log.InstrumentedConnection
+    if read_only:
+        database = f"{pathlib.Path(db_file).resolve().as_uri()}?mode=ro"
+        conn = sqlite3.connect(
+            database=database, isolation_level=None, uri=True, factory=factory)
+    else:
+        conn = sqlite3.connect(
+            database=db_file, isolation_level=None, factory=factory)
+    db_path = db_file
     enforce_foreign_key_constraints()
 
 
 def create_schema():
+    """
+    Create the tables and indexes of a new database and set its schema
+    version to the latest migration's version.
+
+    If the database already has tables, apply its pending migrations instead,
+    since its tables have the schema of its version rather than the latest
+    schema.
+    """
+    # The table modules are imported here because the package's __getattr__()
+    # isn't called for names used inside the package's own functions.
+    from . import acquisition
+    from . import acquisition_type
+    from . import author
+    from . import book
+    from . import book_author
+    from . import book_narrator
+    from . import book_translator
+    from . import migration
+    from . import narrator
+    from . import note
+    from . import rating
+    from . import status
+    from . import translator
+    from . import user
+    from . import vendor
+    if migration.get_user_version() != 0 or migration.has_tables():
+        migration.migrate()
+        return
+    data_version.create_table()
     user.create_table()
     author.create_table()
     narrator.create_table()
@@ -70,6 +176,28 @@ def create_schema():
     book_narrator.create_table()
     book_translator.create_table()
     acquisition.create_table()
+    create_indexes()
+    migration.set_user_version(migration.SCHEMA_VERSION)
+
+
+def create_indexes():
+    """
+    Create the indexes on the join and lookup columns of the tables. The
+    indexes are created only if they don't exist, so this can be called on a
+    database created before the indexes were added.
+    """
+    from . import acquisition
+    from . import book_author
+    from . import book_narrator
+    from . import book_translator
+    from . import note
+    from . import vendor
+    book_author.create_indexes()
+    book_narrator.create_indexes()
+    book_translator.create_indexes()
+    note.create_indexes()
+    acquisition.create_indexes()
+    vendor.create_indexes()
 
 
 def enforce_foreign_key_constraints():
@@ -90,11 +218,63 @@ def enforce_foreign_key_constraints():
     verify_foreign_key_constraints()
 
 
+def get_data_version():
+    """
+    Return the data version, which increases each time a transaction is
+    committed, or None if the database has no data version.
+    """
+    row = get_data_version_row()
+    version = None
+    if row is not None:
+        version = row[0]
+    return version
+
+
+def get_data_version_row():
+    """
+    Return a result set row containing the data version and the UTC time of
+    the last commit, or None if the database has no data version.
+    """
+    try:
+        row = data_version.select_version()
+    except sqlite3.OperationalError:
+        # tbl_data_version doesn't exist.
+        row = None
+    return row
+
+
+def release_savepoint(name):
+    """
+    Release the savepoint, keeping the changes made since it was set as part
+    of the enclosing transaction.
+    """
+    global conn
+    conn.execute(f"RELEASE SAVEPOINT {name}")
+
+
 def rollback():
     global conn
     conn.execute("ROLLBACK")
 
 
+def rollback_to_savepoint(name):
+    """
+    Roll back the changes made since the savepoint was set, and release it.
+    """
+    global conn
+    conn.execute(f"ROLLBACK TO SAVEPOINT {name}")
+    conn.execute(f"RELEASE SAVEPOINT {name}")
+
+
+def set_savepoint(name):
+    """
+    Set a savepoint within the current transaction, so that the changes made
+    after it can be rolled back without rolling back the earlier changes.
+    """
+    global conn
+    conn.execute(f"SAVEPOINT {name}")
+
+
 def verify_foreign_key_constraints():
     """
     Verify that the PRAGMA foreign_keys value is 1.
@@ -7,6 +7,26 @@ logger = logging.getLogger(__name__)
 
 from .. import db
 
+def create_indexes():
+    """
+    Create the indexes on tbl_acquisition used to find a book's acquisitions
+    and to count the acquisitions by date.
+    """
+    logger.debug("Creating the indexes on tbl_acquisition...")
+    sql_create_book_id_index = """
+        CREATE INDEX IF NOT EXISTS
+        idx_acquisition_book_id
+        ON tbl_acquisition (book_id)
+    """
+    db.conn.execute(sql_create_book_id_index)
+    sql_create_acquisition_date_index = """
+        CREATE INDEX IF NOT EXISTS
+        idx_acquisition_acquisition_date
+        ON tbl_acquisition (acquisition_date)
+    """
+    db.conn.execute(sql_create_acquisition_date_index)
+
+
 def create_table():
     """
     Create tbl_acquisition.
@@ -41,14 +61,14 @@ def insert(user_id, book_id, vendor_id, acquisition_type_id, acquisition_date,
     Insert the acquisition and return the new acquisition_id.
     Raises an exception if the acquisition is already in the database.
     """
-    logger.debug(f"user_id: {user_id}")
-    logger.debug(f"book_id: {book_id}")
-    logger.debug(f"vendor_id: {vendor_id}")
-    logger.debug(f"acquisition_type_id: {acquisition_type_id}")
-    logger.debug(f"acquisition_date: {acquisition_date}")
-    logger.debug(f"discontinued: {discontinued}")
-    logger.debug(f"audible_credits: {audible_credits}")
-    logger.debug(f"price_in_cents: {price_in_cents}")
+    logger.debug("user_id: %s", user_id)
+    logger.debug("book_id: %s", book_id)
+    logger.debug("vendor_id: %s", vendor_id)
+    logger.debug("acquisition_type_id: %s", acquisition_type_id)
+    logger.debug("acquisition_date: %s", acquisition_date)
+    logger.debug("discontinued: %s", discontinued)
+    logger.debug("audible_credits: %s", audible_credits)
+    logger.debug("price_in_cents: %s", price_in_cents)
     sql_insert = """
     INSERT INTO
         tbl_acquisition
@@ -78,31 +98,65 @@ def insert(user_id, book_id, vendor_id, acquisition_type_id, acquisition_date,
         )
     )
     acquisition_id = cur.lastrowid
-    logger.debug(f"New acquisition_id: {acquisition_id}")
+    logger.debug("New acquisition_id: %s", acquisition_id)
     return acquisition_id
 
 
+def insert_many(acquisitions):
+    """
+    Insert the acquisitions whose (user_id, book_id, vendor_id,
+    acquisition_type_id, acquisition_date, discontinued, audible_credits,
+    price_in_cents) tuples are in acquisitions, in order, with a single
+    executemany() call. An acquisition is skipped if the user has already
+    acquired the book from the vendor.
+    """
+    sql_insert = """
+    INSERT INTO
+        tbl_acquisition
+        (
+            user_id,
+            book_id,
+            vendor_id,
+            acquisition_type_id,
+            acquisition_date,
+            discontinued,
+            audible_credits,
+            price_in_cents
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (user_id, book_id, vendor_id) DO NOTHING
+    """
+    db.conn.executemany(sql_insert, acquisitions)
+
+
 def save(user_id, book_id, vendor_id, acquisition_type_id, acquisition_date,
         discontinued, audible_credits=None, price_in_cents=None):
     """
     If the acquisition exists, select the existing book_acquisition_id.
     Otherwise, insert the book acquisition and get the new book_acquisition_id.
     Return the book_acquisition_id.
+
+    If db.upsert_returning is True, this is done with a single statement.
     """
-    logger.debug(f"user_id: {user_id}")
-    logger.debug(f"book_id: {book_id}")
-    logger.debug(f"vendor_id: {vendor_id}")
-    logger.debug(f"acquisition_type_id: {acquisition_type_id}")
-    logger.debug(f"acquisition_date: '{acquisition_date}'")
-    logger.debug(f"discontinued: {discontinued}")
-    logger.debug(f"audible_credits: {audible_credits}")
-    logger.debug(f"price_in_cents: {price_in_cents}")
-    acquisition_id = select_id(user_id, book_id, vendor_id)
-    if acquisition_id is None:
-        acquisition_id = insert(
+    logger.debug("user_id: %s", user_id)
+    logger.debug("book_id: %s", book_id)
+    logger.debug("vendor_id: %s", vendor_id)
+    logger.debug("acquisition_type_id: %s", acquisition_type_id)
+    logger.debug("acquisition_date: '%s'", acquisition_date)
+    logger.debug("discontinued: %s", discontinued)
+    logger.debug("audible_credits: %s", audible_credits)
+    logger.debug("price_in_cents: %s", price_in_cents)
+    if db.upsert_returning:
+        acquisition_id = upsert(
             user_id, book_id, vendor_id, acquisition_type_id, acquisition_date,
             discontinued, audible_credits, price_in_cents)
-    logger.debug(f"acquisition_id: {acquisition_id}")
+    else:
+        acquisition_id = select_id(user_id, book_id, vendor_id)
+        if acquisition_id is None:
+            acquisition_id = insert(
+                user_id, book_id, vendor_id, acquisition_type_id, acquisition_date,
+                discontinued, audible_credits, price_in_cents)
+    logger.debug("acquisition_id: %s", acquisition_id)
     return acquisition_id
 
 
@@ -140,6 +194,42 @@ def select_acquisition_for_book(book_id):
     return row
 
 
+def select_acquisitions_for_books():
+    """
+    Return result set rows containing the book ID and the acquisition
+    information for every acquisition of every book.
+
+    The rows for each book are in the order of tbl_acquisition.id.
+    """
+    sql_select_acquisitions_for_books = """
+        SELECT
+            tbl_acquisition.book_id,
+            tbl_acquisition.id,
+            tbl_user.username,
+            tbl_vendor.name,
+            tbl_acquisition_type.name,
+            tbl_acquisition.acquisition_date,
+            tbl_acquisition.discontinued,
+            tbl_acquisition.audible_credits,
+            tbl_acquisition.price_in_cents
+        FROM
+            tbl_acquisition
+            INNER JOIN tbl_user
+                ON tbl_acquisition.user_id = tbl_user.id
+            INNER JOIN tbl_vendor
+                ON tbl_acquisition.vendor_id = tbl_vendor.id
+            INNER JOIN tbl_acquisition_type
+                ON tbl_acquisition.acquisition_type_id = tbl_acquisition_type.id
+        ORDER BY
+            tbl_acquisition.book_id,
+            tbl_acquisition.id
+    """
+    cur = db.conn.execute(sql_select_acquisitions_for_books)
+    rows = cur.fetchall()
+    cur.close()
+    return rows
+
+
 def select_id(user_id, book_id, vendor_id):
     """
     Select and return the ID for the acquisition.
@@ -155,14 +245,61 @@ def select_id(user_id, book_id, vendor_id):
             AND tbl_acquisition.book_id = ?
             AND tbl_acquisition.vendor_id = ?
     """
-    logger.debug(f"user_id: {user_id}")
-    logger.debug(f"book_id: {book_id}")
-    logger.debug(f"vendor_id: {vendor_id}")
+    logger.debug("user_id: %s", user_id)
+    logger.debug("book_id: %s", book_id)
+    logger.debug("vendor_id: %s", vendor_id)
     cur = db.conn.execute(sql_select_id, (user_id, book_id, vendor_id,))
     db_row = cur.fetchone()
-    logger.debug(f"Returned row: {db_row}")
+    logger.debug("Returned row: %s", db_row)
     acquisition_id = None
     if db_row is not None:
         acquisition_id = db_row[0]
-    logger.debug(f"Existing acquisition_id: {acquisition_id}")
+    logger.debug("Existing acquisition_id: %s", acquisition_id)
+    return acquisition_id
+
+
+def upsert(user_id, book_id, vendor_id, acquisition_type_id, acquisition_date,
+        discontinued, audible_credits=None, price_in_cents=None):
+    """
+    Insert the acquisition if the user hasn't already acquired the book from
+    the vendor, and return the acquisition_id of the new or existing
+    acquisition. The attributes of an existing acquisition aren't changed.
+    """
+    logger.debug("user_id: %s", user_id)
+    logger.debug("book_id: %s", book_id)
+    logger.debug("vendor_id: %s", vendor_id)
+    sql_upsert = """
+    INSERT INTO
+        tbl_acquisition
+        (
+            user_id,
+            book_id,
+            vendor_id,
+            acquisition_type_id,
+            acquisition_date,
+            discontinued,
+            audible_credits,
+            price_in_cents
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (user_id, book_id, vendor_id) DO UPDATE SET
+            user_id = excluded.user_id
+        RETURNING id
+    """
+    cur = db.conn.execute(
+        sql_upsert,
+        (
+            user_id,
+            book_id,
+            vendor_id,
+            acquisition_type_id,
+            acquisition_date,
+            discontinued,
+            audible_credits,
+            price_in_cents,
+        )
+    )
+    (acquisition_id,) = cur.fetchone()
+    cur.close()
+    logger.debug("acquisition_id: %s", acquisition_id)
     return acquisition_id
@@ -25,7 +25,7 @@ def create_table():
 
 
 def insert(acquisition_type):
-    logger.debug(f"acquisition_type: '{acquisition_type}'")
+    logger.debug("acquisition_type: '%s'", acquisition_type)
     sql_insert = """
         INSERT INTO tbl_acquisition_type
         (
@@ -35,26 +35,66 @@ def insert(acquisition_type):
     """
     cur = db.conn.execute(sql_insert, (acquisition_type,))
     acquisition_type_id = cur.lastrowid
-    logger.debug(f"New acquisition_type_id: {acquisition_type_id}")
+    logger.debug("New acquisition_type_id: %s", acquisition_type_id)
     return acquisition_type_id
 
 
+def insert_many(names):
+    """
+    Insert the acquisition types whose names are in names, in order, with a
+    single executemany() call.
+    """
+    sql_insert = """
+        INSERT INTO tbl_acquisition_type
+        (
+            name
+        )
+        VALUES (?)
+    """
+    db.conn.executemany(sql_insert, [(name,) for name in names])
+
+
 def save(acquisition_type):
     """
     If the acquisition_type exists, select the existing acquisition_type_id.
     Otherwise, insert the acquisition_type and get the new acquisition_type_id.
     Return the acquisiton_type_id.
+
+    If db.upsert_returning is True, this is done with a single statement.
     """
-    logger.debug(f"acquisition_type: '{acquisition_type}'")
-    acquisition_type_id = select_id(acquisition_type)
-    if acquisition_type_id is None:
-        acquisition_type_id = insert(acquisition_type)
-    logger.debug(f"acquisition_type_id for acquisition_type '{acquisition_type}': {acquisition_type_id}")
+    logger.debug("acquisition_type: '%s'", acquisition_type)
+    if db.upsert_returning:
+        acquisition_type_id = upsert(acquisition_type)
+    else:
+        acquisition_type_id = select_id(acquisition_type)
+        if acquisition_type_id is None:
+            acquisition_type_id = insert(acquisition_type)
+    logger.debug("acquisition_type_id for acquisition_type '%s': %s", acquisition_type, acquisition_type_id)
     return acquisition_type_id
 
 
+def select_acquisition_types():
+    """
+    Return result set rows containing the ID and name of every acquisition
+    type.
+    """
+    sql_select_acquisition_types = """
+        SELECT
+            tbl_acquisition_type.id,
+            tbl_acquisition_type.name
+        FROM
+            tbl_acquisition_type
+        ORDER BY
+            tbl_acquisition_type.id
+    """
+    cur = db.conn.execute(sql_select_acquisition_types)
+    rows = cur.fetchall()
+    cur.close()
+    return rows
+
+
 def select_id(acquisition_type):
-    logger.debug(f"acquisition_type: '{acquisition_type}'")
+    logger.debug("acquisition_type: '%s'", acquisition_type)
     sql_select_id = """
         SELECT
             tbl_acquisition_type.id
@@ -65,9 +105,32 @@ def select_id(acquisition_type):
     """
     cur = db.conn.execute(sql_select_id, (acquisition_type,))
     db_row = cur.fetchone()
-    logger.debug(f"Returned row for acquisiton_type '{acquisition_type}': {db_row}")
+    logger.debug("Returned row for acquisiton_type '%s': %s", acquisition_type, db_row)
     acquisition_type_id = None
     if db_row is not None:
         acquisition_type_id = db_row[0]
-    logger.debug(f"Existing acquistion_type_id: {acquisition_type_id}")
+    logger.debug("Existing acquistion_type_id: %s", acquisition_type_id)
+    return acquisition_type_id
+
+
+def upsert(acquisition_type):
+    """
+    Insert the acquisition_type if it isn't in the database, and return the acquisition_type_id of
+    the new or existing acquisition_type.
+    """
+    logger.debug("acquisition_type: '%s'", acquisition_type)
+    sql_upsert = """
+        INSERT INTO tbl_acquisition_type
+        (
+            name
+        )
+        VALUES (?)
+        ON CONFLICT (name) DO UPDATE SET
+            name = excluded.name
+        RETURNING id
+    """
+    cur = db.conn.execute(sql_upsert, (acquisition_type,))
+    (acquisition_type_id,) = cur.fetchone()
+    cur.close()
+    logger.debug("acquisition_type_id for acquisition_type '%s': %s", acquisition_type, acquisition_type_id)
     return acquisition_type_id
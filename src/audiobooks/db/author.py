@@ -31,8 +31,8 @@ def insert(surname, forename):
     Insert the author's surname and forename and return the new author_id.
     The database raises an exception if the author is already in the database.
     """
-    logger.debug(f"surname: '{surname}'")
-    logger.debug(f"forename: '{forename}'")
+    logger.debug("surname: '%s'", surname)
+    logger.debug("forename: '%s'", forename)
     if surname == "":
         surname = None
     if forename == "":
@@ -48,22 +48,50 @@ def insert(surname, forename):
     cur = db.conn.execute(sql_insert, (surname, forename,))
     author_id = cur.lastrowid
     cur.close()
-    logger.debug(f"New author_id: {author_id}")
+    logger.debug("New author_id: %s", author_id)
     return author_id
 
 
+def insert_many(names):
+    """
+    Insert the authors whose (surname, forename) tuples are in names, in
+    order, with a single executemany() call.
+    """
+    sql_insert = """
+        INSERT INTO tbl_author
+        (
+            surname,
+            forename
+        )
+        VALUES (?, ?)
+    """
+    db.conn.executemany(sql_insert, names)
+
+
 def save(surname, forename):
     """
     If the author exists, select the existing author_id.
     Otherwise, insert the author and get the new author_id.
     Return the author_id.
+
+    If db.upsert_returning is True and the surname isn't None, this is done
+    with a single statement.
     """
-    logger.debug(f"surname: '{surname}'")
-    logger.debug(f"forename: '{forename}'")
-    author_id = select_id(surname, forename)
-    if author_id is None:
-        author_id = insert(surname, forename)
-    logger.debug(f"author_id: {author_id}")
+    logger.debug("surname: '%s'", surname)
+    logger.debug("forename: '%s'", forename)
+    # An empty surname means that the person has a single name, which is
+    # saved with a NULL surname.
+    if surname == "":
+        surname = None
+    if forename == "":
+        raise ValueError("The forename must not be empty")
+    if db.upsert_returning and surname is not None:
+        author_id = upsert(surname, forename)
+    else:
+        author_id = select_id(surname, forename)
+        if author_id is None:
+            author_id = insert(surname, forename)
+    logger.debug("author_id: %s", author_id)
     return author_id
 
 
@@ -87,13 +115,86 @@ def select(author_id):
     return result_set
 
 
+def select_authors():
+    """
+    Return a result set containing the attributes of all authors in the order
+    of their IDs.
+    """
+    sql_select_authors = """
+        SELECT
+            tbl_author.id,
+            tbl_author.surname,
+            tbl_author.forename
+        FROM
+            tbl_author
+        ORDER BY
+            tbl_author.id
+    """
+    cur = db.conn.execute(sql_select_authors)
+    result_set = cur.fetchall()
+    cur.close()
+    return result_set
+
+
+def select_authors_after(author_id):
+    """
+    Return result set rows containing the ID, surname, and forename of the
+    authors whose IDs are greater than author_id, such as the authors just inserted
+    by insert_many(), in the order of their IDs.
+    """
+    sql_select_authors_after = """
+        SELECT
+            tbl_author.id,
+            tbl_author.surname,
+            tbl_author.forename
+        FROM
+            tbl_author
+        WHERE
+            tbl_author.id > ?
+        ORDER BY
+            tbl_author.id
+    """
+    cur = db.conn.execute(sql_select_authors_after, (author_id,))
+    rows = cur.fetchall()
+    cur.close()
+    return rows
+
+
+def select_authors_for_books():
+    """
+    Return a result set containing the book ID and the author's attributes
+    for every author of every book.
+
+    The rows for each book are in the order in which the book's authors were
+    saved.
+    """
+    sql_select_authors_for_books = """
+        SELECT
+            tbl_book_author.book_id,
+            tbl_author.id,
+            tbl_author.surname,
+            tbl_author.forename
+        FROM
+            tbl_book_author
+            INNER JOIN tbl_author
+                ON tbl_book_author.author_id = tbl_author.id
+        ORDER BY
+            tbl_book_author.book_id,
+            tbl_book_author.id
+    """
+    cur = db.conn.execute(sql_select_authors_for_books)
+    result_set = cur.fetchall()
+    cur.close()
+    return result_set
+
+
 def select_id(surname, forename):
     """
     Given the surname and forename of an author, return the ID for the author.
     Return None if the author is not in the database.
     """
-    logger.debug(f"surname: '{surname}'")
-    logger.debug(f"forename: '{forename}'")
+    logger.debug("surname: '%s'", surname)
+    logger.debug("forename: '%s'", forename)
     cur = db.conn.cursor()
     if surname is None:
         sql_select_id = """
@@ -119,11 +220,11 @@ def select_id(surname, forename):
         cur.execute(sql_select_id, (surname, forename))
     db_row = cur.fetchone()
     cur.close()
-    logger.debug(f"Returned row: {db_row}")
+    logger.debug("Returned row: %s", db_row)
     author_id = None
     if db_row is not None:
         author_id = db_row[0]
-    logger.debug(f"Existing author_id: {author_id}")
+    logger.debug("Existing author_id: %s", author_id)
     return author_id
 
 
@@ -146,7 +247,7 @@ def select_ids():
 def select_ids_for_book(book_id):
     """
     Given a book's ID, return a result set of the IDs of all authors of the
-    book.
+    book, in the order in which the book's authors were saved.
     """
     sql_select_ids_for_book = """
         SELECT
@@ -157,8 +258,36 @@ def select_ids_for_book(book_id):
                 ON tbl_book_author.author_id = tbl_author.id
         WHERE
             tbl_book_author.book_id = ?
+        ORDER BY
+            tbl_book_author.id
     """
     cur = db.conn.execute(sql_select_ids_for_book, (book_id,))
     result_set = cur.fetchall()
     cur.close()
     return result_set
+
+
+def upsert(surname, forename):
+    """
+    Insert the author if the author isn't in the database, and return the
+    author_id of the new or existing author. The surname must not be NULL,
+    since the UNIQUE constraint doesn't apply to a NULL surname.
+    """
+    logger.debug("surname: '%s'", surname)
+    logger.debug("forename: '%s'", forename)
+    sql_upsert = """
+        INSERT INTO tbl_author
+        (
+            surname,
+            forename
+        )
+        VALUES (?, ?)
+        ON CONFLICT (surname, forename) DO UPDATE SET
+            surname = excluded.surname
+        RETURNING id
+    """
+    cur = db.conn.execute(sql_upsert, (surname, forename,))
+    (author_id,) = cur.fetchone()
+    cur.close()
+    logger.debug("author_id: %s", author_id)
+    return author_id
@@ -34,11 +34,11 @@ def insert(title, book_pub_date, audio_pub_date, hours, minutes):
     The database's unique constraint raises an exception if the book is already
     in the database.
     """
-    logger.debug(f"title: '{title}'")
-    logger.debug(f"book_pub_date: '{book_pub_date}'")
-    logger.debug(f"audio_pub_date: '{audio_pub_date}'")
-    logger.debug(f"hours: {hours}")
-    logger.debug(f"minutes: {minutes}")
+    logger.debug("title: '%s'", title)
+    logger.debug("book_pub_date: '%s'", book_pub_date)
+    logger.debug("audio_pub_date: '%s'", audio_pub_date)
+    logger.debug("hours: %s", hours)
+    logger.debug("minutes: %s", minutes)
     sql_insert = """
         INSERT INTO tbl_book
         (
@@ -53,29 +53,53 @@ def insert(title, book_pub_date, audio_pub_date, hours, minutes):
     cur = db.conn.execute(
         sql_insert, (title, book_pub_date, audio_pub_date, hours, minutes))
     book_id = cur.lastrowid
-    logger.debug(f"New book_id: {book_id}")
+    logger.debug("New book_id: %s", book_id)
     return book_id
 
 
+def insert_many(books):
+    """
+    Insert the books whose (title, book_pub_date, audio_pub_date, hours,
+    minutes) tuples are in books, in order, with a single executemany() call.
+    """
+    sql_insert = """
+        INSERT INTO tbl_book
+        (
+            title,
+            book_pub_date,
+            audio_pub_date,
+            hours,
+            minutes
+        )
+        VALUES (?, ?, ?, ?, ?)
+    """
+    db.conn.executemany(sql_insert, books)
+
+
 def save(title, book_pub_date, audio_pub_date, hours, minutes):
     """
     If the book exists, select and return the existing book ID.
 
     Otherwise, insert the book and return the new book ID.
+
+    If db.upsert_returning is True, this is done with a single statement.
     """
-    logger.debug(f"title: '{title}'")
-    logger.debug(f"book_pub_date: '{book_pub_date}'")
-    logger.debug(f"audio_pub_date: '{audio_pub_date}'")
-    logger.debug(f"hours: {hours}")
-    logger.debug(f"minutes: {minutes}")
-    row = select_id(title)
-    book_id = None
-    if row is not None:
-        book_id = row[0]
-    logger.debug(f"Existing book_id: {book_id}")
-    if book_id is None:
-        book_id = insert(title, book_pub_date, audio_pub_date, hours, minutes)
-    logger.debug(f"book_id for title '{title}': {book_id}")
+    logger.debug("title: '%s'", title)
+    logger.debug("book_pub_date: '%s'", book_pub_date)
+    logger.debug("audio_pub_date: '%s'", audio_pub_date)
+    logger.debug("hours: %s", hours)
+    logger.debug("minutes: %s", minutes)
+    if db.upsert_returning:
+        book_id = upsert(title, book_pub_date, audio_pub_date, hours, minutes)
+    else:
+        row = select_id(title)
+        book_id = None
+        if row is not None:
+            book_id = row[0]
+        logger.debug("Existing book_id: %s", book_id)
+        if book_id is None:
+            book_id = insert(title, book_pub_date, audio_pub_date, hours, minutes)
+    logger.debug("book_id for title '%s': %s", title, book_id)
     return book_id
 
 
@@ -105,6 +129,32 @@ def select_book(book_id):
     return row
 
 
+def select_books():
+    """
+    Return result set rows containing the attributes of all books in the
+    order of their IDs.
+
+    The result set is an empty list if no books are found.
+    """
+    sql_select_books = """
+        SELECT
+            tbl_book.id,
+            tbl_book.title,
+            tbl_book.book_pub_date,
+            tbl_book.audio_pub_date,
+            tbl_book.hours,
+            tbl_book.minutes
+        FROM
+            tbl_book
+        ORDER BY
+            tbl_book.id
+    """
+    cur = db.conn.execute(sql_select_books)
+    rows = cur.fetchall()
+    cur.close()
+    return rows
+
+
 # def select_books_for_author(conn, author_id):
 #     """
 #     Deprecated.
@@ -137,7 +187,7 @@ def select_id(title):
 
     Return None if the book's title is not in the database.
     """
-    logger.debug(f"book title: '{title}'")
+    logger.debug("book title: '%s'", title)
     sql_select_id = """
         SELECT
             tbl_book.id
@@ -148,7 +198,7 @@ def select_id(title):
     """
     cur = db.conn.execute(sql_select_id, (title,))
     row = cur.fetchone()
-    logger.debug(f"Returned row for title '{title}': {row}")
+    logger.debug("Returned row for title '%s': %s", title, row)
     return row
 
 
@@ -172,7 +222,8 @@ def select_ids():
 
 def select_ids_for_author(author_id):
     """
-    Return result set rows containing book IDs for an author.
+    Return result set rows containing book IDs for an author, in the order
+    in which the author's books were saved.
 
     The result set is an empty list if no book IDs are found.
     """
@@ -185,6 +236,8 @@ def select_ids_for_author(author_id):
                 ON tbl_book.id = tbl_book_author.book_id
         WHERE
             tbl_book_author.author_id = ?
+        ORDER BY
+            tbl_book_author.id
     """
     cur = db.conn.execute(sql_select_ids_for_author, (author_id,))
     rows = cur.fetchall()
@@ -194,7 +247,8 @@ def select_ids_for_author(author_id):
 
 def select_ids_for_narrator(narrator_id):
     """
-    Return result set rows containing book IDs for a narrator.
+    Return result set rows containing book IDs for a narrator, in the order
+    in which the narrator's books were saved.
 
     The result set is an empty list if no book IDs are found.
     """
@@ -207,6 +261,8 @@ def select_ids_for_narrator(narrator_id):
                 ON tbl_book.id = tbl_book_narrator.book_id
         WHERE
             tbl_book_narrator.narrator_id = ?
+        ORDER BY
+            tbl_book_narrator.id
     """
     cur = db.conn.execute(sql_select_ids_for_narrator, (narrator_id,))
     rows = cur.fetchall()
@@ -214,9 +270,32 @@ def select_ids_for_narrator(narrator_id):
     return rows
 
 
+def select_ids_for_titles(titles):
+    """
+    Return result set rows containing the ID and title of each book whose
+    title is in the list titles, which must not have more items than the
+    number of parameters SQLite allows in a statement.
+    """
+    placeholders = ", ".join(["?"] * len(titles))
+    sql_select_ids_for_titles = f"""
+        SELECT
+            tbl_book.id,
+            tbl_book.title
+        FROM
+            tbl_book
+        WHERE
+            tbl_book.title IN ({placeholders})
+    """
+    cur = db.conn.execute(sql_select_ids_for_titles, titles)
+    rows = cur.fetchall()
+    cur.close()
+    return rows
+
+
 def select_ids_for_translator(translator_id):
     """
-    Return result set rows containing book IDs for a translator.
+    Return result set rows containing book IDs for a translator, in the order
+    in which the translator's books were saved.
 
     The result set is an empty list if no book IDs are found.
     """
@@ -229,8 +308,39 @@ def select_ids_for_translator(translator_id):
                 ON tbl_book.id = tbl_book_translator.book_id
         WHERE
             tbl_book_translator.translator_id = ?
+        ORDER BY
+            tbl_book_translator.id
     """
     cur = db.conn.execute(sql_select_ids_for_translator, (translator_id,))
     rows = cur.fetchall()
     cur.close()
     return rows
+
+
+def upsert(title, book_pub_date, audio_pub_date, hours, minutes):
+    """
+    Insert the book if its title isn't in the database, and return the book ID
+    of the new or existing book. The attributes of an existing book aren't
+    changed.
+    """
+    logger.debug("title: '%s'", title)
+    sql_upsert = """
+        INSERT INTO tbl_book
+        (
+            title,
+            book_pub_date,
+            audio_pub_date,
+            hours,
+            minutes
+        )
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (title) DO UPDATE SET
+            title = excluded.title
+        RETURNING id
+    """
+    cur = db.conn.execute(
+        sql_upsert, (title, book_pub_date, audio_pub_date, hours, minutes,))
+    (book_id,) = cur.fetchone()
+    cur.close()
+    logger.debug("book_id for title '%s': %s", title, book_id)
+    return book_id
@@ -7,6 +7,27 @@ logger = logging.getLogger(__name__)
 
 from .. import db
 
+def create_indexes():
+    """
+    Create the covering indexes on tbl_book_author used to find a book's
+    authors and the books of an author. The index on (book_id, author_id) is
+    unique, so that a book author can't be saved twice and save() can use an
+    upsert.
+    """
+    logger.debug("Creating the indexes on tbl_book_author...")
+    sql_create_book_id_index = """
+        CREATE UNIQUE INDEX IF NOT EXISTS
+        idx_book_author_book_id_author_id
+        ON tbl_book_author (book_id, author_id)
+    """
+    db.conn.execute(sql_create_book_id_index)
+    sql_create_author_id_index = """
+        CREATE INDEX IF NOT EXISTS
+        idx_book_author_author_id_book_id
+        ON tbl_book_author (author_id, book_id)
+    """
+    db.conn.execute(sql_create_author_id_index)
+
 def create_table():
     """
     Create table tbl_book_author.
@@ -29,8 +50,8 @@ def insert(book_id, author_id):
     """
     Insert the book author and return the new book_author_id.
     """
-    logger.debug(f"book_id: {book_id}")
-    logger.debug(f"author_id: {author_id}")
+    logger.debug("book_id: %s", book_id)
+    logger.debug("author_id: %s", author_id)
     sql_insert = """
         INSERT INTO
             tbl_book_author
@@ -42,25 +63,71 @@ def insert(book_id, author_id):
     """
     cur = db.conn.execute(sql_insert, (book_id, author_id,))
     book_author_id = cur.lastrowid
-    logger.debug(f"New book_author_id: {book_author_id}")
+    logger.debug("New book_author_id: %s", book_author_id)
     return book_author_id
 
 
+def insert_many(book_authors):
+    """
+    Insert the book authors whose (book_id, author_id) tuples are in book_authors,
+    in order, with a single executemany() call. The book authors already in the
+    table are skipped.
+    """
+    sql_insert = """
+        INSERT INTO
+            tbl_book_author
+            (
+                book_id,
+                author_id
+            )
+            VALUES (?, ?)
+            ON CONFLICT (book_id, author_id) DO NOTHING
+    """
+    db.conn.executemany(sql_insert, book_authors)
+
+
 def save(book_id, author_id):
     """
     If the book author exists, select the existing book_author_id.
     Otherwise, insert the book author and get the new book_author_id.
     Return the book_author_id.
+
+    If db.upsert_returning is True, this is done with a single statement.
     """
-    logger.debug(f"book_id: {book_id}")
-    logger.debug(f"author_id: {author_id}")
-    book_author_id = select_id(book_id, author_id)
-    if book_author_id is None:
-        book_author_id = insert(book_id, author_id)
-    logger.debug(f"book_author_id: {book_author_id}")
+    logger.debug("book_id: %s", book_id)
+    logger.debug("author_id: %s", author_id)
+    if db.upsert_returning:
+        book_author_id = upsert(book_id, author_id)
+    else:
+        book_author_id = select_id(book_id, author_id)
+        if book_author_id is None:
+            book_author_id = insert(book_id, author_id)
+    logger.debug("book_author_id: %s", book_author_id)
     return book_author_id
 
 
+def select_book_authors():
+    """
+    Return result set rows containing the book ID and author ID of every book
+    author, grouped by author in the order in which each author's books were
+    saved.
+    """
+    sql_select_book_authors = """
+        SELECT
+            tbl_book_author.book_id,
+            tbl_book_author.author_id
+        FROM
+            tbl_book_author
+        ORDER BY
+            tbl_book_author.author_id,
+            tbl_book_author.id
+    """
+    cur = db.conn.execute(sql_select_book_authors)
+    rows = cur.fetchall()
+    cur.close()
+    return rows
+
+
 def select_id(book_id, author_id):
     """
     Select and return the ID for the book author.
@@ -77,9 +144,35 @@ def select_id(book_id, author_id):
     """
     cur = db.conn.execute(sql_select_id, (book_id, author_id,))
     db_row = cur.fetchone()
-    logger.debug(f"Returned row for book_id {book_id} author_id {author_id}: {db_row}")
+    logger.debug("Returned row for book_id %s author_id %s: %s", book_id, author_id, db_row)
     book_author_id = None
     if db_row is not None:
         book_author_id = db_row[0]
-    logger.debug(f"Existing book_author_id: {book_author_id}")
+    logger.debug("Existing book_author_id: %s", book_author_id)
+    return book_author_id
+
+
+def upsert(book_id, author_id):
+    """
+    Insert the book author if it isn't in the database, and return the
+    book_author_id of the new or existing book author.
+    """
+    logger.debug("book_id: %s", book_id)
+    logger.debug("author_id: %s", author_id)
+    sql_upsert = """
+        INSERT INTO
+            tbl_book_author
+            (
+                book_id,
+                author_id
+            )
+            VALUES (?, ?)
+            ON CONFLICT (book_id, author_id) DO UPDATE SET
+                book_id = excluded.book_id
+            RETURNING id
+    """
+    cur = db.conn.execute(sql_upsert, (book_id, author_id,))
+    (book_author_id,) = cur.fetchone()
+    cur.close()
+    logger.debug("book_author_id: %s", book_author_id)
     return book_author_id
@@ -7,6 +7,27 @@ logger = logging.getLogger(__name__)
 
 from .. import db
 
+def create_indexes():
+    """
+    Create the covering indexes on tbl_book_narrator used to find a book's
+    narrators and the books of a narrator. The index on (book_id, narrator_id)
+    is unique, so that a book narrator can't be saved twice and save() can use
+    an upsert.
+    """
+    logger.debug("Creating the indexes on tbl_book_narrator...")
+    sql_create_book_id_index = """
+        CREATE UNIQUE INDEX IF NOT EXISTS
+        idx_book_narrator_book_id_narrator_id
+        ON tbl_book_narrator (book_id, narrator_id)
+    """
+    db.conn.execute(sql_create_book_id_index)
+    sql_create_narrator_id_index = """
+        CREATE INDEX IF NOT EXISTS
+        idx_book_narrator_narrator_id_book_id
+        ON tbl_book_narrator (narrator_id, book_id)
+    """
+    db.conn.execute(sql_create_narrator_id_index)
+
 def create_table():
     """
     Create table tbl_book_narrator.
@@ -29,8 +50,8 @@ def insert(book_id, narrator_id):
     """
     Insert the book narrator and return the new book_narrator_id.
     """
-    logger.debug(f"book_id: {book_id}")
-    logger.debug(f"narrator_id: {narrator_id}")
+    logger.debug("book_id: %s", book_id)
+    logger.debug("narrator_id: %s", narrator_id)
     sql_insert = """
         INSERT INTO tbl_book_narrator
         (
@@ -41,22 +62,46 @@ def insert(book_id, narrator_id):
     """
     cur = db.conn.execute(sql_insert, (book_id, narrator_id,))
     book_narrator_id = cur.lastrowid
-    logger.debug(f"New book_narrator_id: {book_narrator_id}")
+    logger.debug("New book_narrator_id: %s", book_narrator_id)
     return book_narrator_id
 
 
+def insert_many(book_narrators):
+    """
+    Insert the book narrators whose (book_id, narrator_id) tuples are in book_narrators,
+    in order, with a single executemany() call. The book narrators already in the
+    table are skipped.
+    """
+    sql_insert = """
+        INSERT INTO
+            tbl_book_narrator
+            (
+                book_id,
+                narrator_id
+            )
+            VALUES (?, ?)
+            ON CONFLICT (book_id, narrator_id) DO NOTHING
+    """
+    db.conn.executemany(sql_insert, book_narrators)
+
+
 def save(book_id, narrator_id):
     """
     If the book narrator exists, select the existing book_narrator_id.
     Otherwise, insert the book narrator and get the new book_narrator_id.
     Return the book_narrator_id.
+
+    If db.upsert_returning is True, this is done with a single statement.
     """
-    logger.debug(f"book_id: {book_id}")
-    logger.debug(f"narratorid: {narrator_id}")
-    book_narrator_id = select_id(book_id, narrator_id)
-    if book_narrator_id is None:
-        book_narrator_id = insert(book_id, narrator_id)
-    logger.debug(f"book_narrator_id: {book_narrator_id}")
+    logger.debug("book_id: %s", book_id)
+    logger.debug("narratorid: %s", narrator_id)
+    if db.upsert_returning:
+        book_narrator_id = upsert(book_id, narrator_id)
+    else:
+        book_narrator_id = select_id(book_id, narrator_id)
+        if book_narrator_id is None:
+            book_narrator_id = insert(book_id, narrator_id)
+    logger.debug("book_narrator_id: %s", book_narrator_id)
     return book_narrator_id
 
 
@@ -65,8 +110,8 @@ def select_id(book_id, narrator_id):
     Select and return the ID for the book narrator.
     Return None if the book narrator is not in the database.
     """
-    logger.debug(f"book_id: {book_id}")
-    logger.debug(f"narratorid: {narrator_id}")
+    logger.debug("book_id: %s", book_id)
+    logger.debug("narratorid: %s", narrator_id)
     sql_select_id = """
         SELECT
             tbl_book_narrator.id
@@ -78,9 +123,35 @@ def select_id(book_id, narrator_id):
     """
     cur = db.conn.execute(sql_select_id, (book_id, narrator_id,))
     db_row = cur.fetchone()
-    logger.debug(f"Returned row {db_row}")
+    logger.debug("Returned row %s", db_row)
     book_narrator_id = None
     if db_row is not None:
         book_narrator_id = db_row[0]
-    logger.debug(f"Existing book_narrator_id: {book_narrator_id}")
+    logger.debug("Existing book_narrator_id: %s", book_narrator_id)
+    return book_narrator_id
+
+
+def upsert(book_id, narrator_id):
+    """
+    Insert the book narrator if it isn't in the database, and return the
+    book_narrator_id of the new or existing book narrator.
+    """
+    logger.debug("book_id: %s", book_id)
+    logger.debug("narrator_id: %s", narrator_id)
+    sql_upsert = """
+        INSERT INTO
+            tbl_book_narrator
+            (
+                book_id,
+                narrator_id
+            )
+            VALUES (?, ?)
+            ON CONFLICT (book_id, narrator_id) DO UPDATE SET
+                book_id = excluded.book_id
+            RETURNING id
+    """
+    cur = db.conn.execute(sql_upsert, (book_id, narrator_id,))
+    (book_narrator_id,) = cur.fetchone()
+    cur.close()
+    logger.debug("book_narrator_id: %s", book_narrator_id)
     return book_narrator_id
@@ -7,6 +7,27 @@ logger = logging.getLogger(__name__)
 
 from .. import db
 
+def create_indexes():
+    """
+    Create the covering indexes on tbl_book_translator used to find a book's
+    translators and the books of a translator. The index on (book_id,
+    translator_id) is unique, so that a book translator can't be saved twice
+    and save() can use an upsert.
+    """
+    logger.debug("Creating the indexes on tbl_book_translator...")
+    sql_create_book_id_index = """
+        CREATE UNIQUE INDEX IF NOT EXISTS
+        idx_book_translator_book_id_translator_id
+        ON tbl_book_translator (book_id, translator_id)
+    """
+    db.conn.execute(sql_create_book_id_index)
+    sql_create_translator_id_index = """
+        CREATE INDEX IF NOT EXISTS
+        idx_book_translator_translator_id_book_id
+        ON tbl_book_translator (translator_id, book_id)
+    """
+    db.conn.execute(sql_create_translator_id_index)
+
 def create_table():
     """
     Create table tbl_book_translator.
@@ -29,8 +50,8 @@ def insert(book_id, translator_id):
     """
     Insert the book translator and return the new book_translator_id.
     """
-    logger.debug(f"book_id: {book_id}")
-    logger.debug(f"translator_id: {translator_id}")
+    logger.debug("book_id: %s", book_id)
+    logger.debug("translator_id: %s", translator_id)
     sql_insert = """
         INSERT INTO
             tbl_book_translator
@@ -42,22 +63,46 @@ def insert(book_id, translator_id):
     """
     cur = db.conn.execute(sql_insert, (book_id, translator_id,))
     book_translator_id = cur.lastrowid
-    logger.debug(f"New book_translator_id: {book_translator_id}")
+    logger.debug("New book_translator_id: %s", book_translator_id)
     return book_translator_id
 
 
+def insert_many(book_translators):
+    """
+    Insert the book translators whose (book_id, translator_id) tuples are in book_translators,
+    in order, with a single executemany() call. The book translators already in the
+    table are skipped.
+    """
+    sql_insert = """
+        INSERT INTO
+            tbl_book_translator
+            (
+                book_id,
+                translator_id
+            )
+            VALUES (?, ?)
+            ON CONFLICT (book_id, translator_id) DO NOTHING
+    """
+    db.conn.executemany(sql_insert, book_translators)
+
+
 def save(book_id, translator_id):
     """
     If the book translator exists, select the existing book_translator_id.
     Otherwise, insert the book translator and get the new book_translator_id.
     Return the book_translator_id.
+
+    If db.upsert_returning is True, this is done with a single statement.
     """
-    logger.debug(f"book_id: {book_id}")
-    logger.debug(f"translator_id: {translator_id}")
-    book_translator_id = select_id(book_id, translator_id)
-    if book_translator_id is None:
-        book_translator_id = insert(book_id, translator_id)
-    logger.debug(f"book_translator_id: {book_translator_id}")
+    logger.debug("book_id: %s", book_id)
+    logger.debug("translator_id: %s", translator_id)
+    if db.upsert_returning:
+        book_translator_id = upsert(book_id, translator_id)
+    else:
+        book_translator_id = select_id(book_id, translator_id)
+        if book_translator_id is None:
+            book_translator_id = insert(book_id, translator_id)
+    logger.debug("book_translator_id: %s", book_translator_id)
     return book_translator_id
 
 
@@ -77,9 +122,35 @@ def select_id(book_id, translator_id):
     """
     cur = db.conn.execute(sql_select_id, (book_id, translator_id,))
     db_row = cur.fetchone()
-    logger.debug(f"Returned row {db_row}")
+    logger.debug("Returned row %s", db_row)
     book_translator_id = None
     if db_row is not None:
         book_translator_id = db_row[0]
-    logger.debug(f"Existing book_translator_id: {book_translator_id}")
+    logger.debug("Existing book_translator_id: %s", book_translator_id)
+    return book_translator_id
+
+
+def upsert(book_id, translator_id):
+    """
+    Insert the book translator if it isn't in the database, and return the
+    book_translator_id of the new or existing book translator.
+    """
+    logger.debug("book_id: %s", book_id)
+    logger.debug("translator_id: %s", translator_id)
+    sql_upsert = """
+        INSERT INTO
+            tbl_book_translator
+            (
+                book_id,
+                translator_id
+            )
+            VALUES (?, ?)
+            ON CONFLICT (book_id, translator_id) DO UPDATE SET
+                book_id = excluded.book_id
+            RETURNING id
+    """
+    cur = db.conn.execute(sql_upsert, (book_id, translator_id,))
+    (book_translator_id,) = cur.fetchone()
+    cur.close()
+    logger.debug("book_translator_id: %s", book_translator_id)
     return book_translator_id
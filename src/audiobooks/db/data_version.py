@@ -0,0 +1,91 @@
+"""
+Database interactions with tbl_data_version.
+
+tbl_data_version contains a single row holding a version number that is
+incremented by db.commit() each time a transaction is committed, so that
+caches and static exports can tell whether the data has changed.
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+import sqlite3
+
+from .. import db
+
+
+def create_table():
+    """
+    Create tbl_data_version and insert its single row with version 0.
+    """
+    logger.debug("Creating table tbl_data_version...")
+    sql_create_table = """
+        CREATE TABLE IF NOT EXISTS
+        tbl_data_version
+        (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL,
+            updated TEXT NOT NULL
+        ) STRICT
+    """
+    db.conn.execute(sql_create_table)
+    sql_insert = """
+        INSERT OR IGNORE INTO tbl_data_version
+        (
+            id,
+            version,
+            updated
+        )
+        VALUES (1, 0, DATETIME('now'))
+    """
+    db.conn.execute(sql_insert)
+
+
+def increment():
+    """
+    Increment the data version and return the new version.
+
+    Return None if tbl_data_version doesn't exist, as in a database created
+    before tbl_data_version was added whose migrations haven't all been
+    applied yet. Migration 3 creates the table.
+    """
+    sql_update = """
+        UPDATE
+            tbl_data_version
+        SET
+            version = version + 1,
+            updated = DATETIME('now')
+        WHERE
+            id = 1
+    """
+    try:
+        db.conn.execute(sql_update)
+    except sqlite3.OperationalError as exc:
+        if "no such table" not in str(exc):
+            raise
+        logger.debug("The database has no tbl_data_version")
+        return None
+    (version, updated) = select_version()
+    logger.debug("New data version: %s", version)
+    return version
+
+
+def select_version():
+    """
+    Return a result set row containing the data version and the UTC time,
+    formatted as "YYYY-MM-DD HH:MM:SS", at which it was last incremented.
+
+    Return None if tbl_data_version has no row.
+    """
+    sql_select_version = """
+        SELECT
+            tbl_data_version.version,
+            tbl_data_version.updated
+        FROM
+            tbl_data_version
+        WHERE
+            tbl_data_version.id = 1
+    """
+    cur = db.conn.execute(sql_select_version)
+    row = cur.fetchone()
+    cur.close()
+    return row
@@ -0,0 +1,248 @@
+"""
+Versioned migrations that upgrade the schema of an existing database.
+
+The schema version is stored in the database's PRAGMA user_version, which is
+0 for a database created before migrations were introduced. Each migration
+upgrades the schema by one version, and create_schema() sets the version of a
+new database to SCHEMA_VERSION, since a new database already has the latest
+schema.
+
+To change the schema, change the create_table() or create_indexes() function
+of the table module so that new databases get the change, then append a
+migration that makes the same change to an existing database with its own
+statements. A migration that has been released is never changed. A migration
+should be written so that it can be applied to a database that already has
+the change.
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+
+from .. import db
+
+
+# The migration functions are listed in version order. Each migration
+# executes its own fixed statements rather than calling the table modules'
+# create_table() or create_indexes() functions, which create the latest
+# schema, so that a migration makes the same change however the schema
+# changes later.
+
+def migrate_1_create_indexes():
+    sql_statements = (
+        """
+        CREATE INDEX IF NOT EXISTS
+        idx_book_author_book_id_author_id
+        ON tbl_book_author (book_id, author_id)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS
+        idx_book_author_author_id_book_id
+        ON tbl_book_author (author_id, book_id)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS
+        idx_book_narrator_book_id_narrator_id
+        ON tbl_book_narrator (book_id, narrator_id)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS
+        idx_book_narrator_narrator_id_book_id
+        ON tbl_book_narrator (narrator_id, book_id)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS
+        idx_book_translator_book_id_translator_id
+        ON tbl_book_translator (book_id, translator_id)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS
+        idx_book_translator_translator_id_book_id
+        ON tbl_book_translator (translator_id, book_id)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS
+        idx_note_book_id_user_id
+        ON tbl_note (book_id, user_id)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS
+        idx_note_status_id_book_id
+        ON tbl_note (status_id, book_id)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS
+        idx_note_finish_date_book_id
+        ON tbl_note (finish_date, book_id)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS
+        idx_acquisition_book_id
+        ON tbl_acquisition (book_id)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS
+        idx_acquisition_acquisition_date
+        ON tbl_acquisition (acquisition_date)
+        """,
+    )
+    for sql_statement in sql_statements:
+        db.conn.execute(sql_statement)
+
+
+def migrate_2_create_unique_indexes():
+    # The book person indexes on (book_id, person_id) become unique, and
+    # tbl_vendor gets a unique index on its name, so that save() can use an
+    # upsert. This fails if the tables already have duplicate rows.
+    sql_statements = (
+        "DROP INDEX IF EXISTS idx_book_author_book_id_author_id",
+        """
+        CREATE UNIQUE INDEX
+        idx_book_author_book_id_author_id
+        ON tbl_book_author (book_id, author_id)
+        """,
+        "DROP INDEX IF EXISTS idx_book_narrator_book_id_narrator_id",
+        """
+        CREATE UNIQUE INDEX
+        idx_book_narrator_book_id_narrator_id
+        ON tbl_book_narrator (book_id, narrator_id)
+        """,
+        "DROP INDEX IF EXISTS idx_book_translator_book_id_translator_id",
+        """
+        CREATE UNIQUE INDEX
+        idx_book_translator_book_id_translator_id
+        ON tbl_book_translator (book_id, translator_id)
+        """,
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS
+        idx_vendor_name
+        ON tbl_vendor (name)
+        """,
+    )
+    for sql_statement in sql_statements:
+        db.conn.execute(sql_statement)
+
+
+def migrate_3_create_data_version_table():
+    # Databases created before tbl_data_version was added got the table on
+    # their first commit. The table is now created only by create_schema()
+    # and this migration.
+    sql_statements = (
+        """
+        CREATE TABLE IF NOT EXISTS
+        tbl_data_version
+        (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL,
+            updated TEXT NOT NULL
+        ) STRICT
+        """,
+        """
+        INSERT OR IGNORE INTO tbl_data_version
+        (
+            id,
+            version,
+            updated
+        )
+        VALUES (1, 0, DATETIME('now'))
+        """,
+    )
+    for sql_statement in sql_statements:
+        db.conn.execute(sql_statement)
+
+
+# MIGRATIONS lists the migrations in order as (version, description, function)
+# tuples. Applying a migration's function upgrades the schema from the
+# previous version to the migration's version.
+MIGRATIONS = (
+    (1, "Create the indexes on the join and lookup columns", migrate_1_create_indexes),
+    (2, "Create the unique indexes used by the upserts", migrate_2_create_unique_indexes),
+    (3, "Create the data version table", migrate_3_create_data_version_table),
+)
+
+# SCHEMA_VERSION is the version of the schema created by create_schema().
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+# Functions are listed in alphabetical order.
+
+def get_pending_migrations():
+    """
+    Return the (version, description, function) tuples of the migrations not
+    yet applied to the database, in the order in which to apply them.
+    """
+    user_version = get_user_version()
+    if user_version > SCHEMA_VERSION:
+        raise ValueError(
+            f"The database's schema version {user_version} is newer than "
+            f"this code's schema version {SCHEMA_VERSION}")
+    return [migration for migration in MIGRATIONS if migration[0] > user_version]
+
+
+def get_user_version():
+    """
+    Return the schema version stored in PRAGMA user_version.
+    """
+    cur = db.conn.execute("PRAGMA user_version")
+    row = cur.fetchone()
+    cur.close()
+    return row[0]
+
+
+def has_tables():
+    """
+    Return True if the database has any tables.
+    """
+    cur = db.conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table'")
+    row = cur.fetchone()
+    cur.close()
+    return row[0] > 0
+
+
+def migrate(dry_run=False):
+    """
+    Apply the pending migrations and return the list of (version,
+    description, function) tuples of the migrations applied. If dry_run is
+    True, return the migrations that would be applied without applying them.
+
+    Each migration and the new schema version are committed in a single
+    transaction, so a migration that fails is rolled back and leaves the
+    database at the previous version. The migrations after it aren't applied.
+    If a transaction is already open, as it is when create_schema() is called
+    on an existing database, the migrations are applied within it, and the
+    caller commits or rolls them back.
+    """
+    pending_migrations = get_pending_migrations()
+    if dry_run:
+        return pending_migrations
+    in_transaction = db.conn.in_transaction
+    applied_migrations = []
+    for migration in pending_migrations:
+        (version, description, function) = migration
+        logger.info(f"Applying migration {version}: {description}...")
+        if in_transaction:
+            function()
+            set_user_version(version)
+        else:
+            db.begin_transaction()
+            try:
+                function()
+                set_user_version(version)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+        logger.info(f"Applied migration {version}")
+        applied_migrations.append(migration)
+    return applied_migrations
+
+
+def set_user_version(version):
+    """
+    Store the schema version in PRAGMA user_version. Like other changes to
+    the database, this is rolled back if the transaction is rolled back.
+    """
+    # A PRAGMA statement can't take parameters, so the version is validated
+    # and formatted into the statement.
+    if not isinstance(version, int) or version < 0:
+        raise ValueError(f"Invalid schema version {version}")
+    db.conn.execute(f"PRAGMA user_version = {version}")
@@ -44,27 +44,53 @@ def insert(surname, forename):
     return narrator_id
 
 
+def insert_many(names):
+    """
+    Insert the narrators whose (surname, forename) tuples are in names, in
+    order, with a single executemany() call.
+    """
+    sql_insert = """
+        INSERT INTO tbl_narrator
+        (
+            surname,
+            forename
+        )
+        VALUES (?, ?)
+    """
+    db.conn.executemany(sql_insert, names)
+
+
 def save(surname, forename):
     """
     If the narrator exists, select the existing narrator_id.
     Otherwise, insert the narrator and get the new narrator_id.
     Return the narrator_id.
+
+    If db.upsert_returning is True and the surname isn't None, this is done
+    with a single statement.
     """
-    logger.debug(f"surname: '{surname}'; forename: '{forename}'")
-    row = select_id(surname, forename)
-    narrator_id = None
-    if row is not None:
-        logger.debug(f"row: {row}")
-        (narrator_id,) = row
-    if narrator_id is None:
-        narrator_id = insert(surname, forename)
+    logger.debug("surname: '%s'", surname)
+    logger.debug("forename: '%s'", forename)
+    # An empty surname means that the person has a single name, which is
+    # saved with a NULL surname.
+    if surname == "":
+        surname = None
+    if forename == "":
+        raise ValueError("The forename must not be empty")
+    if db.upsert_returning and surname is not None:
+        narrator_id = upsert(surname, forename)
+    else:
+        narrator_id = select_id(surname, forename)
+        if narrator_id is None:
+            narrator_id = insert(surname, forename)
+    logger.debug("narrator_id: %s", narrator_id)
     return narrator_id
 
 
 def select_id(surname, forename):
     """
-    Given the surname and forename of a narrator, return a result set row
-    containing the ID of the narrator.
+    Given the surname and forename of a narrator, return the ID of the
+    narrator.
 
     Return None if the narrator is not in the database.
     """
@@ -74,13 +100,18 @@ def select_id(surname, forename):
         FROM
             tbl_narrator
         WHERE
-            tbl_narrator.surname = ?
+            tbl_narrator.surname IS ?
             AND tbl_narrator.forename = ?
     """
+    # IS rather than = matches a NULL surname, so that a narrator with a single
+    # name is found rather than inserted again.
     cur = db.conn.execute(sql_select_id, (surname, forename,))
     row = cur.fetchone()
     cur.close()
-    return row
+    narrator_id = None
+    if row is not None:
+        (narrator_id,) = row
+    return narrator_id
 
 
 # def select_narrators_for_book(book_id):
@@ -113,7 +144,7 @@ def select_id(surname, forename):
 def select_ids_for_book(book_id):
     """
     Given a book's ID, return result set rows containing the IDs of the
-    narrators of the book.
+    narrators of the book, in the order in which they were saved.
 
     Return an empty list if no narrators are found.
     """
@@ -126,6 +157,8 @@ def select_ids_for_book(book_id):
                 ON tbl_book_narrator.narrator_id = tbl_narrator.id
         WHERE
             tbl_book_narrator.book_id = ?
+        ORDER BY
+            tbl_book_narrator.id
     """
     cur = db.conn.execute(sql_select_ids_for_book, (book_id,))
     rows = cur.fetchall()
@@ -154,3 +187,102 @@ def select_narrator(narrator_id):
     row = cur.fetchone()
     cur.close()
     return row
+
+
+def select_narrators():
+    """
+    Return a result set containing the attributes of all narrators in the
+    order of their IDs.
+    """
+    sql_select_narrators = """
+        SELECT
+            tbl_narrator.id,
+            tbl_narrator.surname,
+            tbl_narrator.forename
+        FROM
+            tbl_narrator
+        ORDER BY
+            tbl_narrator.id
+    """
+    cur = db.conn.execute(sql_select_narrators)
+    result_set = cur.fetchall()
+    cur.close()
+    return result_set
+
+
+def select_narrators_after(narrator_id):
+    """
+    Return result set rows containing the ID, surname, and forename of the
+    narrators whose IDs are greater than narrator_id, such as the narrators just inserted
+    by insert_many(), in the order of their IDs.
+    """
+    sql_select_narrators_after = """
+        SELECT
+            tbl_narrator.id,
+            tbl_narrator.surname,
+            tbl_narrator.forename
+        FROM
+            tbl_narrator
+        WHERE
+            tbl_narrator.id > ?
+        ORDER BY
+            tbl_narrator.id
+    """
+    cur = db.conn.execute(sql_select_narrators_after, (narrator_id,))
+    rows = cur.fetchall()
+    cur.close()
+    return rows
+
+
+def select_narrators_for_books():
+    """
+    Return result set rows containing the book ID and the narrator's
+    attributes for every narrator of every book.
+
+    The rows for each book are in the order in which the book's narrators were
+    saved.
+    """
+    sql_select_narrators_for_books = """
+        SELECT
+            tbl_book_narrator.book_id,
+            tbl_narrator.id,
+            tbl_narrator.surname,
+            tbl_narrator.forename
+        FROM
+            tbl_book_narrator
+            INNER JOIN tbl_narrator
+                ON tbl_book_narrator.narrator_id = tbl_narrator.id
+        ORDER BY
+            tbl_book_narrator.book_id,
+            tbl_book_narrator.id
+    """
+    cur = db.conn.execute(sql_select_narrators_for_books)
+    rows = cur.fetchall()
+    cur.close()
+    return rows
+
+
+def upsert(surname, forename):
+    """
+    Insert the narrator if the narrator isn't in the database, and return the
+    narrator_id of the new or existing narrator. The surname must not be NULL,
+    since the UNIQUE constraint doesn't apply to a NULL surname.
+    """
+    logger.debug("surname: '%s'", surname)
+    logger.debug("forename: '%s'", forename)
+    sql_upsert = """
+        INSERT INTO tbl_narrator
+        (
+            surname,
+            forename
+        )
+        VALUES (?, ?)
+        ON CONFLICT (surname, forename) DO UPDATE SET
+            surname = excluded.surname
+        RETURNING id
+    """
+    cur = db.conn.execute(sql_upsert, (surname, forename,))
+    (narrator_id,) = cur.fetchone()
+    cur.close()
+    logger.debug("narrator_id: %s", narrator_id)
+    return narrator_id
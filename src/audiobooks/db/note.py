@@ -10,6 +10,32 @@ logger = logging.getLogger(__name__)
 from .. import db
 
 
+def create_indexes():
+    """
+    Create the indexes on tbl_note used to find a book's notes and to count
+    the notes by status and by finish date.
+    """
+    logger.debug("Creating the indexes on tbl_note...")
+    sql_create_book_id_index = """
+        CREATE INDEX IF NOT EXISTS
+        idx_note_book_id_user_id
+        ON tbl_note (book_id, user_id)
+    """
+    db.conn.execute(sql_create_book_id_index)
+    sql_create_status_id_index = """
+        CREATE INDEX IF NOT EXISTS
+        idx_note_status_id_book_id
+        ON tbl_note (status_id, book_id)
+    """
+    db.conn.execute(sql_create_status_id_index)
+    sql_create_finish_date_index = """
+        CREATE INDEX IF NOT EXISTS
+        idx_note_finish_date_book_id
+        ON tbl_note (finish_date, book_id)
+    """
+    db.conn.execute(sql_create_finish_date_index)
+
+
 def create_table():
     """
     Create tbl_note.
@@ -38,12 +64,12 @@ def insert(user_id, book_id, status_id, finish_date, rating_id, comments):
     """
     Insert the note and return the new note_id.
     """
-    logger.debug(f"user_id: {user_id}")
-    logger.debug(f"book_id: {book_id}")
-    logger.debug(f"status_id: {status_id}")
-    logger.debug(f"finish_date: '{finish_date}'")
-    logger.debug(f"rating_id: {rating_id}")
-    logger.debug(f"comments: '{comments}'")
+    logger.debug("user_id: %s", user_id)
+    logger.debug("book_id: %s", book_id)
+    logger.debug("status_id: %s", status_id)
+    logger.debug("finish_date: '%s'", finish_date)
+    logger.debug("rating_id: %s", rating_id)
+    logger.debug("comments: '%s'", comments)
     sql_insert = """
         INSERT INTO tbl_note
         (
@@ -60,26 +86,47 @@ def insert(user_id, book_id, status_id, finish_date, rating_id, comments):
         sql_insert,
         (user_id, book_id, status_id, finish_date, rating_id, comments))
     note_id = cur.lastrowid
-    logger.debug(f"New note_id: {note_id}")
+    logger.debug("New note_id: %s", note_id)
     return note_id
 
 
+def insert_many(notes):
+    """
+    Insert the notes whose (user_id, book_id, status_id, finish_date,
+    rating_id, comments) tuples are in notes, in order, with a single
+    executemany() call.
+    """
+    sql_insert = """
+        INSERT INTO tbl_note
+        (
+            user_id,
+            book_id,
+            status_id,
+            finish_date,
+            rating_id,
+            comments
+        )
+        VALUES (?, ?, ?, ?, ?, ?)
+    """
+    db.conn.executemany(sql_insert, notes)
+
+
 def save(user_id, book_id, status_id, finish_date, rating_id, comments):
     """
     If the note exists, select the existing note_id.
     Otherwise, insert the note and get the new note_id.
     Return the note_id.
     """
-    logger.debug(f"user_id: {user_id}")
-    logger.debug(f"book_id: {book_id}")
-    logger.debug(f"status_id: {status_id}")
-    logger.debug(f"finish_date: '{finish_date}'")
-    logger.debug(f"rating_id: {rating_id}")
-    logger.debug(f"comments: '{comments}'")
+    logger.debug("user_id: %s", user_id)
+    logger.debug("book_id: %s", book_id)
+    logger.debug("status_id: %s", status_id)
+    logger.debug("finish_date: '%s'", finish_date)
+    logger.debug("rating_id: %s", rating_id)
+    logger.debug("comments: '%s'", comments)
     note_id = select_id(user_id, book_id, status_id, finish_date, rating_id, comments)
     if note_id is None:
         note_id = insert(user_id, book_id, status_id, finish_date, rating_id, comments)
-    logger.debug(f"note_id: {note_id}")
+    logger.debug("note_id: %s", note_id)
     return note_id
 
 
@@ -90,12 +137,12 @@ def select_id(user_id, book_id, status_id, finish_date, rating_id, comments):
     This is to prevent inserting the same data into the database more than
     once.
     """
-    logger.debug(f"user_id: {user_id}")
-    logger.debug(f"book_id: {book_id}")
-    logger.debug(f"status: {status_id}")
-    logger.debug(f"finish_date: '{finish_date}'")
-    logger.debug(f"rating_id: {rating_id}")
-    logger.debug(f"comments: '{comments}'")
+    logger.debug("user_id: %s", user_id)
+    logger.debug("book_id: %s", book_id)
+    logger.debug("status: %s", status_id)
+    logger.debug("finish_date: '%s'", finish_date)
+    logger.debug("rating_id: %s", rating_id)
+    logger.debug("comments: '%s'", comments)
     # Build the query string to allow for NULL values.
     # This is inconvenient but is necessary for the query to work correctly.
     sql_select_id = f"""
@@ -127,11 +174,11 @@ def select_id(user_id, book_id, status_id, finish_date, rating_id, comments):
         values.append(comments)
     cur = db.conn.execute(sql_select_id, values)
     db_row = cur.fetchone()
-    logger.debug(f"Returned row {db_row}")
+    logger.debug("Returned row %s", db_row)
     note_id = None
     if db_row is not None:
         note_id = db_row[0]
-    logger.debug(f"Existing note_id: {note_id}")
+    logger.debug("Existing note_id: %s", note_id)
     return note_id
 
 
@@ -193,5 +240,68 @@ def select_note(note_id):
     return row
 
 
+def select_note_keys_for_books(book_ids):
+    """
+    Return result set rows containing the user ID, book ID, status ID, finish
+    date, rating ID, and comments of every note of the books whose IDs are in
+    the list book_ids, which must not have more items than the number of
+    parameters SQLite allows in a statement. A note is saved once for each
+    combination of these values.
+    """
+    placeholders = ", ".join(["?"] * len(book_ids))
+    sql_select_note_keys_for_books = f"""
+        SELECT
+            tbl_note.user_id,
+            tbl_note.book_id,
+            tbl_note.status_id,
+            tbl_note.finish_date,
+            tbl_note.rating_id,
+            tbl_note.comments
+        FROM
+            tbl_note
+        WHERE
+            tbl_note.book_id IN ({placeholders})
+    """
+    cur = db.conn.execute(sql_select_note_keys_for_books, book_ids)
+    rows = cur.fetchall()
+    cur.close()
+    return rows
+
+
+def select_notes_for_books():
+    """
+    Return result set rows containing the book ID and the note's attributes
+    for every note of every book.
+
+    The rows for each book are in chronological order using tbl_note.id.
+    """
+    sql_select_notes_for_books = """
+        SELECT
+            tbl_note.book_id,
+            tbl_note.id,
+            tbl_user.username,
+            tbl_status.name AS status_name,
+            tbl_note.finish_date,
+            tbl_rating.stars,
+            tbl_rating.description,
+            tbl_note.comments
+        FROM
+            tbl_note
+            INNER JOIN tbl_user
+                ON tbl_note.user_id = tbl_user.id
+            LEFT OUTER JOIN tbl_status
+                ON tbl_note.status_id = tbl_status.id
+            LEFT OUTER JOIN tbl_rating
+                ON tbl_note.rating_id = tbl_rating.id
+        ORDER BY
+            tbl_note.book_id,
+            tbl_note.id
+    """
+    cur = db.conn.execute(sql_select_notes_for_books)
+    rows = cur.fetchall()
+    cur.close()
+    return rows
+
+
 def update():
     raise NotImplemented
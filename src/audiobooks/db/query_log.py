@@ -0,0 +1,393 @@
+"""
+Optional instrumentation of the SQL statements executed on db.conn.
+
+When the AUDIOBOOKS_QUERY_LOG or AUDIOBOOKS_TIMING_LOG environment variable
+is set, db.connect() opens an InstrumentedConnection, whose cursors record
+the text, call site, number of rows, and elapsed time of each statement
+executed between start_request() and finish_request(). The elapsed time of a
+statement includes the time spent fetching its rows.
+
+A statement's record is finished when the statement completes: when it
+returns no rows, when its last row has been fetched, or when its cursor
+executes another statement, is closed, or is freed. Each finished record is
+added to the request's running totals, grouped by text and call site, and
+isn't kept, so a long loader run uses no more memory than a short request.
+A statement taking at least AUDIOBOOKS_SLOW_QUERY_MS milliseconds (default
+SLOW_QUERY_MS) is logged as a warning when its record is finished, and the
+SUMMARY_STATEMENTS slowest are kept for the summary. finish_request() logs a
+summary of the request's statements and, if AUDIOBOOKS_QUERY_LOG is set to
+the path of a log file, appends the summary to it as a line of JSON.
+
+When instrumentation is disabled, db.conn is a plain sqlite3.Connection, so
+the statements run without any overhead.
+"""
+
+import datetime
+import heapq
+import json
+import logging
+logger = logging.getLogger(__name__)
+import os
+import sqlite3
+import sys
+import time
+
+# SLOW_QUERY_MS is the default duration in milliseconds at or above which a
+# statement is logged as slow.
+SLOW_QUERY_MS = 100
+
+# SUMMARY_STATEMENTS is the number of statements, grouped by text and call
+# site and ordered by their total time, and the number of slow statements
+# included in a request's summary.
+SUMMARY_STATEMENTS = 10
+
+# PACKAGE_DIR is the directory containing the audiobooks package, used to
+# shorten the file names of call sites.
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# stats holds the running totals of the statements executed in the current
+# request, or is None if no request has been started. Its "groups" dict maps
+# each (statement, call site) pair to the totals of its statements, and its
+# "slow_queries" list is a heap of the slowest statements as (seconds,
+# number, dict) tuples.
+stats = None
+
+# request_start is the time.perf_counter() value at the start of the request.
+request_start = None
+
+# slow_query_seconds is the slow statement threshold for the current request.
+slow_query_seconds = SLOW_QUERY_MS / 1000
+
+
+class QueryRecord:
+    """
+    The text, call site, number of rows, and elapsed time in seconds of an
+    executed SQL statement.
+    """
+    __slots__ = ("number", "statement", "call_site", "rows", "seconds")
+
+    def __init__(self, number, statement, call_site):
+        self.number = number
+        self.statement = statement
+        self.call_site = call_site
+        self.rows = 0
+        self.seconds = 0.0
+
+    def to_dict(self):
+        return {
+            "statement": self.statement,
+            "call_site": self.call_site,
+            "rows": self.rows,
+            "ms": round(self.seconds * 1000, 3),
+        }
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    A cursor that records each statement it executes in the current request's
+    totals.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.record = None
+
+    def __del__(self):
+        # Finish the record of a statement whose cursor wasn't closed.
+        self.finish_record()
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self.add_time(time.perf_counter() - start)
+            self.finish_record()
+            raise
+        self.add_time(time.perf_counter() - start)
+        self.add_rows(1)
+        return row
+
+    def add_changes(self):
+        """
+        Record the number of rows changed by a statement that returns no
+        rows.
+        """
+        if self.record is not None and self.rowcount > 0:
+            self.record.rows = self.rowcount
+
+    def add_rows(self, count):
+        if self.record is not None:
+            self.record.rows += count
+
+    def add_time(self, seconds):
+        if self.record is not None:
+            self.record.seconds += seconds
+
+    def close(self):
+        self.finish_record()
+        super().close()
+
+    def execute(self, sql, parameters=()):
+        self.finish_record()
+        self.start_record(sql)
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self.add_time(time.perf_counter() - start)
+            self.finish_statement()
+
+    def executemany(self, sql, seq_of_parameters):
+        self.finish_record()
+        self.start_record(sql)
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self.add_time(time.perf_counter() - start)
+            self.finish_statement()
+
+    def executescript(self, sql_script):
+        self.finish_record()
+        self.start_record(sql_script)
+        start = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            self.add_time(time.perf_counter() - start)
+            self.finish_statement()
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self.add_time(time.perf_counter() - start)
+        self.add_rows(len(rows))
+        self.finish_record()
+        return rows
+
+    def fetchmany(self, size=None):
+        if size is None:
+            size = self.arraysize
+        start = time.perf_counter()
+        rows = super().fetchmany(size)
+        self.add_time(time.perf_counter() - start)
+        self.add_rows(len(rows))
+        if len(rows) < size:
+            self.finish_record()
+        return rows
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self.add_time(time.perf_counter() - start)
+        if row is None:
+            self.finish_record()
+        else:
+            self.add_rows(1)
+        return row
+
+    def finish_record(self):
+        """
+        Finish recording the cursor's current statement: add it to the
+        request's totals, and log it and keep it for the summary if it is
+        slow.
+        """
+        record = self.record
+        if record is None:
+            return
+        self.record = None
+        if stats is None:
+            return
+        stats["rows"] += record.rows
+        stats["seconds"] += record.seconds
+        key = (record.statement, record.call_site)
+        group = stats["groups"].get(key)
+        if group is None:
+            group = stats["groups"][key] = {
+                "statement": record.statement,
+                "call_site": record.call_site,
+                "count": 0,
+                "rows": 0,
+                "ms": 0.0,
+            }
+        group["count"] += 1
+        group["rows"] += record.rows
+        group["ms"] += record.seconds * 1000
+        if record.seconds >= slow_query_seconds:
+            logger.warning(
+                f"Slow statement ({record.seconds * 1000:.1f} ms, "
+                f"{record.rows} rows) at {record.call_site}: {record.statement}")
+            slow_queries = stats["slow_queries"]
+            heapq.heappush(slow_queries, (record.seconds, record.number, record.to_dict()))
+            if len(slow_queries) > SUMMARY_STATEMENTS:
+                heapq.heappop(slow_queries)
+
+    def finish_statement(self):
+        """
+        Record the number of rows changed by a statement that returns no
+        rows, such as an INSERT, UPDATE, or DELETE statement, and finish its
+        record, since the statement has completed. The rows returned by other
+        statements are counted as they are fetched.
+        """
+        if self.description is None:
+            self.add_changes()
+            self.finish_record()
+
+    def start_record(self, sql):
+        """
+        Start recording a statement if a request has been started.
+        """
+        if stats is None:
+            return
+        stats["queries"] += 1
+        self.record = QueryRecord(stats["queries"], " ".join(sql.split()), get_call_site())
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """
+    A connection whose cursors are InstrumentedCursors.
+    """
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+
+# Functions are listed in alphabetical order.
+
+def finish_request(label):
+    """
+    Log a summary of the statements executed in the current request, which
+    is described by label, append it to the query log if AUDIOBOOKS_QUERY_LOG
+    is set, and stop recording. Return the summary as a dict, or None if no
+    request was started.
+    """
+    global stats
+    if stats is None:
+        return None
+    summary = get_summary(label)
+    stats = None
+    logger.info(
+        f"{label}: {summary['queries']} statements, {summary['rows']} rows, "
+        f"{summary['sql_ms']:.1f} ms in SQL")
+    for statement in summary["statements"]:
+        logger.info(
+            f"  {statement['count']:>6} calls, {statement['ms']:>10.1f} ms, "
+            f"{statement['rows']:>8} rows at {statement['call_site']}: "
+            f"{statement['statement']}")
+    query_log = os.environ.get('AUDIOBOOKS_QUERY_LOG')
+    if query_log:
+        # A request or script whose summary can't be logged still finishes.
+        try:
+            with open(query_log, "a", encoding="utf-8") as log_file:
+                log_file.write(json.dumps(summary) + "\n")
+        except OSError as exc:
+            logger.warning(f"Can't write the query log: {exc}")
+    return summary
+
+
+def get_call_site():
+    """
+    Return "file:line function" for the code that called the connection or
+    cursor method executing a statement. The file is relative to the
+    directory containing the audiobooks package.
+    """
+    frame = sys._getframe(1)
+    while frame is not None and frame.f_code.co_filename == __file__:
+        frame = frame.f_back
+    if frame is None:
+        return "unknown"
+    file_name = frame.f_code.co_filename
+    if file_name.startswith(PACKAGE_DIR + os.sep):
+        file_name = file_name[len(PACKAGE_DIR) + 1:]
+    return f"{file_name}:{frame.f_lineno} {frame.f_code.co_name}"
+
+
+def get_query_count():
+    """
+    Return the number of statements executed in the current request.
+    """
+    if stats is None:
+        return 0
+    return stats["queries"]
+
+
+def get_slow_query_seconds():
+    """
+    Return the slow statement threshold in seconds, read from
+    AUDIOBOOKS_SLOW_QUERY_MS.
+    """
+    slow_query_ms = os.environ.get('AUDIOBOOKS_SLOW_QUERY_MS')
+    if not slow_query_ms:
+        return SLOW_QUERY_MS / 1000
+    try:
+        return float(slow_query_ms) / 1000
+    except ValueError:
+        raise ValueError(f"Invalid AUDIOBOOKS_SLOW_QUERY_MS value '{slow_query_ms}'")
+
+
+def get_summary(label):
+    """
+    Return a dict summarizing the statements executed in the current request:
+    their number, rows, and total time; the SUMMARY_STATEMENTS slowest
+    statements taking at least the slow statement threshold; and the
+    SUMMARY_STATEMENTS statements taking the most time in total, grouped by
+    text and call site. The statements whose records aren't finished yet are
+    counted, but their rows and time aren't included.
+    """
+    statements = heapq.nlargest(
+        SUMMARY_STATEMENTS, stats["groups"].values(), key=lambda group: group["ms"])
+    return {
+        "time": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "label": label,
+        "total_ms": round((time.perf_counter() - request_start) * 1000, 3),
+        "queries": stats["queries"],
+        "rows": stats["rows"],
+        "sql_ms": round(stats["seconds"] * 1000, 3),
+        "slow_query_ms": slow_query_seconds * 1000,
+        "slow_queries": [
+            slow_query for (seconds, number, slow_query)
+            in sorted(stats["slow_queries"], reverse=True)
+        ],
+        "statements": [dict(group, ms=round(group["ms"], 3)) for group in statements],
+    }
+
+
+def is_enabled():
+    """
+    Return True if the AUDIOBOOKS_QUERY_LOG or AUDIOBOOKS_TIMING_LOG
+    environment variable is set. The timing log needs the number of
+    statements executed in each request.
+    """
+    return bool(os.environ.get('AUDIOBOOKS_QUERY_LOG') or os.environ.get('AUDIOBOOKS_TIMING_LOG'))
+
+
+def start_request():
+    """
+    Start recording the statements executed on an InstrumentedConnection.
+    Do nothing if instrumentation is disabled.
+    """
+    global request_start
+    global slow_query_seconds
+    global stats
+    if not is_enabled():
+        stats = None
+        return
+    stats = {
+        "queries": 0,
+        "rows": 0,
+        "seconds": 0.0,
+        "groups": {},
+        "slow_queries": [],
+    }
+    request_start = time.perf_counter()
+    slow_query_seconds = get_slow_query_seconds()
@@ -0,0 +1,120 @@
+"""
+Query plan checks for the hot queries: the lookups made for each book,
+person, acquisition, and note when a page is displayed or CSV data is saved,
+and the summary counts.
+
+A hot query must find its rows with an index rather than by scanning a whole
+table, so its cost doesn't grow with the size of the library. The queries
+that list every book, person, acquisition, or note read every row anyway and
+aren't checked.
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+
+from .. import db
+
+# HOT_QUERIES lists the functions that run the hot queries, as
+# "module.function" names in the db package, with sample arguments. The
+# arguments needn't match any rows, since only the statements' plans are
+# checked. vendor.select_id() isn't listed because tbl_vendor has a row per
+# vendor and is queried once per CSV file.
+HOT_QUERIES = (
+    ("acquisition.select_acquisition_for_book", (1,)),
+    ("acquisition.select_id", (1, 1, 1)),
+    ("acquisition_type.select_id", ("no charge",)),
+    ("author.select", (1,)),
+    ("author.select_id", ("Surname", "Forename")),
+    ("author.select_ids_for_book", (1,)),
+    ("book.select_book", (1,)),
+    ("book.select_id", ("Title",)),
+    ("book.select_ids_for_author", (1,)),
+    ("book.select_ids_for_narrator", (1,)),
+    ("book.select_ids_for_titles", (["Title"],)),
+    ("book.select_ids_for_translator", (1,)),
+    ("book_author.select_id", (1, 1)),
+    ("book_narrator.select_id", (1, 1)),
+    ("book_translator.select_id", (1, 1)),
+    ("counts.select_counts_by_year", ()),
+    ("counts.select_total_books_acquired", ()),
+    ("counts.select_total_books_finished", ()),
+    ("counts.select_total_books_unfinished", ()),
+    ("counts.select_total_distinct_books_finished", ()),
+    ("narrator.select_id", ("Surname", "Forename")),
+    ("narrator.select_ids_for_book", (1,)),
+    ("narrator.select_narrator", (1,)),
+    ("note.select_id", (1, 1, 1, "2020-01-01", 1, "Comments")),
+    ("note.select_ids_for_book", (1,)),
+    ("note.select_note", (1,)),
+    ("note.select_note_keys_for_books", ([1],)),
+    ("rating.select_id_by_stars", (5,)),
+    ("status.select_id", ("Finished",)),
+    ("translator.select_id", ("Surname", "Forename")),
+    ("translator.select_ids_for_book", (1,)),
+    ("translator.select_translator", (1,)),
+    ("user.select_user_id", ("username",)),
+)
+
+
+# Functions are listed in alphabetical order.
+
+def explain(statement):
+    """
+    Return the detail strings of the rows of the statement's query plan.
+    Any parameters of the statement are bound to NULL.
+    """
+    parameters = (None,) * statement.count("?")
+    cur = db.conn.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+    rows = cur.fetchall()
+    cur.close()
+    return [row[3] for row in rows]
+
+
+def find_full_scans():
+    """
+    Run each hot query and return a list of (name, statement, detail) tuples
+    for each step of a query plan that scans a whole table or makes SQLite
+    build an automatic index, which it does when an index is missing.
+    """
+    full_scans = []
+    for (name, statements) in get_hot_statements():
+        for statement in statements:
+            for detail in explain(statement):
+                logger.debug(f"{name}: {detail}")
+                if is_full_scan(detail):
+                    full_scans.append((name, statement, detail))
+    return full_scans
+
+
+def get_hot_statements():
+    """
+    Run each hot query and return a list of (name, statements) tuples
+    containing the function's name and the statements it executed.
+    """
+    hot_statements = []
+    for (name, args) in HOT_QUERIES:
+        (module_name, function_name) = name.split(".")
+        function = getattr(getattr(db, module_name), function_name)
+        statements = []
+        db.conn.set_trace_callback(statements.append)
+        try:
+            function(*args)
+        finally:
+            db.conn.set_trace_callback(None)
+        hot_statements.append((name, statements))
+    return hot_statements
+
+
+def is_full_scan(detail):
+    """
+    Return True if a query plan step scans a whole table without using an
+    index, as in "SCAN tbl_note", or searches a table using an automatic
+    index. Scans of subqueries, whose names don't start with "tbl_", and
+    scans of a table's index are allowed.
+    """
+    words = detail.split()
+    if len(words) < 2 or not words[1].startswith("tbl_"):
+        return False
+    if words[0] == "SCAN" and "INDEX" not in words:
+        return True
+    return "AUTOMATIC" in words
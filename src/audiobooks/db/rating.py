@@ -40,8 +40,8 @@ def insert(stars, description):
     Insert the rating and return the new rating_id.
     Raises an exception if the rating is already in the database.
     """
-    logger.debug(f"stars: {stars}")
-    logger.debug(f"description: '{description}'")
+    logger.debug("stars: %s", stars)
+    logger.debug("description: '%s'", description)
     sql_insert = """
         INSERT INTO tbl_rating
         (
@@ -52,18 +52,18 @@ def insert(stars, description):
     """
     cur = db.conn.execute(sql_insert, (stars, description,))
     rating_id = cur.lastrowid
-    logger.debug(f"New rating_id for stars {stars} description '{description}': {rating_id}")
+    logger.debug("New rating_id for stars %s description '%s': %s", stars, description, rating_id)
     return rating_id
 
 
 def save(stars, description):
-    logger.debug(f"stars: {stars}")
-    logger.debug(f"description: {description}")
-    logger.debug(f"rating: ({stars}, '{description}'")
+    logger.debug("stars: %s", stars)
+    logger.debug("description: %s", description)
+    logger.debug("rating: (%s, '%s'", stars, description)
     rating_id = select_id(stars, description)
     if rating_id is None:
         rating_id = insert(stars, description)
-    logger.debug(f"rating_id for stars {stars} description '{description}': {rating_id}")
+    logger.debug("rating_id for stars %s description '%s': %s", stars, description, rating_id)
     return rating_id
 
 
@@ -72,8 +72,8 @@ def select_id(stars, description):
     Select and return the ID for the rating.
     Return None if the rating is not in the database.
     """
-    logger.debug(f"stars: {stars}")
-    logger.debug(f"description: {description}")
+    logger.debug("stars: %s", stars)
+    logger.debug("description: %s", description)
     sql_select_id = """
         SELECT
             tbl_rating.id
@@ -85,7 +85,7 @@ def select_id(stars, description):
     """
     cur = db.conn.execute(sql_select_id, (stars, description,))
     db_row = cur.fetchone()
-    logger.debug(f"Returned row for stars {stars} and description '{description}': {db_row}")
+    logger.debug("Returned row for stars %s and description '%s': %s", stars, description, db_row)
     rating_id = None
     if db_row is not None:
         rating_id = db_row[0]
@@ -97,7 +97,7 @@ def select_id_by_stars(stars):
     Select and return the ID for the rating.
     Return None if the rating is not in the database.
     """
-    logger.debug(f"stars: {stars}")
+    logger.debug("stars: %s", stars)
     sql_select_id = """
         SELECT
             tbl_rating.id
@@ -108,8 +108,27 @@ def select_id_by_stars(stars):
     """
     cur = db.conn.execute(sql_select_id, (stars,))
     db_row = cur.fetchone()
-    logger.debug(f"Returned row for stars {stars}': {db_row}")
+    logger.debug("Returned row for stars %s': %s", stars, db_row)
     rating_id = None
     if db_row is not None:
         rating_id = db_row[0]
     return rating_id
+
+
+def select_ratings():
+    """
+    Return result set rows containing the ID and stars of every rating.
+    """
+    sql_select_ratings = """
+        SELECT
+            tbl_rating.id,
+            tbl_rating.stars
+        FROM
+            tbl_rating
+        ORDER BY
+            tbl_rating.id
+    """
+    cur = db.conn.execute(sql_select_ratings)
+    rows = cur.fetchall()
+    cur.close()
+    return rows
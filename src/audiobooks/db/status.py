@@ -29,7 +29,7 @@ def insert(status):
     Insert the status and return the status_id.
     Raises an exception if the status is already in the table.
     """
-    logger.debug(f"status: '{status}'")
+    logger.debug("status: '%s'", status)
     sql_insert = """
         INSERT INTO tbl_status
         (
@@ -39,21 +39,41 @@ def insert(status):
     """
     cur = db.conn.execute(sql_insert, (status,))
     status_id = cur.lastrowid
-    logger.debug(f"New status_id: {status_id}")
+    logger.debug("New status_id: %s", status_id)
     return status_id
 
 
+def insert_many(names):
+    """
+    Insert the statuses whose names are in names, in order, with a single
+    executemany() call.
+    """
+    sql_insert = """
+        INSERT INTO tbl_status
+        (
+            name
+        )
+        VALUES (?)
+    """
+    db.conn.executemany(sql_insert, [(name,) for name in names])
+
+
 def save(status):
     """
     If the status exists, select the existing status_id.
     Otherwise, insert the status and get the new status_id.
     Return the status_id.
+
+    If db.upsert_returning is True, this is done with a single statement.
     """
-    logger.debug(f"status: '{status}'")
-    status_id = select_id(status)
-    if status_id is None:
-        status_id = insert(status)
-    logger.debug(f"status_id for status '{status}': {status_id}")
+    logger.debug("status: '%s'", status)
+    if db.upsert_returning:
+        status_id = upsert(status)
+    else:
+        status_id = select_id(status)
+        if status_id is None:
+            status_id = insert(status)
+    logger.debug("status_id for status '%s': %s", status, status_id)
     return status_id
 
 
@@ -62,7 +82,7 @@ def select_id(status):
     Select and return the ID for the status.
     Return None if the status is not in the database.
     """
-    logger.debug(f"status: '{status}'")
+    logger.debug("status: '%s'", status)
     sql_select_id = """
         SELECT
             tbl_status.id
@@ -73,9 +93,51 @@ def select_id(status):
     """
     cur = db.conn.execute(sql_select_id, (status,))
     db_row = cur.fetchone()
-    logger.debug(f"Returned row for status '{status}': {db_row}")
+    logger.debug("Returned row for status '%s': %s", status, db_row)
     status_id = None
     if db_row is not None:
         status_id = db_row[0]
-    logger.debug(f"Existing status_id: {status_id}")
+    logger.debug("Existing status_id: %s", status_id)
+    return status_id
+
+
+def select_statuses():
+    """
+    Return result set rows containing the ID and name of every status.
+    """
+    sql_select_statuses = """
+        SELECT
+            tbl_status.id,
+            tbl_status.name
+        FROM
+            tbl_status
+        ORDER BY
+            tbl_status.id
+    """
+    cur = db.conn.execute(sql_select_statuses)
+    rows = cur.fetchall()
+    cur.close()
+    return rows
+
+
+def upsert(status):
+    """
+    Insert the status if it isn't in the database, and return the status_id of
+    the new or existing status.
+    """
+    logger.debug("status: '%s'", status)
+    sql_upsert = """
+        INSERT INTO tbl_status
+        (
+            name
+        )
+        VALUES (?)
+        ON CONFLICT (name) DO UPDATE SET
+            name = excluded.name
+        RETURNING id
+    """
+    cur = db.conn.execute(sql_upsert, (status,))
+    (status_id,) = cur.fetchone()
+    cur.close()
+    logger.debug("status_id for status '%s': %s", status, status_id)
     return status_id
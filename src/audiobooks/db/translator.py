@@ -31,8 +31,8 @@ def insert(surname, forename):
     Insert the translator's surname and forename and return the new translator_id.
     The database raises an exception if the translator is already in the database.
     """
-    logger.debug(f"surname: '{surname}'")
-    logger.debug(f"forename: '{forename}'")
+    logger.debug("surname: '%s'", surname)
+    logger.debug("forename: '%s'", forename)
     sql_insert = """
         INSERT INTO tbl_translator
         (
@@ -44,22 +44,50 @@ def insert(surname, forename):
     cur = db.conn.execute(sql_insert, (surname, forename,))
     translator_id = cur.lastrowid
     cur.close()
-    logger.debug(f"New translator_id: {translator_id}")
+    logger.debug("New translator_id: %s", translator_id)
     return translator_id
 
 
+def insert_many(names):
+    """
+    Insert the translators whose (surname, forename) tuples are in names, in
+    order, with a single executemany() call.
+    """
+    sql_insert = """
+        INSERT INTO tbl_translator
+        (
+            surname,
+            forename
+        )
+        VALUES (?, ?)
+    """
+    db.conn.executemany(sql_insert, names)
+
+
 def save(surname, forename):
     """
     If the translator exists, select the existing translator_id.
     Otherwise, insert the translator and get the new translator_id.
     Return the translator_id.
+
+    If db.upsert_returning is True and the surname isn't None, this is done
+    with a single statement.
     """
-    logger.debug(f"surname: '{surname}'")
-    logger.debug(f"forename: '{forename}'")
-    translator_id = select_id(surname, forename)
-    if translator_id is None:
-        translator_id = insert(surname, forename)
-    logger.debug(f"translator_id: {translator_id}")
+    logger.debug("surname: '%s'", surname)
+    logger.debug("forename: '%s'", forename)
+    # An empty surname means that the person has a single name, which is
+    # saved with a NULL surname.
+    if surname == "":
+        surname = None
+    if forename == "":
+        raise ValueError("The forename must not be empty")
+    if db.upsert_returning and surname is not None:
+        translator_id = upsert(surname, forename)
+    else:
+        translator_id = select_id(surname, forename)
+        if translator_id is None:
+            translator_id = insert(surname, forename)
+    logger.debug("translator_id: %s", translator_id)
     return translator_id
 
 
@@ -68,32 +96,34 @@ def select_id(surname, forename):
     Select and return the ID for the translator.
     Return None if the translator is not in the database.
     """
-    logger.debug(f"surname: '{surname}'")
-    logger.debug(f"forename: '{forename}'")
+    logger.debug("surname: '%s'", surname)
+    logger.debug("forename: '%s'", forename)
     sql_select_id = """
         SELECT
             tbl_translator.id
         FROM
             tbl_translator
         WHERE
-            tbl_translator.surname = ?
+            tbl_translator.surname IS ?
             AND tbl_translator.forename = ?
     """
+    # IS rather than = matches a NULL surname, so that a translator with a single
+    # name is found rather than inserted again.
     cur = db.conn.execute(sql_select_id, (surname, forename,))
     db_row = cur.fetchone()
     cur.close()
-    logger.debug(f"Returned row: {db_row}")
+    logger.debug("Returned row: %s", db_row)
     translator_id = None
     if db_row is not None:
         translator_id = db_row[0]
-    logger.debug(f"Existing translator_id: {translator_id}")
+    logger.debug("Existing translator_id: %s", translator_id)
     return translator_id
 
 
 def select_ids_for_book(book_id):
     """
     Given a book's ID, return result set rows containing the IDs of the
-    translators of the book.
+    translators of the book, in the order in which they were saved.
 
     Return an empty list if no translators are found.
     """
@@ -106,6 +136,8 @@ def select_ids_for_book(book_id):
                 ON tbl_book_translator.translator_id = tbl_translator.id
         WHERE
             tbl_book_translator.book_id = ?
+        ORDER BY
+            tbl_book_translator.id
     """
     cur = db.conn.execute(sql_select_ids_for_book, (book_id,))
     rows = cur.fetchall()
@@ -134,3 +166,102 @@ def select_translator(translator_id):
     row = cur.fetchone()
     cur.close()
     return row
+
+
+def select_translators():
+    """
+    Return a result set containing the attributes of all translators in the
+    order of their IDs.
+    """
+    sql_select_translators = """
+        SELECT
+            tbl_translator.id,
+            tbl_translator.surname,
+            tbl_translator.forename
+        FROM
+            tbl_translator
+        ORDER BY
+            tbl_translator.id
+    """
+    cur = db.conn.execute(sql_select_translators)
+    result_set = cur.fetchall()
+    cur.close()
+    return result_set
+
+
+def select_translators_after(translator_id):
+    """
+    Return result set rows containing the ID, surname, and forename of the
+    translators whose IDs are greater than translator_id, such as the translators just inserted
+    by insert_many(), in the order of their IDs.
+    """
+    sql_select_translators_after = """
+        SELECT
+            tbl_translator.id,
+            tbl_translator.surname,
+            tbl_translator.forename
+        FROM
+            tbl_translator
+        WHERE
+            tbl_translator.id > ?
+        ORDER BY
+            tbl_translator.id
+    """
+    cur = db.conn.execute(sql_select_translators_after, (translator_id,))
+    rows = cur.fetchall()
+    cur.close()
+    return rows
+
+
+def select_translators_for_books():
+    """
+    Return result set rows containing the book ID and the translator's
+    attributes for every translator of every book.
+
+    The rows for each book are in the order in which the book's translators
+    were saved.
+    """
+    sql_select_translators_for_books = """
+        SELECT
+            tbl_book_translator.book_id,
+            tbl_translator.id,
+            tbl_translator.surname,
+            tbl_translator.forename
+        FROM
+            tbl_book_translator
+            INNER JOIN tbl_translator
+                ON tbl_book_translator.translator_id = tbl_translator.id
+        ORDER BY
+            tbl_book_translator.book_id,
+            tbl_book_translator.id
+    """
+    cur = db.conn.execute(sql_select_translators_for_books)
+    rows = cur.fetchall()
+    cur.close()
+    return rows
+
+
+def upsert(surname, forename):
+    """
+    Insert the translator if the translator isn't in the database, and return the
+    translator_id of the new or existing translator. The surname must not be NULL,
+    since the UNIQUE constraint doesn't apply to a NULL surname.
+    """
+    logger.debug("surname: '%s'", surname)
+    logger.debug("forename: '%s'", forename)
+    sql_upsert = """
+        INSERT INTO tbl_translator
+        (
+            surname,
+            forename
+        )
+        VALUES (?, ?)
+        ON CONFLICT (surname, forename) DO UPDATE SET
+            surname = excluded.surname
+        RETURNING id
+    """
+    cur = db.conn.execute(sql_upsert, (surname, forename,))
+    (translator_id,) = cur.fetchone()
+    cur.close()
+    logger.debug("translator_id: %s", translator_id)
+    return translator_id
@@ -8,6 +8,20 @@ logger = logging.getLogger(__name__)
 from .. import db
 
 
+def create_indexes():
+    """
+    Create the unique index on tbl_vendor.name, which save() uses to find a
+    vendor and which prevents a vendor from being saved twice.
+    """
+    logger.debug("Creating the index on tbl_vendor...")
+    sql_create_name_index = """
+        CREATE UNIQUE INDEX IF NOT EXISTS
+        idx_vendor_name
+        ON tbl_vendor (name)
+    """
+    db.conn.execute(sql_create_name_index)
+
+
 def create_table():
     logger.debug("Creating tbl_vendor...")
     sql_create_table = """
@@ -22,7 +36,7 @@ def create_table():
 
 
 def insert(vendor):
-    logger.debug(f"vendor: '{vendor}'")
+    logger.debug("vendor: '%s'", vendor)
     sql_insert = """
         INSERT INTO tbl_vendor
         (
@@ -32,7 +46,7 @@ def insert(vendor):
     """
     cur = db.conn.execute(sql_insert, (vendor,))
     vendor_id = cur.lastrowid
-    logger.debug(f"New vendor_id: {vendor_id}")
+    logger.debug("New vendor_id: %s", vendor_id)
     return vendor_id
 
 
@@ -41,17 +55,22 @@ def save(vendor):
     If the vendor exists, select the existing vendor_id.
     Otherwise, insert the vendor and get the new vendor_id.
     Return the vendor_id.
+
+    If db.upsert_returning is True, this is done with a single statement.
     """
-    logger.debug(f"vendor: '{vendor}'")
-    vendor_id = select_id(vendor)
-    if vendor_id is None:
-        vendor_id = insert(vendor)
-    logger.debug(f"vendor_id for vendor '{vendor}': {vendor_id}")
+    logger.debug("vendor: '%s'", vendor)
+    if db.upsert_returning:
+        vendor_id = upsert(vendor)
+    else:
+        vendor_id = select_id(vendor)
+        if vendor_id is None:
+            vendor_id = insert(vendor)
+    logger.debug("vendor_id for vendor '%s': %s", vendor, vendor_id)
     return vendor_id
 
 
 def select_id(vendor):
-    logger.debug(f"vendor: '{vendor}'")
+    logger.debug("vendor: '%s'", vendor)
     sql_select_id = """
         SELECT
             tbl_vendor.id
@@ -62,9 +81,32 @@ def select_id(vendor):
     """
     cur = db.conn.execute(sql_select_id, (vendor,))
     db_row = cur.fetchone()
-    logger.debug(f"Returned row for vendor '{vendor}': {db_row}")
+    logger.debug("Returned row for vendor '%s': %s", vendor, db_row)
     vendor_id = None
     if db_row is not None:
         vendor_id = db_row[0]
-    logger.debug(f"Existing vendor_id: {vendor_id}")
+    logger.debug("Existing vendor_id: %s", vendor_id)
+    return vendor_id
+
+
+def upsert(vendor):
+    """
+    Insert the vendor if it isn't in the database, and return the vendor_id of
+    the new or existing vendor.
+    """
+    logger.debug("vendor: '%s'", vendor)
+    sql_upsert = """
+        INSERT INTO tbl_vendor
+        (
+            name
+        )
+        VALUES (?)
+        ON CONFLICT (name) DO UPDATE SET
+            name = excluded.name
+        RETURNING id
+    """
+    cur = db.conn.execute(sql_upsert, (vendor,))
+    (vendor_id,) = cur.fetchone()
+    cur.close()
+    logger.debug("vendor_id for vendor '%s': %s", vendor, vendor_id)
     return vendor_id
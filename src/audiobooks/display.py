@@ -1,27 +1,43 @@
 """
 Functions for displaying information in web pages.
+
+Each display function returns a response.Response containing the page's
+status, headers, and body, which the caller writes out, so the page can be
+buffered, compressed, or cached, and served by index.cgi or by the WSGI
+server.
 """
 
 import html
+import itertools
 
+from . import compression
+from . import conditional
 from . import data
 from . import html_creator
+from . import page_cache
+from . import response
+
+
+def create_html_response(html_chunks):
+    """
+    Return a Response with an HTML Content-Type whose body is the HTML chunks
+    followed by a newline.
+    """
+    return response.Response(itertools.chain(html_chunks, ("\n",)))
 
 
 def display_404_not_found():
     html_str = html_creator.create_start_html(body_class="about")
     html_str += html_creator.create_404_html()
     html_str += html_creator.create_end_html()
-    print("Content-Type: text/html; charset=utf-8\r\n\r\n", end="")
-    print(html_str)
+    return create_html_response([html_str])
 
 
 def display_about():
     html_str = html_creator.create_start_html(body_class="about")
     html_str += html_creator.create_about_html()
     html_str += html_creator.create_end_html()
-    print("Content-Type: text/html; charset=utf-8\r\n\r\n", end="")
-    print(html_str)
+    return create_html_response([html_str])
 
 
 def display_author(author_id):
@@ -41,20 +57,18 @@ def display_author(author_id):
     else:
         html_str += f'    <h1>Invalid author ID "{html.escape(author_id)}"</h1>\n'
     html_str += html_creator.create_end_html()
-    print("Content-Type: text/html; charset=utf-8\r\n\r\n", end="")
-    print(html_str)
+    return create_html_response([html_str])
 
 
 def display_authors():
     """
     Display information about all authors.
+
+    The response's body is generated as it is written, so the browser
+    receives the start of the page before the authors are loaded and the rows
+    of the table as they are created.
     """
-    authors = data.get_authors_with_books()
-    html_str = html_creator.create_start_html(body_class="tables")
-    html_str += html_creator.create_all_authors_table_html(authors)
-    html_str += html_creator.create_end_html()
-    print("Content-Type: text/html; charset=utf-8\r\n\r\n", end="")
-    print(html_str)
+    return create_html_response(generate_authors_html())
 
 
 def display_book(book_id):
@@ -71,26 +85,24 @@ def display_book(book_id):
     else:
         html_str += f'    <h1>Invalid book ID "{html.escape(book_id)}"</h1>\n'
     html_str += html_creator.create_end_html()
-    print("Content-Type: text/html; charset=utf-8\r\n\r\n", end="")
-    print(html_str)
+    return create_html_response([html_str])
 
 
 def display_books():
     """
     Display information about all books.
+
+    The response's body is generated as it is written, so the browser
+    receives the start of the page before the books are loaded and the rows
+    of the table as they are created.
     """
-    books = data.get_books()
-    html_str = html_creator.create_start_html(body_class="tables")
-    html_str += html_creator.create_all_books_table_html(books)
-    html_str += html_creator.create_end_html()
-    print("Content-Type: text/html; charset=utf-8\r\n\r\n", end="")
-    print(html_str)
+    return create_html_response(generate_books_html())
 
 
 def display_narrator(narrator_id):
     """
     Given a narrator's ID, query the database for the narrator's data, create the
-    HTML string, and print the Content-Type header and the HTML.
+    HTML string, and return the response.
 
     narrator_id must be an int > 0.
     """
@@ -104,8 +116,68 @@ def display_narrator(narrator_id):
     else:
         html_str += f'    <h1>Invalid narrator ID "{html.escape(narrator_id)}"</h1>\n'
     html_str += html_creator.create_end_html()
-    print("Content-Type: text/html; charset=utf-8\r\n\r\n", end="")
-    print(html_str)
+    return create_html_response([html_str])
+
+
+def display_page(page, value=None, environ=None):
+    """
+    Return the response for the page selected by the CGI query parameter
+    named page, passing the parameter's value to the page's display function.
+    page is one of "404", "about", "author_id", "authors", "book_id",
+    "narrator_id", "summaries", or "translator_id", or "books" for the
+    default page.
+
+    Add the ETag, Last-Modified, and Cache-Control headers to the response.
+    If the request's conditional headers show that the browser's copy of the
+    page is current, return a 304 Not Modified response without a body
+    instead of displaying the page. The conditional headers are read from
+    environ, the request's CGI or WSGI environment, which defaults to
+    os.environ.
+
+    If the request's Accept-Encoding header accepts gzip, compress the
+    response unless it is small. Compressed and uncompressed responses have
+    different ETags, chosen by the Content-Encoding actually sent, and are
+    cached separately, so a large page is compressed once per data version
+    rather than once per request. Since a small page is sent uncompressed to
+    a browser that accepts gzip, the browser's copy may have either ETag.
+
+    When the page cache is enabled, return the page's response from the cache
+    if it is there; otherwise, display the page and store its response in the
+    cache as its body is written.
+    """
+    display_function = get_display_function(page)
+    args = () if value is None else (value,)
+
+    content_encoding = None
+    encodings = [None]
+    if compression.accepts_gzip(environ):
+        content_encoding = "gzip"
+        encodings.insert(0, content_encoding)
+
+    last_modified = conditional.get_last_modified()
+    for encoding in encodings:
+        etag = conditional.get_etag(page, value, encoding)
+        if conditional.is_not_modified(etag, last_modified, environ):
+            headers = conditional.get_validator_headers(etag, last_modified)
+            headers.append(("Vary", "Accept-Encoding"))
+            return response.Response(status="304 Not Modified", headers=headers)
+
+    cache_path = page_cache.get_path(page, value, content_encoding)
+    page_response = None
+    if cache_path is not None:
+        page_response = page_cache.read(cache_path)
+    if page_response is None:
+        page_response = display_function(*args)
+        if content_encoding == "gzip":
+            page_response = compression.compress_response(page_response)
+        if cache_path is not None:
+            page_response = page_cache.record(cache_path, page_response)
+    etag = conditional.get_etag(page, value, page_response.get_header("Content-Encoding"))
+    headers = conditional.get_validator_headers(etag, last_modified)
+    headers.append(("Vary", "Accept-Encoding"))
+    for (name, header_value) in headers:
+        page_response.set_header(name, header_value)
+    return page_response
 
 
 def display_summary():
@@ -113,14 +185,13 @@ def display_summary():
     html_str = html_creator.create_start_html(body_class="tables")
     html_str += html_creator.create_summary_html(summaries)
     html_str += html_creator.create_end_html()
-    print("Content-Type: text/html; charset=utf-8\r\n\r\n", end="")
-    print(html_str)
+    return create_html_response([html_str])
 
 
 def display_translator(translator_id):
     """
     Given a translator's ID, query the database for the translator's data, create
-    the HTML string, and print the Content-Type header and the HTML.
+    the HTML string, and return the response.
 
     translator_id must be an int > 0.
     """
@@ -134,5 +205,43 @@ def display_translator(translator_id):
     else:
         html_str += f'    <h1>Invalid translator ID "{html.escape(translator_id)}"</h1>\n'
     html_str += html_creator.create_end_html()
-    print("Content-Type: text/html; charset=utf-8\r\n\r\n", end="")
-    print(html_str)
+    return create_html_response([html_str])
+
+
+def generate_authors_html():
+    """
+    Generate the HTML for the authors page in chunks.
+    """
+    yield html_creator.create_start_html(body_class="tables")
+    authors = data.get_authors_with_books()
+    yield from html_creator.generate_all_authors_table_html(authors)
+    yield html_creator.create_end_html()
+
+
+def generate_books_html():
+    """
+    Generate the HTML for the all books page in chunks.
+    """
+    yield html_creator.create_start_html(body_class="tables")
+    books = data.get_books()
+    yield from html_creator.generate_all_books_table_html(books)
+    yield html_creator.create_end_html()
+
+
+def get_display_function(page):
+    """
+    Return the display function for the page selected by the CGI query
+    parameter named page. page is one of the names accepted by display_page().
+    """
+    display_functions = {
+        "404": display_404_not_found,
+        "about": display_about,
+        "author_id": display_author,
+        "authors": display_authors,
+        "book_id": display_book,
+        "books": display_books,
+        "narrator_id": display_narrator,
+        "summaries": display_summary,
+        "translator_id": display_translator,
+    }
+    return display_functions[page]
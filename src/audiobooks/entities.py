@@ -0,0 +1,317 @@
+"""
+Compact entity classes for books and the people, acquisitions, and notes
+related to them.
+
+The classes use __slots__ instead of a per-instance __dict__, and the
+computed attributes (display_name, title_sort_key, length, rating, etc.) are
+computed the first time they are used rather than when the entity is created.
+
+Entities support dict-style access, so book["title"] and
+author["display_name"] work the same as the dicts previously returned by the
+data module.
+"""
+
+
+class Entity:
+    """
+    Base class providing dict-style access to an entity's attributes.
+
+    Subclasses list the attributes stored in the database in the fields class
+    attribute and the attributes computed from them in computed_fields.
+    """
+    __slots__ = ()
+    fields = ()
+    computed_fields = ()
+
+    def __eq__(self, other):
+        if type(self) is not type(other):
+            return NotImplemented
+        return all(
+            getattr(self, field) == getattr(other, field)
+            for field in self.fields)
+
+    def __hash__(self):
+        # Equal entities have the same ID, so hashing the type and the ID is
+        # consistent with __eq__ and works for entities with list fields.
+        return hash((type(self), self.id))
+
+    def __getitem__(self, key):
+        if key not in self.fields and key not in self.computed_fields:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __repr__(self):
+        attributes = ", ".join(
+            f"{field}={getattr(self, field)!r}" for field in self.fields)
+        return f"{type(self).__name__}({attributes})"
+
+    def __setitem__(self, key, value):
+        if key not in self.fields:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return self.fields + self.computed_fields
+
+
+class Acquisition(Entity):
+    """
+    An acquisition of a book by a user from a vendor.
+    """
+    __slots__ = (
+        "id",
+        "username",
+        "vendor_name",
+        "acquisition_type",
+        "acquisition_date",
+        "discontinued",
+        "audible_credits",
+        "price_in_cents",
+    )
+    fields = __slots__
+
+    def __init__(self, id, username, vendor_name, acquisition_type,
+            acquisition_date, discontinued, audible_credits, price_in_cents):
+        self.id = id
+        self.username = username
+        self.vendor_name = vendor_name
+        self.acquisition_type = acquisition_type
+        self.acquisition_date = acquisition_date
+        self.discontinued = discontinued
+        self.audible_credits = audible_credits
+        self.price_in_cents = price_in_cents
+
+
+class Book(Entity):
+    """
+    A book, including its authors, translators, narrators, acquisition, and
+    notes.
+
+    The computed attributes are:
+        title_sort_key
+        length_sort_key
+        length
+        rating
+        finish_date_string
+        status_string
+        acquisition_date
+    """
+    __slots__ = (
+        "id",
+        "title",
+        "book_pub_date",
+        "audio_pub_date",
+        "hours",
+        "minutes",
+        "authors",
+        "translators",
+        "narrators",
+        "acquisition",
+        "notes",
+        "_title_sort_key",
+        "_length",
+        "_rating",
+    )
+    fields = __slots__[:11]
+    computed_fields = (
+        "title_sort_key",
+        "length_sort_key",
+        "length",
+        "rating",
+        "finish_date_string",
+        "status_string",
+        "acquisition_date",
+    )
+
+    def __init__(self, id, title, book_pub_date, audio_pub_date, hours,
+            minutes, authors, translators, narrators, acquisition, notes):
+        self.id = id
+        self.title = title
+        self.book_pub_date = book_pub_date
+        self.audio_pub_date = audio_pub_date
+        self.hours = hours
+        self.minutes = minutes
+        self.authors = authors
+        self.translators = translators
+        self.narrators = narrators
+        self.acquisition = acquisition
+        self.notes = notes
+        self._title_sort_key = None
+        self._length = None
+        self._rating = None
+
+    @property
+    def acquisition_date(self):
+        return self.acquisition.acquisition_date
+
+    @property
+    def finish_date_string(self):
+        """
+        The finish date from the first note, or "" if there is none.
+        """
+        finish_date = self.notes[0].finish_date
+        return "" if finish_date is None else finish_date
+
+    @property
+    def length(self):
+        """
+        The hours and minutes as an hh:mm string.
+        """
+        if self._length is None:
+            self._length = f"{self.hours}:{self.minutes:02d}"
+        return self._length
+
+    @property
+    def length_sort_key(self):
+        return 60 * int(self.hours) + int(self.minutes)
+
+    @property
+    def rating(self):
+        """
+        The rating string from the first note.
+        """
+        if self._rating is None:
+            self._rating = self.notes[0].rating
+        return self._rating
+
+    @property
+    def status_string(self):
+        """
+        The status from the first note, or "" if there is none.
+        """
+        status = self.notes[0].status
+        return "" if status is None else status
+
+    @property
+    def title_sort_key(self):
+        if self._title_sort_key is None:
+            self._title_sort_key = get_title_sort_key(self.title)
+        return self._title_sort_key
+
+
+class Note(Entity):
+    """
+    A user's note about a book.
+
+    The computed attribute is rating, a combination of the rating_stars and
+    rating_description values, or "" if these are None.
+    """
+    __slots__ = (
+        "id",
+        "username",
+        "status",
+        "finish_date",
+        "rating_stars",
+        "rating_description",
+        "comments",
+    )
+    fields = __slots__
+    computed_fields = ("rating",)
+
+    def __init__(self, id, username, status, finish_date, rating_stars,
+            rating_description, comments):
+        self.id = id
+        self.username = username
+        self.status = status
+        self.finish_date = finish_date
+        self.rating_stars = rating_stars
+        self.rating_description = rating_description
+        self.comments = comments
+
+    @property
+    def rating(self):
+        rating = ""
+        if self.rating_stars is not None:
+            rating = str(self.rating_stars) + " " + self.rating_description
+        return rating
+
+
+class Person(Entity):
+    """
+    An author, narrator, or translator.
+
+    books is None unless the person was loaded with the person's books.
+
+    The computed attributes are:
+        display_name  -- forename + " " + surname
+        reverse_name  -- surname + ", " + forename
+        name_sort_key -- (surname + " " + forename).upper()
+    """
+    __slots__ = (
+        "id",
+        "surname",
+        "forename",
+        "books",
+        "_display_name",
+        "_reverse_name",
+        "_name_sort_key",
+    )
+    fields = __slots__[:4]
+    computed_fields = ("display_name", "reverse_name", "name_sort_key")
+
+    def __init__(self, id, surname, forename, books=None):
+        self.id = id
+        self.surname = surname
+        self.forename = forename
+        self.books = books
+        self._display_name = None
+        self._reverse_name = None
+        self._name_sort_key = None
+
+    def copy(self):
+        """
+        Return a new Person with the same stored attributes.
+        """
+        return Person(self.id, self.surname, self.forename, self.books)
+
+    @property
+    def display_name(self):
+        if self._display_name is None:
+            if self.surname is None:
+                self._display_name = self.forename
+            else:
+                self._display_name = self.forename + " " + self.surname
+        return self._display_name
+
+    @property
+    def name_sort_key(self):
+        if self._name_sort_key is None:
+            if self.surname is None:
+                name_sort_key = self.forename
+            else:
+                name_sort_key = self.surname + " " + self.forename
+            self._name_sort_key = name_sort_key.upper()
+        return self._name_sort_key
+
+    @property
+    def reverse_name(self):
+        if self._reverse_name is None:
+            if self.surname is None:
+                self._reverse_name = self.forename
+            else:
+                self._reverse_name = self.surname + ", " + self.forename
+        return self._reverse_name
+
+
+def get_title_sort_key(title):
+    """
+    Return a case-insensitive sort key for the title by removing "The", "A",
+    or "An" from the beginning of the title and converting the result to
+    an uppercase string.
+    """
+    if title.startswith("A "):
+        title_sort_key = title[2:]
+    elif title.startswith("An "):
+        title_sort_key = title[3:]
+    elif title.startswith("The "):
+        title_sort_key = title[4:]
+    else:
+        title_sort_key = title
+    title_sort_key = title_sort_key.upper()
+    return title_sort_key
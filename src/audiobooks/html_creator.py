@@ -61,63 +61,14 @@ def create_all_authors_table_html(authors):
         name_sort_key
         books -- a list of book dicts
     """
-    html_str = ''
-    html_str += '      <h1>Authors</h1>\n'
-    html_str += '      <table id="authors">\n'
-    html_str += '        <thead>\n'
-    html_str += '          <tr>\n'
-    html_str += '            <th>Author</th>\n'
-    html_str += '            <th>Title</th>\n'
-    html_str += '            <th>Rating</th>\n'
-    html_str += '            <th class="nowrap">All Authors</th>\n'
-    html_str += '            <th>Length</th>\n'
-    html_str += '            <th>Acquired</th>\n'
-    html_str += '            <th>Status</th>\n'
-    html_str += '            <th>Finished</th>\n'
-    html_str += '          </tr>\n'
-    html_str += '        </thead>\n'
-    html_str += '        <tbody>\n'
-
-    index_path = config.get_index_path()
-    for author in authors:
-        sorted_books = sorted(author["books"], key=lambda book: book["title_sort_key"])
-        first_tr = True
-        for book in sorted_books:
-            html_str += '          <tr>\n'
-            if first_tr:
-                html_str += f"""            <td class="nowrap"><a href="{index_path}?author_id={html.escape(str(author["id"]))}">{html.escape(author["reverse_name"])}</a></td>\n"""
-                first_tr = False
-            else:
-                html_str += '          <td></td>\n'
-            html_str += f"""            <td><a href="{index_path}?book_id={html.escape(str(book["id"]))}">{html.escape(book["title"])}</a></td>\n"""
-            html_str += f'            <td class="nowrap">{html.escape(book["rating"])}</td>\n'
-            html_str += create_authors_td_html(book["authors"])
-            html_str += f'            <td class="right">{html.escape(book["length"])}</td>\n'
-            html_str += f'            <td class="nowrap">{html.escape(book["acquisition_date"])}</td>\n'
-            html_str += f'            <td>{html.escape(book["status_string"])}</td>\n'
-            html_str += f'            <td class="nowrap">{html.escape(book["finish_date_string"])}</td>\n'
-            html_str += '          </tr>\n'
-    html_str += '        </tbody>\n'
-    html_str += '      </table>\n'
-    return html_str
+    return "".join(generate_all_authors_table_html(authors))
 
 
 def create_all_books_table_html(books):
     """
     Create the HTML for all books.
     """
-    html_str =  '      <h1>Audiobooks</h1>\n'
-    html_str += '      <div class="filters">\n'
-    html_str += '        <strong>Filter by Status:</strong>\n'
-    html_str += '        <input type="checkbox" id="new" title="Click this checkbox to toggle the visibility of new audiobooks." checked>\n'
-    html_str += '        <label for="new" title="Click this checkbox to toggle the visibility of new audiobooks.">New</label>\n'
-    html_str += '        <input type="checkbox" id="started" title="Click this checkbox to toggle the visibility of started audiobooks." checked>\n'
-    html_str += '        <label for="started" title="Click this checkbox to toggle the visibility of started audiobooks.">Started</label>\n'
-    html_str += '        <input type="checkbox" id="finished" title="Click this checkbox to toggle the visibility of finished audiobooks." checked>\n'
-    html_str += '        <label for="finished" title="Click this checkbox to toggle the visibility of finished audiobooks.">Finished</label>\n'
-    html_str += '      </div>\n'
-    html_str += create_sortable_books_table_html(books, filterable=True)
-    return html_str
+    return "".join(generate_all_books_table_html(books))
 
 
 def create_author_html(author):
@@ -354,49 +305,7 @@ def create_sortable_books_table_html(books, filterable=False):
     The all books table is filterable; the books table associated with an
     author, translator, or narrator is not filterable.
     """
-    index_path = config.get_index_path()
-
-    th_tool_tip = "Click this header to sort the table by the values in this column."
-    html_str = ''
-    if filterable:
-        html_str += '      <table id="audiobooks" class="filterable">\n'
-    else:
-        html_str += '      <table id="audiobooks">\n'
-    html_str += '        <thead>\n'
-    html_str += '          <tr>\n'
-
-    # Since the table is sorted by title, put the up arrow symbol in the
-    # span element.
-    html_str += f'            <th class="sortable nowrap" title="{th_tool_tip}">Title <span>⭡</span></th>\n'
-    html_str += f'            <th class="sortable nowrap" title="{th_tool_tip}">Authors <span>⭥</span></th>\n'
-    html_str += f'            <th class="sortable nowrap" title="{th_tool_tip}">Rating <span>⭥</span></th>\n'
-    html_str += f'            <th class="sortable nowrap" title="{th_tool_tip}">Length <span>⭥</span></th>\n'
-    html_str += f'            <th class="sortable nowrap" title="{th_tool_tip}">Acquired <span>⭥</span></th>\n'
-    html_str += f'            <th class="sortable nowrap" title="{th_tool_tip}">Status <span>⭥</span></th>\n'
-    html_str += f'            <th class="sortable nowrap" title="{th_tool_tip}">Finished <span>⭥</span></th>\n'
-    html_str += '          </tr>\n'
-    html_str += '        </thead>\n'
-    html_str += '        <tbody>\n'
-
-    # Sort by the title sort key.
-    sorted_books = sorted(books, key=lambda book: book["title_sort_key"])
-
-    # Get the book attributes for the table.
-    for book in sorted_books:
-        # Create table rows for all books, reporting only the first finished date.
-        html_str += f"""          <tr class="{html.escape(book['notes'][0]['status'].lower())}">\n"""
-        html_str += f"""            <td data-sortkey="{html.escape(book['title_sort_key'])}"><a href="{index_path}?book_id={html.escape(str(book['id']))}">{html.escape(book['title'])}</a></td>\n"""
-        html_str += create_authors_td_html(book["authors"])
-        html_str += f"""            <td class="nowrap">{html.escape(book['rating'])}</td>\n"""
-        html_str += f"""            <td data-sortkey="{html.escape(str(book['length_sort_key']))}" class="right">{html.escape(book["length"])}</td>\n"""
-        html_str += f"""            <td>{html.escape(book["acquisition"]["acquisition_date"])}</td>\n"""
-        html_str += f"""            <td>{html.escape(book["notes"][0]["status"])}</td>\n"""
-        html_str += f'            <td>{html.escape(book["finish_date_string"])}</td>\n'
-        html_str += '          </tr>\n'
-
-    html_str += '        </tbody>\n'
-    html_str += '      </table>\n'
-    return html_str
+    return "".join(generate_sortable_books_table_html(books, filterable))
 
 
 def create_start_html(body_class="tables"):
@@ -504,3 +413,138 @@ def create_translator_html(translator):
     html_str += f'    <h1>Audiobooks Translated by {html.escape(translator["display_name"])}</h1>\n'
     html_str += create_sortable_books_table_html(translator["books"])
     return html_str
+
+
+def generate_all_authors_table_html(authors):
+    """
+    Generate the HTML for the authors table in chunks: the start of the
+    table, one chunk for each row, and the end of the table.
+
+    authors is a list of author data records sorted by the authors' last names
+    using the name_sort_key attribute as the sort key.
+
+    The author attribues are:
+        id
+        surname
+        forename
+        display_name
+        reverse_name
+        name_sort_key
+        books -- a list of book dicts
+    """
+    html_str = ''
+    html_str += '      <h1>Authors</h1>\n'
+    html_str += '      <table id="authors">\n'
+    html_str += '        <thead>\n'
+    html_str += '          <tr>\n'
+    html_str += '            <th>Author</th>\n'
+    html_str += '            <th>Title</th>\n'
+    html_str += '            <th>Rating</th>\n'
+    html_str += '            <th class="nowrap">All Authors</th>\n'
+    html_str += '            <th>Length</th>\n'
+    html_str += '            <th>Acquired</th>\n'
+    html_str += '            <th>Status</th>\n'
+    html_str += '            <th>Finished</th>\n'
+    html_str += '          </tr>\n'
+    html_str += '        </thead>\n'
+    html_str += '        <tbody>\n'
+    yield html_str
+
+    index_path = config.get_index_path()
+    for author in authors:
+        sorted_books = sorted(author["books"], key=lambda book: book["title_sort_key"])
+        first_tr = True
+        for book in sorted_books:
+            html_str = '          <tr>\n'
+            if first_tr:
+                html_str += f"""            <td class="nowrap"><a href="{index_path}?author_id={html.escape(str(author["id"]))}">{html.escape(author["reverse_name"])}</a></td>\n"""
+                first_tr = False
+            else:
+                html_str += '          <td></td>\n'
+            html_str += f"""            <td><a href="{index_path}?book_id={html.escape(str(book["id"]))}">{html.escape(book["title"])}</a></td>\n"""
+            html_str += f'            <td class="nowrap">{html.escape(book["rating"])}</td>\n'
+            html_str += create_authors_td_html(book["authors"])
+            html_str += f'            <td class="right">{html.escape(book["length"])}</td>\n'
+            html_str += f'            <td class="nowrap">{html.escape(book["acquisition_date"])}</td>\n'
+            html_str += f'            <td>{html.escape(book["status_string"])}</td>\n'
+            html_str += f'            <td class="nowrap">{html.escape(book["finish_date_string"])}</td>\n'
+            html_str += '          </tr>\n'
+            yield html_str
+    html_str = ''
+    html_str += '        </tbody>\n'
+    html_str += '      </table>\n'
+    yield html_str
+
+
+def generate_all_books_table_html(books):
+    """
+    Generate the HTML for all books in chunks.
+    """
+    html_str =  '      <h1>Audiobooks</h1>\n'
+    html_str += '      <div class="filters">\n'
+    html_str += '        <strong>Filter by Status:</strong>\n'
+    html_str += '        <input type="checkbox" id="new" title="Click this checkbox to toggle the visibility of new audiobooks." checked>\n'
+    html_str += '        <label for="new" title="Click this checkbox to toggle the visibility of new audiobooks.">New</label>\n'
+    html_str += '        <input type="checkbox" id="started" title="Click this checkbox to toggle the visibility of started audiobooks." checked>\n'
+    html_str += '        <label for="started" title="Click this checkbox to toggle the visibility of started audiobooks.">Started</label>\n'
+    html_str += '        <input type="checkbox" id="finished" title="Click this checkbox to toggle the visibility of finished audiobooks." checked>\n'
+    html_str += '        <label for="finished" title="Click this checkbox to toggle the visibility of finished audiobooks.">Finished</label>\n'
+    html_str += '      </div>\n'
+    yield html_str
+    yield from generate_sortable_books_table_html(books, filterable=True)
+
+
+def generate_sortable_books_table_html(books, filterable=False):
+    """
+    Generate the HTML for a sortable books table in chunks: the start of the
+    table, one chunk for each row, and the end of the table.
+
+    The all books table is filterable; the books table associated with an
+    author, translator, or narrator is not filterable.
+    """
+    index_path = config.get_index_path()
+
+    th_tool_tip = "Click this header to sort the table by the values in this column."
+    html_str = ''
+    if filterable:
+        html_str += '      <table id="audiobooks" class="filterable">\n'
+    else:
+        html_str += '      <table id="audiobooks">\n'
+    html_str += '        <thead>\n'
+    html_str += '          <tr>\n'
+
+    # Since the table is sorted by title, put the up arrow symbol in the
+    # span element.
+    html_str += f'            <th class="sortable nowrap" title="{th_tool_tip}">Title <span>⭡</span></th>\n'
+    html_str += f'            <th class="sortable nowrap" title="{th_tool_tip}">Authors <span>⭥</span></th>\n'
+    html_str += f'            <th class="sortable nowrap" title="{th_tool_tip}">Rating <span>⭥</span></th>\n'
+    html_str += f'            <th class="sortable nowrap" title="{th_tool_tip}">Length <span>⭥</span></th>\n'
+    html_str += f'            <th class="sortable nowrap" title="{th_tool_tip}">Acquired <span>⭥</span></th>\n'
+    html_str += f'            <th class="sortable nowrap" title="{th_tool_tip}">Status <span>⭥</span></th>\n'
+    html_str += f'            <th class="sortable nowrap" title="{th_tool_tip}">Finished <span>⭥</span></th>\n'
+    html_str += '          </tr>\n'
+    html_str += '        </thead>\n'
+    html_str += '        <tbody>\n'
+    yield html_str
+
+    # Sort by the title sort key.
+    sorted_books = sorted(books, key=lambda book: book["title_sort_key"])
+
+    # Get the book attributes for the table.
+    for book in sorted_books:
+        # Create table rows for all books, reporting only the first finished date.
+        html_str = f"""          <tr class="{html.escape(book['notes'][0]['status'].lower())}">\n"""
+        html_str += f"""            <td data-sortkey="{html.escape(book['title_sort_key'])}"><a href="{index_path}?book_id={html.escape(str(book['id']))}">{html.escape(book['title'])}</a></td>\n"""
+        html_str += create_authors_td_html(book["authors"])
+        html_str += f"""            <td class="nowrap">{html.escape(book['rating'])}</td>\n"""
+        html_str += f"""            <td data-sortkey="{html.escape(str(book['length_sort_key']))}" class="right">{html.escape(book["length"])}</td>\n"""
+        html_str += f"""            <td>{html.escape(book["acquisition"]["acquisition_date"])}</td>\n"""
+        html_str += f"""            <td>{html.escape(book["notes"][0]["status"])}</td>\n"""
+        html_str += f'            <td>{html.escape(book["finish_date_string"])}</td>\n'
+        html_str += '          </tr>\n'
+        yield html_str
+
+    html_str = ''
+    html_str += '        </tbody>\n'
+    html_str += '      </table>\n'
+    yield html_str
@@ -0,0 +1,111 @@
+"""
+Parsing and resolution of the names of the authors, narrators, and
+translators in the CSV files.
+
+The CSV files format a person's name as "surname, forename", where multiple
+words may appear in each of surname and forename, and separate the names of
+a book's people with " & ". If a person has a single name (e.g., "Homer",
+"Aeschylus", "Colette"), the surname is saved as NULL in the database.
+
+The same names appear on many rows, so parse_name() keeps the parts of the
+PARSE_NAME_CACHE_SIZE most recently parsed name strings, and a NameResolver
+saves each distinct name string once per import rather than once per row.
+The cache is shared by all imports in a process, so its size is fixed.
+"""
+
+import functools
+import logging
+logger = logging.getLogger(__name__)
+
+# PARSE_NAME_CACHE_SIZE is the number of name strings whose parts are cached
+# by parse_name().
+PARSE_NAME_CACHE_SIZE = 4096
+
+
+class NameResolver:
+    """
+    Resolve the name strings of the authors, narrators, or translators in a
+    CSV file to their IDs, saving each distinct name string once with save(),
+    which is db.author.save(), db.narrator.save(), or db.translator.save().
+    Count the distinct names and their occurrences for the import report.
+    Names are counted by their parsed (surname, forename) tuples, as in
+    bulk_processor, so name strings that differ only in whitespace are
+    counted once.
+    """
+
+    def __init__(self, role, save):
+        self.role = role
+        self.save = save
+        self.ids = {}
+        self.names = set()
+        self.occurrences = 0
+
+    def get_counts(self):
+        """
+        Return a dict containing the number of distinct names and the number
+        of their occurrences.
+        """
+        return {"distinct": len(self.names), "occurrences": self.occurrences}
+
+    def resolve(self, names_string):
+        """
+        Return the list of IDs of the people whose names are in names_string,
+        saving the people not resolved before.
+        """
+        person_ids = []
+        for name_string in split_names(names_string):
+            self.occurrences += 1
+            person_id = self.ids.get(name_string)
+            if person_id is None:
+                (surname, forename) = parse_name(name_string, self.role)
+                person_id = self.save(surname, forename)
+                logger.debug("%s ID for '%s': %s", self.role, name_string, person_id)
+                self.ids[name_string] = person_id
+                self.names.add((surname, forename))
+            person_ids.append(person_id)
+        return person_ids
+
+
+# Functions are listed in alphabetical order.
+
+@functools.lru_cache(maxsize=PARSE_NAME_CACHE_SIZE)
+def parse_name(name_string, role):
+    """
+    Parse a name formatted as "surname, forename" and return the
+    (surname, forename) tuple, in which the surname is None if the person
+    has a single name. role ("author", "narrator", or "translator") is used
+    in error messages.
+    """
+    names = name_string.split(",")
+    if len(names) == 1:
+        surname = None
+        forename = names[0]
+    elif len(names) == 2:
+        surname = names[0].strip()
+        forename = names[1]
+        if surname == "":
+            surname = None
+    else:
+        raise ValueError(f"{role.capitalize()} name '{name_string}' formatted incorrectly with too many commas.")
+    forename = forename.strip()
+    if forename == "":
+        raise ValueError(f"The {role}'s forename in '{name_string}' must not be empty.")
+    return (surname, forename)
+
+
+def parse_names(names_string, role):
+    """
+    Return the list of (surname, forename) tuples of the names in
+    names_string.
+    """
+    return [parse_name(name_string, role) for name_string in split_names(names_string)]
+
+
+def split_names(names_string):
+    """
+    Split a string of names separated by " & " into a list of name strings.
+    An empty string contains no names.
+    """
+    if names_string == "":
+        return []
+    return names_string.split(" & ")
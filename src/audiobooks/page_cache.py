@@ -0,0 +1,160 @@
+"""
+On-disk cache of complete page responses.
+
+The cache is enabled by setting the AUDIOBOOKS_CACHE_DIR environment variable
+to a directory writable by the web server. Each page's output is stored in a
+subdirectory named for the database's data version, so a page is served from
+the cache until a loader commits a change to the database. The subdirectories
+for earlier versions are removed when the first page for a new version is
+written. Errors writing the cache are logged, and the page is still served.
+"""
+
+import contextlib
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+logger = logging.getLogger(__name__)
+
+from . import db
+from . import response
+
+
+def get_database_stamp():
+    """
+    Return a string that changes whenever a loader commits a change to the
+    database.
+
+    The stamp is made from the database's data version and the time of the
+    last commit, both read from tbl_data_version, so a database that is
+    created again and reaches the same data version gets a different stamp. A
+    database that has no data version yet falls back to the database file's
+    modification time and size.
+    """
+    row = db.get_data_version_row()
+    if row is not None:
+        (version, updated) = row
+        digits = "".join(char for char in updated if char.isdigit())
+        return f"v{version}-{digits}"
+    row = db.conn.execute("PRAGMA database_list").fetchone()
+    db_file = row[2]
+    stat = os.stat(db_file)
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def get_path(page, value=None, content_encoding=None):
+    """
+    Return the path of the cache file for the page and the value of its query
+    parameter. If content_encoding is not None, return the path of the cache
+    file for the page's response compressed with that content coding, such as
+    "gzip".
+
+    Return None if caching is disabled or if the value is not a valid ID, so
+    that arbitrary query strings don't fill the cache.
+    """
+    cache_dir = os.environ.get('AUDIOBOOKS_CACHE_DIR')
+    if not cache_dir:
+        return None
+    if value is None:
+        value = ""
+    if value != "" and not (str.isdigit(value) and str.isascii(value)):
+        return None
+    # The key contains only the parameter that selected the page, so other
+    # parameters in the query string don't create separate cache entries.
+    key = f"{page}={value}"
+    if content_encoding is not None:
+        key += f";{content_encoding}"
+    file_name = hashlib.sha256(key.encode("utf-8")).hexdigest() + ".html"
+    return os.path.join(cache_dir, get_database_stamp(), file_name)
+
+
+def get_stamp_version(stamp):
+    """
+    Return the data version in a database stamp returned by
+    get_database_stamp(), or None if the stamp has no data version.
+    """
+    (prefix, separator, rest) = stamp.partition("-")
+    if not prefix.startswith("v") or not prefix[1:].isdigit():
+        return None
+    return int(prefix[1:])
+
+
+def read(path):
+    """
+    Return the cached page response stored at path, or None if there is none.
+    """
+    try:
+        with open(path, "rb") as cache_file:
+            return response.parse_cgi(cache_file.read())
+    except FileNotFoundError:
+        return None
+
+
+def record(path, page_response):
+    """
+    Return a Response with the same status and headers as page_response whose
+    body passes on page_response's body and, when the whole body has been
+    generated, stores the response at path. The page can then be streamed to
+    the browser and cached at the same time.
+    """
+    def generate_body():
+        chunks = []
+        for chunk in page_response.body:
+            chunks.append(chunk)
+            yield chunk
+        write(path, response.Response(
+            chunks, page_response.status, list(page_response.headers)))
+
+    return response.Response(
+        generate_body(), page_response.status, page_response.headers)
+
+
+def remove_earlier_versions(version_dir):
+    """
+    Remove the cache directories next to version_dir whose data versions are
+    earlier than version_dir's, and those that have no data version if
+    version_dir has one.
+    """
+    cache_dir = os.path.dirname(version_dir)
+    version = get_stamp_version(os.path.basename(version_dir))
+    if version is None or not os.path.isdir(cache_dir):
+        return
+    for entry in os.listdir(cache_dir):
+        entry_version = get_stamp_version(entry)
+        if entry_version is None or entry_version < version:
+            logger.debug(f"Removing stale cache directory '{entry}'")
+            shutil.rmtree(os.path.join(cache_dir, entry), ignore_errors=True)
+
+
+def write(path, page_response):
+    """
+    Store the page response at path as CGI output. The response's body must
+    be a list of chunks rather than a generator.
+
+    The file is written to a temporary file and renamed so that a concurrent
+    request never reads a partially written page. When the directory for the
+    current version is created, the cache directories for earlier data
+    versions are removed. Directories for later versions are kept, since a
+    request that started before a commit may be writing an old version's page.
+
+    The page may already have been sent to the browser, so an OSError raised
+    while writing the cache is logged rather than raised.
+    """
+    version_dir = os.path.dirname(path)
+    temp_path = None
+    try:
+        if not os.path.isdir(version_dir):
+            remove_earlier_versions(version_dir)
+            os.makedirs(version_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=version_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as temp_file:
+            temp_file.write(page_response.get_cgi_headers().encode("utf-8"))
+            for chunk in page_response.encode_body():
+                temp_file.write(chunk)
+        os.replace(temp_path, path)
+    except OSError as exc:
+        logger.warning(f"Can't write the cached page '{path}': {exc}")
+        if temp_path is not None:
+            with contextlib.suppress(OSError):
+                os.remove(temp_path)
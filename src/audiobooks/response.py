@@ -0,0 +1,125 @@
+"""
+HTTP responses returned by the display functions.
+"""
+
+import sys
+
+
+class Response:
+    """
+    An HTTP response containing a status, a list of (name, value) header
+    tuples, and a body that is an iterable of chunks. A chunk is a str, or
+    bytes if the body is compressed or was read from the page cache.
+
+    The body may be a generator, so a page can be written, compressed, or
+    cached as it is generated. A generator body can be iterated only once.
+
+    headers_sent is True once write_cgi() has written the headers, after
+    which an error raised while the body is generated can no longer be
+    reported with a response of its own.
+    """
+
+    def __init__(self, body=(), status="200 OK", headers=None):
+        if headers is None:
+            headers = [("Content-Type", "text/html; charset=utf-8")]
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.headers_sent = False
+
+    def encode_body(self):
+        """
+        Generate the chunks of the body as UTF-8 bytes.
+        """
+        for chunk in self.body:
+            yield encode(chunk)
+
+    def get_cgi_headers(self):
+        """
+        Return the header lines of the CGI output, ending with a blank line.
+
+        A Status header is included only if the status isn't "200 OK".
+        """
+        cgi_headers = ""
+        if self.status != "200 OK":
+            cgi_headers += f"Status: {self.status}\r\n"
+        for (name, value) in self.headers:
+            cgi_headers += f"{name}: {value}\r\n"
+        cgi_headers += "\r\n"
+        return cgi_headers
+
+    def get_header(self, name):
+        """
+        Return the value of the header named name, ignoring case, or None if
+        there is no such header.
+        """
+        for (header_name, value) in self.headers:
+            if header_name.lower() == name.lower():
+                return value
+        return None
+
+    def set_header(self, name, value):
+        """
+        Replace any headers named name, ignoring case, with one header.
+        """
+        self.headers = [
+            (header_name, header_value)
+            for (header_name, header_value) in self.headers
+            if header_name.lower() != name.lower()
+        ]
+        self.headers.append((name, value))
+
+    def write_cgi(self, stream=None):
+        """
+        Write the response as CGI output to stream, which defaults to
+        sys.stdout.
+
+        The body is written to the buffered stream as it is generated, and
+        the stream is flushed after the headers and the first chunk so that
+        the browser can start rendering the page; after that, the buffer is
+        written whenever it fills.
+        """
+        if stream is None:
+            stream = sys.stdout
+        stream.write(self.get_cgi_headers())
+        self.headers_sent = True
+        first_chunk = True
+        for chunk in self.body:
+            if isinstance(chunk, bytes):
+                # Write bytes to the stream's underlying binary buffer after
+                # flushing any text written before them.
+                stream.flush()
+                stream.buffer.write(chunk)
+            else:
+                stream.write(chunk)
+            if first_chunk:
+                stream.flush()
+                first_chunk = False
+        stream.flush()
+
+
+def encode(chunk):
+    """
+    Return the chunk encoded as UTF-8 bytes if it is a str.
+    """
+    if isinstance(chunk, str):
+        return chunk.encode("utf-8")
+    return chunk
+
+
+def parse_cgi(output):
+    """
+    Return a Response made from CGI output bytes, as written by
+    Response.write_cgi(). The response's body is a single bytes chunk.
+    """
+    (header_bytes, separator, body) = output.partition(b"\r\n\r\n")
+    status = "200 OK"
+    headers = []
+    for line in header_bytes.decode("utf-8").split("\r\n"):
+        (name, colon, value) = line.partition(":")
+        value = value.strip()
+        if name.lower() == "status":
+            status = value
+        else:
+            headers.append((name, value))
+    return Response([body], status, headers)
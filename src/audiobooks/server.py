@@ -0,0 +1,116 @@
+"""
+A long-running WSGI application that serves the same pages as index.cgi.
+
+index.cgi starts Python, imports the package, loads the .env file, and
+connects to the database for every request. The WSGI application does these
+once, keeps the connection open between requests, and keeps the entities in
+the data module's identity map until the data version changes, so a request
+costs only the rendering of its page.
+
+The identity map is shared by all requests, so requests must be handled one
+at a time, as wsgiref's simple server does. It holds only entities that
+exist, so its size is bounded by the size of the library rather than by the
+number of different IDs requested.
+"""
+
+import cgitb
+import logging
+import os
+import sys
+import urllib.parse
+logger = logging.getLogger(__name__)
+
+from . import data
+from . import db
+from . import display
+from . import timing
+
+# PAGE_NAMES lists the query parameters that select a page, in the order in
+# which index.cgi checks them. Pages whose names end in "_id" take a value.
+PAGE_NAMES = (
+    "404",
+    "about",
+    "author_id",
+    "authors",
+    "book_id",
+    "narrator_id",
+    "summaries",
+    "translator_id",
+)
+
+# data_version is the data version of the entities in the identity map.
+data_version = None
+
+
+def application(environ, start_response):
+    """
+    Display the page selected by the request's query string and return the
+    page's body.
+
+    If an exception occurs, send the exception to the browser when
+    AUDIOBOOKS_ENVIRONMENT is not PRODUCTION, as index.cgi does; otherwise,
+    let the server report the error.
+    """
+    db.query_log.start_request()
+    timing.start_request()
+    refresh_cache()
+    (page, value) = get_page(environ.get("QUERY_STRING", ""))
+    try:
+        with timing.phase("render"):
+            page_response = display.display_page(page, value, environ)
+            # Generate the whole body before starting the response, so that
+            # an exception can still be reported and Content-Length can be
+            # sent.
+            body_bytes = b"".join(page_response.encode_body())
+        status = page_response.status
+        headers = list(page_response.headers)
+        server_timing = timing.get_server_timing()
+        if server_timing is not None:
+            headers.append(("Server-Timing", server_timing))
+    except Exception:
+        # The identity map may be incomplete.
+        data.reset_cache()
+        if os.environ.get('AUDIOBOOKS_ENVIRONMENT') == 'PRODUCTION':
+            raise
+        status = "500 Internal Server Error"
+        headers = [("Content-Type", "text/html; charset=utf-8")]
+        body_bytes = cgitb.html(sys.exc_info()).encode("utf-8")
+
+    finally:
+        timing.finish_request(page, value)
+        db.query_log.finish_request(environ.get("QUERY_STRING", ""))
+
+    headers.append(("Content-Length", str(len(body_bytes))))
+    start_response(status, headers)
+    if environ.get("REQUEST_METHOD") == "HEAD":
+        return [b""]
+    return [body_bytes]
+
+
+def get_page(query_string):
+    """
+    Return a (page, value) tuple containing the name of the query parameter
+    that selects the page and the parameter's value, or None for pages that
+    take no value. Return ("books", None) if no page is selected.
+    """
+    fields = urllib.parse.parse_qs(query_string, keep_blank_values=True)
+    for name in PAGE_NAMES:
+        if name in fields:
+            if name.endswith("_id"):
+                return (name, fields[name][0])
+            return (name, None)
+    return ("books", None)
+
+
+def refresh_cache():
+    """
+    Empty the data module's identity map if the data version has changed
+    since the entities in it were loaded. A database without a data version
+    has its identity map emptied for every request.
+    """
+    global data_version
+    version = db.get_data_version()
+    if version is None or version != data_version:
+        logger.debug(f"Data version changed from {data_version} to {version}")
+        data.reset_cache()
+        data_version = version
@@ -0,0 +1,259 @@
+"""
+Export every page of the web site as a static HTML file.
+
+Each page is rendered by the same display function that index.cgi uses and
+is written to a file whose path is derived from the query string that selects
+the page:
+
+    index.cgi                       index.html
+    index.cgi?404                   404.html
+    index.cgi?about                 about.html
+    index.cgi?authors               authors.html
+    index.cgi?summaries             summaries.html
+    index.cgi?author_id=N           author_id/N.html
+    index.cgi?book_id=N             book_id/N.html
+    index.cgi?narrator_id=N         narrator_id/N.html
+    index.cgi?translator_id=N       translator_id/N.html
+
+so the web server can serve the file in place of running index.cgi, and the
+links between pages stay the same.
+
+The export directory contains a manifest.json file that records a digest of
+the data shown on each page. An incremental export renders only the pages
+whose digest has changed or whose file is missing. Files for pages that no
+longer exist are removed by every export.
+
+The pages can be rendered by a pool of worker processes. Each worker opens its
+own read-only connection to the database and loads the books once, and each
+page is written to its own file, so the output doesn't depend on the number
+of workers or the order in which they finish.
+"""
+
+import contextlib
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+logger = logging.getLogger(__name__)
+
+from . import data
+from . import db
+from . import display
+
+MANIFEST_FILE_NAME = "manifest.json"
+
+# PAGE_FILE_NAMES maps the pages that have no ID to their file names.
+PAGE_FILE_NAMES = {
+    "404": "404.html",
+    "about": "about.html",
+    "authors": "authors.html",
+    "books": "index.html",
+    "summaries": "summaries.html",
+}
+
+
+def compute_digest(*objects):
+    """
+    Return the SHA-256 hex digest of the repr() of the objects.
+    """
+    text = "\n".join(repr(obj) for obj in objects)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def export(output_dir, incremental=False, jobs=1):
+    """
+    Export the pages to output_dir and write the manifest.
+
+    If incremental is True, render only the pages whose data changed since the
+    previous export. The previous export's pages are all rendered again if
+    AUDIOBOOKS_WEBDIR has changed, since the links depend on it.
+
+    jobs is the number of worker processes that render the pages.
+
+    Return a dict containing the counts of the pages "rendered", "unchanged",
+    and "removed".
+    """
+    webdir = os.environ.get('AUDIOBOOKS_WEBDIR')
+    manifest = read_manifest(output_dir)
+    old_digests = manifest.get("pages", {})
+    if not incremental or manifest.get("webdir") != webdir:
+        reusable_digests = {}
+    else:
+        reusable_digests = old_digests
+
+    counts = {"rendered": 0, "unchanged": 0, "removed": 0}
+    new_digests = {}
+    pages_to_render = []
+    for ((page, value), digest) in get_page_digests().items():
+        path = get_page_path(page, value)
+        new_digests[path] = digest
+        file_path = os.path.join(output_dir, path)
+        if reusable_digests.get(path) == digest and os.path.exists(file_path):
+            counts["unchanged"] += 1
+        else:
+            pages_to_render.append((page, value, file_path))
+    render_pages(pages_to_render, jobs)
+    counts["rendered"] = len(pages_to_render)
+
+    for path in old_digests:
+        if path not in new_digests:
+            logger.debug(f"Removing '{path}'")
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(os.path.join(output_dir, path))
+            counts["removed"] += 1
+
+    manifest = {
+        "data_version": db.get_data_version(),
+        "webdir": webdir,
+        "pages": new_digests,
+    }
+    write_file(
+        os.path.join(output_dir, MANIFEST_FILE_NAME),
+        json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+    logger.info(f"Exported pages: {counts}")
+    return counts
+
+
+def get_page_digests():
+    """
+    Return a dict mapping each page, as a (page, value) tuple of the query
+    parameter that selects the page and its value, to the digest of the data
+    shown on the page.
+
+    The books are loaded once with data.get_books_by_id(), and each person's
+    page digest is made from the person's row and the digests of the person's
+    books, so a change to a book changes the digests of the pages of the
+    book's authors, narrators, and translators. The about and 404 pages show
+    no data and always have the same digest.
+    """
+    books_by_id = data.get_books_by_id()
+    book_digests = {
+        book_id: compute_digest(book) for (book_id, book) in books_by_id.items()
+    }
+
+    person_digests = {}
+    for (page, kind, rows) in (
+            ("author_id", "authors", db.author.select_authors()),
+            ("narrator_id", "narrators", db.narrator.select_narrators()),
+            ("translator_id", "translators", db.translator.select_translators())):
+        book_ids_by_person = {}
+        for book in books_by_id.values():
+            for person in book[kind]:
+                book_ids_by_person.setdefault(person["id"], []).append(book["id"])
+        for row in rows:
+            person_id = row[0]
+            person_book_digests = [
+                book_digests[book_id]
+                for book_id in book_ids_by_person.get(person_id, [])
+            ]
+            person_digests[(page, str(person_id))] = compute_digest(
+                row, *person_book_digests)
+
+    author_digests = [
+        digest for ((page, value), digest) in person_digests.items()
+        if page == "author_id"
+    ]
+    digests = {
+        ("404", None): compute_digest(),
+        ("about", None): compute_digest(),
+        ("authors", None): compute_digest(*author_digests),
+        ("books", None): compute_digest(*book_digests.values()),
+        ("summaries", None): compute_digest(data.get_summary()),
+    }
+    for (book_id, digest) in book_digests.items():
+        digests[("book_id", str(book_id))] = digest
+    digests.update(person_digests)
+    return digests
+
+
+def get_page_path(page, value=None):
+    """
+    Return the path, relative to the export directory, of the file for the
+    page selected by the query parameter named page with the given value.
+    """
+    if value is None:
+        return PAGE_FILE_NAMES[page]
+    return os.path.join(page, f"{value}.html")
+
+
+def init_worker(db_file):
+    """
+    Initialize a worker process by opening a read-only connection to the
+    database and loading all books into the identity map.
+
+    A forked worker must not use the connection it inherited from the parent
+    process, so the inherited connection is replaced without being used.
+    """
+    db.connect(db_file, read_only=True)
+    data.get_books_by_id()
+
+
+def read_manifest(output_dir):
+    """
+    Return the manifest written by the previous export to output_dir, or an
+    empty dict if there is none.
+    """
+    try:
+        with open(os.path.join(output_dir, MANIFEST_FILE_NAME), "r") as manifest_file:
+            return json.load(manifest_file)
+    except FileNotFoundError:
+        return {}
+
+
+def render_page(page, value=None):
+    """
+    Return the HTML of the page selected by the query parameter named page
+    with the given value, without the page's HTTP headers.
+    """
+    display_function = display.get_display_function(page)
+    args = () if value is None else (value,)
+    page_response = display_function(*args)
+    return "".join(page_response.body)
+
+
+def render_pages(pages, jobs=1):
+    """
+    Render the pages and write each page to its file. pages is a list of
+    (page, value, file_path) tuples.
+
+    If jobs is greater than 1, the pages are divided among a pool of jobs
+    worker processes.
+    """
+    if jobs <= 1 or len(pages) <= 1:
+        for page in pages:
+            write_page(page)
+        return
+    chunksize = max(1, len(pages) // (jobs * 4))
+    with multiprocessing.Pool(
+            processes=jobs, initializer=init_worker, initargs=(db.db_path,)) as pool:
+        for _ in pool.imap_unordered(write_page, pages, chunksize=chunksize):
+            pass
+
+
+def write_file(path, text):
+    """
+    Write text to the file at path, creating its directory if necessary.
+
+    The text is written to a temporary file that is renamed, so the web server
+    never serves a partially written page.
+    """
+    file_dir = os.path.dirname(path)
+    os.makedirs(file_dir, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=file_dir, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8", newline="") as temp_file:
+        temp_file.write(text)
+    # mkstemp() creates the file readable only by its owner.
+    os.chmod(temp_path, 0o644)
+    os.replace(temp_path, path)
+
+
+def write_page(page_to_render):
+    """
+    Render the page described by the (page, value, file_path) tuple and write
+    it to file_path.
+    """
+    (page, value, file_path) = page_to_render
+    logger.debug(f"Rendering '{file_path}'")
+    write_file(file_path, render_page(page, value))
@@ -0,0 +1,173 @@
+"""
+Optional per-request timing instrumentation.
+
+Timing is enabled by setting the AUDIOBOOKS_TIMING_LOG environment variable
+to the path of a log file. For each request, the durations of the request's
+phases (such as dotenv, import, connect, data, and render) and the number of
+SQL statements executed are appended to the log file as a line of JSON. The
+time of a phase nested in another, such as the data phase within the render
+phase, is counted only in the nested phase, so the phases' times add up to no
+more than the total time.
+
+index.cgi also records the CPU time used to start the interpreter as
+startup_cpu_ms. It is measured with time.process_time() before the request's
+total time starts, so it isn't a phase and isn't part of the total time.
+
+If AUDIOBOOKS_SERVER_TIMING is also set to ON, the WSGI server, which
+generates the whole page before writing the response's headers, sends the
+timings to the browser in a Server-Timing header. index.cgi streams pages
+and doesn't send the header.
+
+When timing is disabled, phase() and the timed() decorator do nothing but
+call the code they wrap.
+"""
+
+import contextlib
+import datetime
+import functools
+import json
+import logging
+import os
+import time
+logger = logging.getLogger(__name__)
+
+from . import db
+
+# phases maps each phase's name to its duration in seconds for the current
+# request, or is None if timing is disabled or no request has been started.
+phases = None
+
+# active_phases lists the names of the phases being timed, innermost last,
+# so that a phase entered again, as when one timed data function calls
+# another, is timed only once, and so that the time of a nested phase can be
+# taken out of the phase that encloses it.
+active_phases = []
+
+# request_start is the time.perf_counter() value at the start of the request.
+request_start = None
+
+# startup_cpu_seconds is the CPU time used to start the interpreter, or None
+# if it wasn't measured.
+startup_cpu_seconds = None
+
+
+def add_phase(name, seconds):
+    """
+    Add seconds to the duration of the phase name.
+    """
+    if phases is not None:
+        phases[name] = phases.get(name, 0.0) + seconds
+
+
+def finish_request(page, value=None):
+    """
+    Append a line of JSON containing the timings of the current request for
+    the page selected by the query parameter named page and its value to the
+    timing log, then stop timing.
+    """
+    global phases
+    if phases is None:
+        return
+    entry = {
+        "time": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "page": page,
+        "value": value,
+        "total_ms": round((time.perf_counter() - request_start) * 1000, 3),
+        "phases_ms": {name: round(seconds * 1000, 3) for (name, seconds) in phases.items()},
+        "queries": db.query_log.get_query_count(),
+    }
+    if startup_cpu_seconds is not None:
+        entry["startup_cpu_ms"] = round(startup_cpu_seconds * 1000, 3)
+    phases = None
+    # A request that can't be logged is still answered.
+    try:
+        with open(os.environ.get('AUDIOBOOKS_TIMING_LOG'), "a", encoding="utf-8") as log_file:
+            log_file.write(json.dumps(entry) + "\n")
+    except OSError as exc:
+        logger.warning(f"Can't write the timing log: {exc}")
+
+
+def get_server_timing():
+    """
+    Return the value of a Server-Timing header containing the durations of
+    the phases timed so far and the number of SQL statements executed, or
+    None if the header is disabled.
+    """
+    if phases is None or os.environ.get('AUDIOBOOKS_SERVER_TIMING') != "ON":
+        return None
+    metrics = [
+        f"{name};dur={seconds * 1000:.1f}" for (name, seconds) in phases.items()
+    ]
+    metrics.append(f'queries;desc="{db.query_log.get_query_count()}"')
+    return ", ".join(metrics)
+
+
+def is_enabled():
+    """
+    Return True if the AUDIOBOOKS_TIMING_LOG environment variable is set.
+    """
+    return bool(os.environ.get('AUDIOBOOKS_TIMING_LOG'))
+
+
+@contextlib.contextmanager
+def phase(name):
+    """
+    Time the code in the with statement as the phase name, taking its time
+    out of the enclosing phase, if any.
+    """
+    if phases is None or name in active_phases:
+        yield
+        return
+    enclosing_phase = active_phases[-1] if active_phases else None
+    active_phases.append(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        active_phases.pop()
+        add_phase(name, seconds)
+        if enclosing_phase is not None:
+            add_phase(enclosing_phase, -seconds)
+
+
+def start_request(start_time=None, startup_phases=None, startup_cpu_time=None):
+    """
+    Start timing a request if timing is enabled. The SQL statements executed
+    are counted by db.query_log, whose request must be started first.
+
+    start_time is the time.perf_counter() value at the start of the request,
+    which defaults to now. startup_phases is a dict mapping the names of
+    phases timed before the audiobooks package was imported to their
+    durations in seconds. startup_cpu_time is the time.process_time() value
+    at the start of the script, which is logged separately from the phases.
+    """
+    global phases
+    global request_start
+    global startup_cpu_seconds
+    if not is_enabled():
+        phases = None
+        return
+    phases = {}
+    active_phases.clear()
+    request_start = time.perf_counter() if start_time is None else start_time
+    startup_cpu_seconds = startup_cpu_time
+    if startup_phases is not None:
+        for (name, seconds) in startup_phases.items():
+            add_phase(name, seconds)
+
+
+def timed(name):
+    """
+    Return a decorator that times each call of the decorated function as the
+    phase name.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if phases is None:
+                return function(*args, **kwargs)
+            with phase(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
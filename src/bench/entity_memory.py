@@ -0,0 +1,160 @@
+r"""
+Compare the memory used per book by the dicts the data module used to return
+with the memory used by the slotted entities in audiobooks.entities.
+
+The books are built from synthetic result set rows, so no database is needed.
+
+EXAMPLE
+    python3 entity_memory.py \
+        --books         10000
+"""
+
+
+import argparse
+import os
+import random
+import sys
+import textwrap
+import tracemalloc
+
+import dotenv
+dotenv.load_dotenv()
+
+# Modify sys.path to find the audiobooks package.
+sys.path.append(os.environ.get('AUDIOBOOKS_PYTHONPATH'))
+import audiobooks
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description="Compare the per-book memory footprint of dicts and entities",
+        epilog=textwrap.dedent(rf"""
+        Example:
+          python3 {os.path.basename(__file__)} \
+            --books         10000""")
+    )
+    parser.add_argument(
+        "--books",
+        type=int,
+        default=10000,
+        help="number of synthetic books to build (default: 10000)",
+    )
+    args = parser.parse_args()
+    return args
+
+
+def create_rows(book_count):
+    """
+    Return a list of tuples containing the result set rows for each synthetic
+    book: the book row, the author rows, the narrator rows, the acquisition
+    row, and the note rows. Authors and narrators are shared between books.
+    """
+    random.seed(0)
+    person_count = max(1, book_count // 3)
+    people = [(id, f"Surname{id}", f"Forename{id}") for id in range(1, person_count + 1)]
+    all_rows = []
+    for id in range(1, book_count + 1):
+        book_row = (id, f"The Title of Book {id}", "2001-01-01", "2002-02-02", id % 30, id % 60)
+        author_rows = random.sample(people, random.choice([1, 1, 2, 3]))
+        narrator_rows = random.sample(people, 1)
+        acquisition_row = (id, "username", "audible.com", "vendor credit", "2020-01-01", None, 1, 1495)
+        note_rows = [(id, "username", "Finished", "2021-01-01", 4, "very good", None)]
+        all_rows.append((book_row, author_rows, narrator_rows, acquisition_row, note_rows))
+    return all_rows
+
+
+def build_entities(all_rows):
+    """
+    Build the books as entities, sharing each person between the person's
+    books as data.get_books() does.
+    """
+    people = {}
+    def get_person(row):
+        if row[0] not in people:
+            people[row[0]] = audiobooks.data.build_author(row)
+        return people[row[0]]
+
+    books = []
+    for (book_row, author_rows, narrator_rows, acquisition_row, note_rows) in all_rows:
+        book = audiobooks.data.build_book(
+            book_row,
+            authors=[get_person(row) for row in author_rows],
+            translators=[],
+            narrators=[get_person(row) for row in narrator_rows],
+            acquisition=audiobooks.data.build_acquisition(acquisition_row),
+            notes=[audiobooks.data.build_note(row) for row in note_rows],
+        )
+        books.append(book)
+    return books
+
+
+def compute_attributes(books):
+    """
+    Use every computed attribute, as rendering the all books page does.
+    """
+    for book in books:
+        for key in book.keys():
+            book[key]
+        for person in book.authors + book.narrators:
+            for key in person.keys():
+                person[key]
+
+
+def to_dict(entity):
+    """
+    Convert an entity to the dict the data module used to return, with every
+    computed attribute stored in the dict.
+    """
+    entity_dict = {}
+    for key in entity.keys():
+        value = entity[key]
+        if isinstance(value, audiobooks.entities.Entity):
+            value = to_dict(value)
+        elif isinstance(value, list):
+            value = [to_dict(item) for item in value]
+        entity_dict[key] = value
+    # Author dicts did not have a books attribute.
+    if isinstance(entity, audiobooks.entities.Person):
+        del entity_dict["books"]
+    return entity_dict
+
+
+def measure(build):
+    """
+    Return the memory in bytes still allocated after calling build(), and
+    the object it returned.
+    """
+    tracemalloc.start()
+    result = build()
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, result
+
+
+def main():
+    args = parse_args()
+    all_rows = create_rows(args.books)
+
+    dict_size, dicts = measure(lambda: [to_dict(book) for book in build_entities(all_rows)])
+    del dicts
+    lazy_size, books = measure(lambda: build_entities(all_rows))
+    del books
+
+    def computed_entities():
+        books = build_entities(all_rows)
+        compute_attributes(books)
+        return books
+    computed_size, books = measure(computed_entities)
+
+    print(f"Books: {args.books}")
+    print(f"{'Representation':<34} {'Total (KiB)':>12} {'Per book (bytes)':>17}")
+    for label, size in (
+            ("dicts", dict_size),
+            ("entities, attributes not computed", lazy_size),
+            ("entities, attributes computed", computed_size)):
+        print(f"{label:<34} {size / 1024:>12.1f} {size / args.books:>17.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+r"""
+Report the time spent importing the audiobooks package for a page view, as
+measured by python -X importtime, for the current tree and optionally for an
+earlier git revision, such as the revision before the package's submodules
+were imported lazily.
+
+The imports measured are those index.cgi makes to display the books page:
+the package, db, data, display, and the table modules that the page queries.
+
+EXAMPLE
+    python3 import_time.py \
+        --baseline      HEAD~1 \
+        --repeat        10
+"""
+
+
+import argparse
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+import textwrap
+
+import dotenv
+dotenv.load_dotenv()
+
+# IMPORT_STATEMENT makes the imports that index.cgi makes for the books page.
+IMPORT_STATEMENT = textwrap.dedent("""
+    import audiobooks
+    audiobooks.db
+    audiobooks.data
+    audiobooks.display
+    audiobooks.db.acquisition
+    audiobooks.db.author
+    audiobooks.db.book
+    audiobooks.db.narrator
+    audiobooks.db.note
+    audiobooks.db.translator
+""")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description="Report the import time of the audiobooks package",
+        epilog=textwrap.dedent(rf"""
+        Example:
+          python3 {os.path.basename(__file__)} \
+            --baseline      HEAD~1 \
+            --repeat        10""")
+    )
+    parser.add_argument(
+        "--baseline",
+        help="git revision whose package to measure for comparison",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=10,
+        help="number of runs; the fastest is reported (default: 10)",
+    )
+    args = parser.parse_args()
+    return args
+
+
+def extract_revision(revision, temp_dir):
+    """
+    Extract the src/audiobooks directory of the git revision into temp_dir
+    and return the path of the directory containing the package.
+    """
+    repo_dir = subprocess.run(
+        ["git", "rev-parse", "--show-toplevel"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, check=True, text=True).stdout.strip()
+    archive = subprocess.run(
+        ["git", "archive", "--format=tar", revision, "src/audiobooks"],
+        cwd=repo_dir, capture_output=True, check=True).stdout
+    archive_path = os.path.join(temp_dir, "audiobooks.tar")
+    with open(archive_path, "wb") as archive_file:
+        archive_file.write(archive)
+    with tarfile.open(archive_path) as tar:
+        # The "data" filter refuses members outside temp_dir. Python 3.10
+        # releases before 3.10.12 don't have extraction filters.
+        if hasattr(tarfile, "data_filter"):
+            tar.extractall(temp_dir, filter="data")
+        else:
+            tar.extractall(temp_dir)
+    return os.path.join(temp_dir, "src")
+
+
+def measure(package_dir, statement=IMPORT_STATEMENT):
+    """
+    Run statement once in a new interpreter with python -X importtime,
+    importing the package from package_dir.
+
+    Return a list of (name, self_us) tuples containing the name of each
+    module imported and the time in microseconds spent importing the module
+    itself, excluding the modules it imported.
+    """
+    env = dict(os.environ, PYTHONPATH=package_dir, PYTHONDONTWRITEBYTECODE="1")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        env=env, capture_output=True, check=True, text=True)
+    imports = []
+    for line in result.stderr.splitlines():
+        # Lines look like "import time:   self |   cumulative | name".
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        (self_us, cumulative_us, name) = line[len("import time:"):].split("|")
+        imports.append((name.strip(), int(self_us)))
+    return imports
+
+
+def report(label, package_dir, repeat):
+    """
+    Measure the package in package_dir repeat times and print the fastest
+    run. The modules imported by the interpreter at startup, as measured by
+    running "pass", are excluded.
+    """
+    startup_names = {name for (name, self_us) in measure(package_dir, "pass")}
+    runs = []
+    for _ in range(repeat):
+        imports = [
+            (name, self_us) for (name, self_us) in measure(package_dir)
+            if name not in startup_names
+        ]
+        total_us = sum(self_us for (name, self_us) in imports)
+        module_names = {name for (name, self_us) in imports}
+        runs.append((total_us, module_names))
+    (total_us, module_names) = min(runs, key=lambda run: run[0])
+    audiobooks_count = sum(1 for name in module_names if name.startswith("audiobooks"))
+    argon2 = "yes" if "argon2" in module_names else "no"
+    csv = "yes" if "csv" in module_names else "no"
+    print(f"{label:<12} {total_us / 1000:>10.1f} {len(module_names):>8} "
+          f"{audiobooks_count:>11} {argon2:>7} {csv:>4}")
+
+
+def main():
+    args = parse_args()
+    print(f"{'Tree':<12} {'Import ms':>10} {'Modules':>8} {'audiobooks':>11} {'argon2':>7} {'csv':>4}")
+    if args.baseline is not None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            baseline_dir = extract_revision(args.baseline, temp_dir)
+            report(args.baseline, baseline_dir, args.repeat)
+    report("current", os.environ.get('AUDIOBOOKS_PYTHONPATH'), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,418 @@
+r"""
+Measure how the application scales with the size of the library.
+
+For each number of books, generate synthetic audible.csv and cloudLibrary CSV
+files, load them with the audible and cloudLibrary processors into a new
+SQLite3 database in a temporary directory, and measure the ingest, every
+display_* function, and the summary queries in db.counts.
+
+Each operation is run three times: once to time it, once to count the SQL
+statements it executes with db.query_log, and once to measure its peak memory
+allocation with tracemalloc, so that neither instrument affects the other
+measurements. The data module's cache is cleared before each run of a display
+function.
+
+EXAMPLE
+    python3 library_scale.py \
+        --books         1000 10000 100000 \
+        --max_authors   3 \
+        --max_narrators 2 \
+        --translated    0.05 \
+        --relistened    0.1 \
+        --max_notes     3 \
+        --workers       4
+"""
+
+
+import argparse
+import csv
+import logging
+import os
+import random
+import sys
+import tempfile
+import textwrap
+import time
+import tracemalloc
+
+import dotenv
+dotenv.load_dotenv()
+
+# Modify sys.path to find the audiobooks package.
+sys.path.append(os.environ.get('AUDIOBOOKS_PYTHONPATH'))
+import audiobooks
+
+# USERNAME is the user who owns the synthetic acquisitions and notes.
+USERNAME = "bench"
+
+# AUDIBLE_FRACTION is the fraction of the books acquired from audible.com; the
+# rest are borrowed from cloudLibrary.
+AUDIBLE_FRACTION = 0.8
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description="Measure ingest, page, and summary performance by library size",
+        epilog=textwrap.dedent(rf"""
+        Example:
+          python3 {os.path.basename(__file__)} \
+            --books         1000 10000 100000 \
+            --max_authors   3 \
+            --max_narrators 2 \
+            --translated    0.05 \
+            --relistened    0.1 \
+            --max_notes     3 \
+            --workers       4""")
+    )
+    parser.add_argument(
+        "--books",
+        type=int,
+        nargs="+",
+        default=[1000, 10000],
+        help="numbers of synthetic books to measure (default: 1000 10000)",
+    )
+    parser.add_argument(
+        "--max_authors",
+        type=int,
+        default=3,
+        help="maximum number of co-authors of an audible.com book (default: 3)",
+    )
+    parser.add_argument(
+        "--max_narrators",
+        type=int,
+        default=2,
+        help="maximum number of narrators of a book (default: 2)",
+    )
+    parser.add_argument(
+        "--translated",
+        type=float,
+        default=0.05,
+        help="fraction of audible.com books with a translator (default: 0.05)",
+    )
+    parser.add_argument(
+        "--relistened",
+        type=float,
+        default=0.1,
+        help="fraction of audible.com books borrowed again from cloudLibrary (default: 0.1)",
+    )
+    parser.add_argument(
+        "--max_notes",
+        type=int,
+        default=3,
+        help="maximum number of notes on a book borrowed again (default: 3)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="number of worker processes that parse the CSV rows in the "
+            "parallel bulk ingest (default: 4)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="random number seed (default: 0)",
+    )
+    args = parser.parse_args()
+    return args
+
+
+def create_people(prefix, count):
+    """
+    Return a list of count names formatted as "surname, forename", as the
+    CSV files format them.
+    """
+    return [f"{prefix}surname{id}, {prefix}forename{id}" for id in range(1, count + 1)]
+
+
+def create_random_date(start_year, end_year):
+    """
+    Return a random date between the years as a "YYYY-MM-DD" string.
+    """
+    return f"{random.randint(start_year, end_year)}-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}"
+
+
+def create_title(id):
+    """
+    Return a title, beginning with an article for some books so that the
+    title sort keys differ from the titles.
+    """
+    article = ("", "", "The ", "A ")[id % 4]
+    return f"{article}Synthetic Book {id}"
+
+
+def generate_csv_files(args, book_count, temp_dir):
+    """
+    Write the synthetic audible.csv and cloudLibrary CSV files for book_count
+    books to temp_dir and return their paths and row counts.
+
+    Authors, narrators, and translators are shared between books. Some
+    audible.com authors have a single name, like Homer. The books borrowed
+    again from cloudLibrary have one note per borrowing, up to max_notes
+    notes in all.
+    """
+    random.seed(args.seed)
+    authors = create_people("Author", max(10, book_count // 4))
+    mononyms = [f"Mononym{id}" for id in range(1, max(2, book_count // 1000) + 1)]
+    narrators = create_people("Narrator", max(10, book_count // 6))
+    translators = create_people("Translator", max(2, book_count // 50))
+    audible_count = round(book_count * AUDIBLE_FRACTION)
+
+    audible_path = os.path.join(temp_dir, "audible.csv")
+    relistened_rows = []
+    with open(audible_path, "w", newline="") as audible_file:
+        csv_writer = csv.writer(audible_file)
+        csv_writer.writerow([
+            "title", "authors", "translators", "narrators", "book_pub_date",
+            "audio_pub_date", "hours", "minutes", "acquisition_date", "status",
+            "finished_date", "acquisition_type", "audible_credits", "price",
+            "rating", "discontinued", "comments",
+        ])
+        for id in range(1, audible_count + 1):
+            book_authors = random.sample(authors, random.randint(1, args.max_authors))
+            if random.random() < 0.01:
+                book_authors = [random.choice(mononyms)]
+            book_translators = ""
+            if random.random() < args.translated:
+                book_translators = random.choice(translators)
+            book_narrators = random.sample(narrators, random.randint(1, args.max_narrators))
+            status = random.choice(("Finished", "Finished", "Finished", "Started", "New"))
+            acquisition_type = random.choice(("Credit", "Credit", "Extra", "Free", "Plus"))
+            row = [
+                create_title(id),
+                " & ".join(book_authors),
+                book_translators,
+                " & ".join(book_narrators),
+                create_random_date(1850, 2020) if random.random() < 0.8 else "",
+                create_random_date(2000, 2020),
+                str(random.randint(0, 40)),
+                str(random.randint(0, 59)),
+                create_random_date(2010, 2020),
+                status,
+                create_random_date(2021, 2023) if status == "Finished" else "",
+                acquisition_type,
+                "1" if acquisition_type == "Credit" else "",
+                f"${random.randint(100, 4000) / 100:.2f}" if acquisition_type == "Extra" else "",
+                str(random.randint(0, 5)) if status == "Finished" else "",
+                "Yes" if random.random() < 0.02 else "",
+                "A synthetic comment." if random.random() < 0.2 else "",
+            ]
+            csv_writer.writerow(row)
+            if args.max_notes > 1 and random.random() < args.relistened:
+                relistened_rows.append(row)
+
+    cloudlibrary_path = os.path.join(temp_dir, "cloudLibrary.csv")
+    cloudlibrary_count = 0
+    with open(cloudlibrary_path, "w", newline="") as cloudlibrary_file:
+        csv_writer = csv.writer(cloudlibrary_file)
+        csv_writer.writerow([
+            "title", "authors", "narrators", "hours", "minutes",
+            "book_pub_date", "audio_pub_date", "acquisition_date", "status",
+            "finished_date", "rating", "comments",
+        ])
+        for id in range(audible_count + 1, book_count + 1):
+            csv_writer.writerow([
+                create_title(id),
+                random.choice(authors),
+                random.choice(narrators),
+                str(random.randint(0, 40)),
+                str(random.randint(0, 59)),
+                create_random_date(1850, 2020),
+                create_random_date(2000, 2020),
+                create_random_date(2010, 2020),
+                "Finished",
+                create_random_date(2021, 2023),
+                str(random.randint(0, 5)),
+                "",
+            ])
+            cloudlibrary_count += 1
+        for row in relistened_rows:
+            for _ in range(random.randint(1, args.max_notes - 1)):
+                csv_writer.writerow([
+                    row[0], row[1], row[3], row[6], row[7], row[4], row[5],
+                    create_random_date(2021, 2023),
+                    "Finished",
+                    create_random_date(2024, 2026),
+                    str(random.randint(0, 5)),
+                    "Borrowed again.",
+                ])
+                cloudlibrary_count += 1
+    return (audible_path, audible_count, cloudlibrary_path, cloudlibrary_count)
+
+
+def ingest(db_file, audible_path, cloudlibrary_path, bulk=False, upsert=True, workers=1):
+    """
+    Create a new database in db_file and load the CSV files into it with the
+    processors, in a single transaction as the save_*_data.py scripts do. If
+    bulk is True, load them with the processors' save_data_bulk(), which
+    parses the rows with workers worker processes. If upsert is False, the
+    table modules' save() functions use separate SELECT and INSERT
+    statements rather than an upsert.
+    """
+    if os.path.exists(db_file):
+        os.remove(db_file)
+    upsert_returning = audiobooks.db.upsert_returning
+    audiobooks.db.upsert_returning = upsert and upsert_returning
+    audiobooks.db.connect(db_file=db_file)
+    try:
+        audiobooks.db.begin_transaction()
+        audiobooks.db.create_schema()
+        # The processors don't verify the user's password.
+        audiobooks.db.user.insert(USERNAME, "bench@example.com", "unused")
+        if bulk:
+            audiobooks.audible_processor.save_data_bulk(
+                USERNAME, audible_path, workers=workers)
+            audiobooks.cloudlibrary_processor.save_data_bulk(
+                USERNAME, cloudlibrary_path, workers=workers)
+        else:
+            audiobooks.audible_processor.save_data(USERNAME, audible_path)
+            audiobooks.cloudlibrary_processor.save_data(USERNAME, cloudlibrary_path)
+        audiobooks.db.commit()
+    finally:
+        audiobooks.db.close()
+        audiobooks.db.upsert_returning = upsert_returning
+
+
+def measure(label, operation):
+    """
+    Call operation() three times: to time it, to count the SQL statements it
+    executes, and to measure its peak memory allocation. Return (seconds,
+    statements, peak_bytes).
+    """
+    start = time.perf_counter()
+    operation()
+    seconds = time.perf_counter() - start
+
+    os.environ['AUDIOBOOKS_QUERY_LOG'] = os.devnull
+    audiobooks.db.query_log.start_request()
+    try:
+        operation()
+    finally:
+        summary = audiobooks.db.query_log.finish_request(label)
+        os.environ['AUDIOBOOKS_QUERY_LOG'] = ""
+
+    tracemalloc.start()
+    try:
+        operation()
+        (size, peak) = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return (seconds, summary["queries"], peak)
+
+
+def render(db_file, display_function, *args):
+    """
+    Return an operation that renders a page with a display function from a
+    cold data cache on a new read-only connection.
+    """
+    def operation():
+        audiobooks.db.connect(db_file=db_file, read_only=True)
+        try:
+            audiobooks.data.reset_cache()
+            "".join(display_function(*args).body)
+        finally:
+            audiobooks.data.reset_cache()
+            audiobooks.db.close()
+    return operation
+
+
+def select_counts(db_file):
+    """
+    Return an operation that runs the summary queries in db.counts.
+    """
+    def operation():
+        audiobooks.db.connect(db_file=db_file, read_only=True)
+        try:
+            audiobooks.db.counts.select_counts_by_year()
+            audiobooks.db.counts.select_total_books_acquired()
+            audiobooks.db.counts.select_total_books_finished()
+            audiobooks.db.counts.select_total_books_unfinished()
+            audiobooks.db.counts.select_total_distinct_books_finished()
+        finally:
+            audiobooks.db.close()
+    return operation
+
+
+def select_first_translator_id(db_file):
+    """
+    Return the ID of the first translator, or None if there are none.
+    """
+    audiobooks.db.connect(db_file=db_file, read_only=True)
+    try:
+        rows = audiobooks.db.translator.select_translators()
+    finally:
+        audiobooks.db.close()
+    if len(rows) == 0:
+        return None
+    return rows[0][0]
+
+
+def report(args, book_count):
+    """
+    Generate, load, and measure a library of book_count books and print the
+    results.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        (audible_path, audible_count, cloudlibrary_path, cloudlibrary_count) = \
+            generate_csv_files(args, book_count, temp_dir)
+        db_file = os.path.join(temp_dir, "audiobooks.sqlite3")
+        # The pages are rendered from the database loaded by the last ingest.
+        results = [
+            ("ingest --bulk", measure(
+                "ingest --bulk",
+                lambda: ingest(db_file, audible_path, cloudlibrary_path, bulk=True))),
+            (f"ingest --workers {args.workers}", measure(
+                f"ingest --workers {args.workers}",
+                lambda: ingest(db_file, audible_path, cloudlibrary_path, bulk=True,
+                               workers=args.workers))),
+            ("ingest without upsert", measure(
+                "ingest without upsert",
+                lambda: ingest(db_file, audible_path, cloudlibrary_path, upsert=False))),
+            ("ingest", measure("ingest", lambda: ingest(db_file, audible_path, cloudlibrary_path))),
+        ]
+        operations = [
+            ("display_books", render(db_file, audiobooks.display.display_books)),
+            ("display_authors", render(db_file, audiobooks.display.display_authors)),
+            ("display_summary", render(db_file, audiobooks.display.display_summary)),
+            ("display_book", render(db_file, audiobooks.display.display_book, "1")),
+            ("display_author", render(db_file, audiobooks.display.display_author, "1")),
+            ("display_narrator", render(db_file, audiobooks.display.display_narrator, "1")),
+        ]
+        translator_id = select_first_translator_id(db_file)
+        if translator_id is not None:
+            operations.append(
+                ("display_translator",
+                 render(db_file, audiobooks.display.display_translator, str(translator_id))))
+        operations.extend([
+            ("display_about", render(db_file, audiobooks.display.display_about)),
+            ("display_404_not_found", render(db_file, audiobooks.display.display_404_not_found)),
+            ("summary queries", select_counts(db_file)),
+        ])
+        for (label, operation) in operations:
+            results.append((label, measure(label, operation)))
+        db_size = os.path.getsize(db_file)
+
+    print(f"Books: {book_count} ({audible_count} audible.com rows, "
+          f"{cloudlibrary_count} cloudLibrary rows, database {db_size / 1024 / 1024:.1f} MiB)")
+    print(f"{'Operation':<22} {'Wall (s)':>10} {'Queries':>9} {'Peak (KiB)':>11}")
+    for (label, (seconds, queries, peak)) in results:
+        print(f"{label:<22} {seconds:>10.3f} {queries:>9} {peak / 1024:>11.0f}")
+    print()
+
+
+def main():
+    args = parse_args()
+    # Render the pages from the database rather than the page cache, and
+    # don't time requests or report slow statements while measuring.
+    os.environ['AUDIOBOOKS_CACHE_DIR'] = ""
+    os.environ['AUDIOBOOKS_QUERY_LOG'] = ""
+    os.environ['AUDIOBOOKS_TIMING_LOG'] = ""
+    logging.disable(logging.WARNING)
+    for book_count in args.books:
+        report(args, book_count)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+r"""
+Check that the hot queries, listed in audiobooks.db.query_plan, find their
+rows with indexes rather than by scanning whole tables. Report each full
+table scan and exit with status 1 if there are any.
+
+By default, the database in AUDIOBOOKS_DB is checked, so the check also shows
+whether create_indexes.py needs to be run. With --new_schema, a new in-memory
+database created by create_schema() is checked instead, which shows whether a
+change to a query or to the schema has introduced a full table scan.
+
+EXAMPLE
+    python3 check_query_plans.py \
+        --new_schema \
+        --log_file      ~/logs/check_query_plans.log \
+        --log_level     debug
+"""
+
+
+import argparse
+import logging
+import os
+import sys
+import textwrap
+
+import dotenv
+dotenv.load_dotenv()
+
+# Modify sys.path to find the audiobooks package.
+sys.path.append(os.environ.get('AUDIOBOOKS_PYTHONPATH'))
+import audiobooks
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description="Check the query plans of the hot queries for full table scans",
+        epilog=textwrap.dedent(rf"""
+        Example:
+          python3 {os.path.basename(__file__)} \
+            --new_schema \
+            --log_file      logs/check_query_plans.log \
+            --log_level     debug""")
+    )
+    parser.add_argument(
+        "--new_schema",
+        action="store_true",
+        help="check a new in-memory database instead of AUDIOBOOKS_DB",
+    )
+    parser.add_argument(
+        "--log_file",
+        help="output log file",
+        required=True,
+    )
+    parser.add_argument(
+        "--log_level",
+        choices=["debug", "info", "warning", "error", "critical"],
+        help="logging level",
+        required=True,
+    )
+    args = parser.parse_args()
+    return args
+
+
+def main():
+    args = parse_args()
+    audiobooks.utils.init_logging(args.log_file, args.log_level)
+    if args.new_schema:
+        audiobooks.db.connect(db_file=":memory:")
+        audiobooks.db.create_schema()
+    else:
+        audiobooks.db.connect(db_file=os.environ.get('AUDIOBOOKS_DB'), read_only=True)
+    try:
+        full_scans = audiobooks.db.query_plan.find_full_scans()
+    finally:
+        audiobooks.db.close()
+
+    query_count = len(audiobooks.db.query_plan.HOT_QUERIES)
+    if len(full_scans) == 0:
+        print(f"None of the {query_count} hot queries scans a whole table.")
+        return
+    for (name, statement, detail) in full_scans:
+        print(f"{name}: {detail}")
+        print(f"  {' '.join(statement.split())}")
+    print(f"Found {len(full_scans)} full table scans in the {query_count} hot queries.")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
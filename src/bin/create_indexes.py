@@ -0,0 +1,96 @@
+r"""
+Create the indexes on the join and lookup columns in a database created
+before the indexes were added to the schema. Indexes that already exist are
+left unchanged.
+
+EXAMPLE
+    python3 create_indexes.py \
+        --log_file      ~/logs/create_indexes.log \
+        --log_level     debug \
+        --transaction   commit
+"""
+
+
+import argparse
+import logging
+import os
+import sys
+import textwrap
+import traceback
+
+import dotenv
+dotenv.load_dotenv()
+
+# Modify sys.path to find the audiobooks package.
+sys.path.append(os.environ.get('AUDIOBOOKS_PYTHONPATH'))
+import audiobooks
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description="Create the indexes in the audiobooks SQLite3 database",
+        epilog=textwrap.dedent(rf"""
+        Example:
+          python3 {os.path.basename(__file__)} \
+            --log_file      logs/create_indexes.log \
+            --log_level     debug \
+            --transaction   commit""")
+    )
+    parser.add_argument(
+        "--transaction",
+        choices=["commit", "rollback"],
+        help="commit or roll back changes to the database",
+        required=True,
+    )
+    parser.add_argument(
+        "--log_file",
+        help="output log file",
+        required=True,
+    )
+    parser.add_argument(
+        "--log_level",
+        choices=["debug", "info", "warning", "error", "critical"],
+        help="logging level",
+        required=True,
+    )
+    args = parser.parse_args()
+    return args
+
+
+def main():
+    args = parse_args()
+    audiobooks.utils.init_logging(args.log_file, args.log_level)
+    audiobooks.db.connect(db_file=os.environ.get('AUDIOBOOKS_DB'))
+    audiobooks.db.begin_transaction()
+    exception_occurred = False
+    try:
+        audiobooks.db.create_indexes()
+        # Commit or roll back database changes.
+        if args.transaction == "commit":
+            print(f"Requested transaction is {args.transaction}: Committing changes...")
+            audiobooks.db.commit()
+            print("  Done.")
+        else:
+            print(f"Requested transaction is {args.transaction}: Rolling back changes...")
+            audiobooks.db.rollback()
+            print("  Done.")
+    except Exception as exc:
+        # Roll back changes if any exception occurred.
+        print("Caught an exception. Rolling back changes...")
+        audiobooks.db.rollback()
+        print("  Done.")
+        print(f"The exception was '{exc}'.")
+        traceback.print_exc(file=sys.stdout)
+        exception_occurred = True
+    finally:
+        audiobooks.db.close()
+
+    if exception_occurred:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+r"""
+Export every page of the web site as a static HTML file, so the web server
+can serve the pages without running index.cgi.
+
+EXAMPLE
+    python3 export_static_site.py \
+        --output_dir    ~/public_html/audiobooks/static \
+        --incremental \
+        --jobs          4 \
+        --log_file      ~/logs/export_static_site.log \
+        --log_level     info
+"""
+
+
+import argparse
+import logging
+import os
+import sys
+import textwrap
+import time
+import traceback
+
+import dotenv
+dotenv.load_dotenv()
+
+# Modify sys.path to find the audiobooks package.
+sys.path.append(os.environ.get('AUDIOBOOKS_PYTHONPATH'))
+import audiobooks
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description="Export the web site as static HTML files",
+        epilog=textwrap.dedent(rf"""
+        Example:
+          python3 {os.path.basename(__file__)} \
+            --output_dir    static \
+            --incremental \
+            --jobs          4 \
+            --log_file      logs/export_static_site.log \
+            --log_level     info""")
+    )
+    parser.add_argument(
+        "--output_dir",
+        help="directory in which to write the HTML files",
+        required=True,
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="render only the pages whose data changed since the previous export",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of worker processes that render the pages, or 0 for "
+            "one per CPU (default: 1)",
+    )
+    parser.add_argument(
+        "--log_file",
+        help="output log file",
+        required=True,
+    )
+    parser.add_argument(
+        "--log_level",
+        choices=["debug", "info", "warning", "error", "critical"],
+        help="logging level",
+        required=True,
+    )
+    args = parser.parse_args()
+    return args
+
+
+def main():
+    args = parse_args()
+    audiobooks.utils.init_logging(args.log_file, args.log_level)
+    audiobooks.db.connect(db_file=os.environ.get('AUDIOBOOKS_DB'))
+    exception_occurred = False
+    try:
+        jobs = args.jobs
+        if jobs == 0:
+            jobs = os.cpu_count()
+        print(f"Exporting pages to '{args.output_dir}' with {jobs} jobs "
+              f"on {os.cpu_count()} CPUs...")
+        start = time.perf_counter()
+        counts = audiobooks.static_export.export(
+            args.output_dir, args.incremental, jobs)
+        seconds = time.perf_counter() - start
+        print(f"  Rendered {counts['rendered']} pages, "
+              f"left {counts['unchanged']} unchanged pages, "
+              f"and removed {counts['removed']} pages in {seconds:.2f} seconds "
+              f"({counts['rendered'] / seconds:.0f} pages rendered per second).")
+    except Exception as exc:
+        print(f"The exception was '{exc}'.")
+        traceback.print_exc(file=sys.stdout)
+        exception_occurred = True
+    finally:
+        audiobooks.data.reset_cache()
+        audiobooks.db.close()
+
+    if exception_occurred:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
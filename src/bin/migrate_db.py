@@ -0,0 +1,104 @@
+r"""
+Upgrade the schema of the database to the latest version by applying the
+pending migrations listed in audiobooks.db.migration. Each migration is
+applied in its own transaction, so a migration that fails is rolled back and
+leaves the database at the previous version.
+
+With --dry_run, print the migrations that would be applied without changing
+the database.
+
+EXAMPLE
+    python3 migrate_db.py \
+        --dry_run \
+        --log_file      ~/logs/migrate_db.log \
+        --log_level     info
+"""
+
+
+import argparse
+import logging
+import os
+import sys
+import textwrap
+import traceback
+
+import dotenv
+dotenv.load_dotenv()
+
+# Modify sys.path to find the audiobooks package.
+sys.path.append(os.environ.get('AUDIOBOOKS_PYTHONPATH'))
+import audiobooks
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description="Apply the pending schema migrations to the audiobooks SQLite3 database",
+        epilog=textwrap.dedent(rf"""
+        Example:
+          python3 {os.path.basename(__file__)} \
+            --dry_run \
+            --log_file      logs/migrate_db.log \
+            --log_level     info""")
+    )
+    parser.add_argument(
+        "--dry_run",
+        action="store_true",
+        help="print the pending migrations without applying them",
+    )
+    parser.add_argument(
+        "--log_file",
+        help="output log file",
+        required=True,
+    )
+    parser.add_argument(
+        "--log_level",
+        choices=["debug", "info", "warning", "error", "critical"],
+        help="logging level",
+        required=True,
+    )
+    args = parser.parse_args()
+    return args
+
+
+def main():
+    args = parse_args()
+    audiobooks.utils.init_logging(args.log_file, args.log_level)
+    audiobooks.db.connect(db_file=os.environ.get('AUDIOBOOKS_DB'))
+    exception_occurred = False
+    try:
+        user_version = audiobooks.db.migration.get_user_version()
+        print(f"The database's schema version is {user_version}; "
+              f"the latest version is {audiobooks.db.migration.SCHEMA_VERSION}.")
+        pending_migrations = audiobooks.db.migration.get_pending_migrations()
+        if len(pending_migrations) == 0:
+            print("No migrations are pending.")
+        elif args.dry_run:
+            print("Dry run: the following migrations would be applied:")
+            for (version, description, function) in pending_migrations:
+                print(f"  {version}: {description}")
+        else:
+            print(f"Applying {len(pending_migrations)} migrations...")
+            applied_migrations = audiobooks.db.migration.migrate()
+            for (version, description, function) in applied_migrations:
+                print(f"  Applied {version}: {description}")
+            print("  Done.")
+    except Exception as exc:
+        # A failed migration has already been rolled back, and the migrations
+        # before it have been committed.
+        print(f"Caught an exception. The database's schema version is now "
+              f"{audiobooks.db.migration.get_user_version()}.")
+        print(f"The exception was '{exc}'.")
+        traceback.print_exc(file=sys.stdout)
+        exception_occurred = True
+    finally:
+        audiobooks.db.close()
+
+    if exception_occurred:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
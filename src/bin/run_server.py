@@ -0,0 +1,87 @@
+r"""
+Serve the web site from a long-running process using the WSGI server in the
+standard library, so the cost of starting Python, importing the package, and
+connecting to the database is paid once rather than for every request.
+
+EXAMPLE
+    python3 run_server.py \
+        --host          127.0.0.1 \
+        --port          8000 \
+        --log_file      ~/logs/run_server.log \
+        --log_level     info
+"""
+
+
+import argparse
+import logging
+import os
+import sys
+import textwrap
+import wsgiref.simple_server
+
+import dotenv
+dotenv.load_dotenv()
+
+# Modify sys.path to find the audiobooks package.
+sys.path.append(os.environ.get('AUDIOBOOKS_PYTHONPATH'))
+import audiobooks
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description="Serve the web site from a long-running WSGI server",
+        epilog=textwrap.dedent(rf"""
+        Example:
+          python3 {os.path.basename(__file__)} \
+            --host          127.0.0.1 \
+            --port          8000 \
+            --log_file      logs/run_server.log \
+            --log_level     info""")
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="host name or address to listen on (default: 127.0.0.1)",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=8000,
+        help="port to listen on (default: 8000)",
+    )
+    parser.add_argument(
+        "--log_file",
+        help="output log file",
+        required=True,
+    )
+    parser.add_argument(
+        "--log_level",
+        choices=["debug", "info", "warning", "error", "critical"],
+        help="logging level",
+        required=True,
+    )
+    args = parser.parse_args()
+    return args
+
+
+def main():
+    args = parse_args()
+    audiobooks.utils.init_logging(args.log_file, args.log_level)
+    audiobooks.db.connect(db_file=os.environ.get('AUDIOBOOKS_DB'))
+    try:
+        with wsgiref.simple_server.make_server(
+                args.host, args.port, audiobooks.server.application) as httpd:
+            print(f"Serving on http://{args.host}:{args.port}/ (press Ctrl-C to stop)...")
+            httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("  Stopped.")
+    finally:
+        audiobooks.data.reset_cache()
+        audiobooks.db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -16,6 +16,7 @@ import logging
 import os
 import sys
 import textwrap
+import time
 import traceback
 
 import dotenv
@@ -28,6 +29,10 @@ import audiobooks
 logger = logging.getLogger(__name__)
 
 
+def print_progress(row_count, seconds):
+    print(f"  Saved {row_count} rows ({row_count / seconds:.0f} rows/s)", flush=True)
+
+
 def parse_args():
     parser = argparse.ArgumentParser(
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -45,6 +50,24 @@ def parse_args():
         help="input CSV file",
         required=True,
     )
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="save the CSV rows in chunks with a few statements per table",
+    )
+    parser.add_argument(
+        "--chunk_size",
+        type=int,
+        default=audiobooks.bulk_processor.CHUNK_SIZE,
+        help=f"number of CSV rows saved at a time with --bulk (default: {audiobooks.bulk_processor.CHUNK_SIZE})",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="number of worker processes that parse and validate the CSV rows "
+            "with --bulk, or 0 for one per CPU (default: 1)",
+    )
     parser.add_argument(
         "--transaction",
         choices=["commit", "rollback"],
@@ -63,6 +86,8 @@ def parse_args():
         required=True,
     )
     args = parser.parse_args()
+    if args.workers != 1 and not args.bulk:
+        parser.error("--workers requires --bulk")
     return args
 
 
@@ -70,6 +95,12 @@ def main():
     args = parse_args()
     audiobooks.utils.init_logging(args.log_file, args.log_level)
     audiobooks.db.connect(db_file=os.environ.get('AUDIOBOOKS_DB'))
+    audiobooks.db.query_log.start_request()
+
+    # The table modules' save() functions need the unique indexes created by
+    # the migrations.
+    if audiobooks.db.migration.get_pending_migrations():
+        raise ValueError("The database schema is out of date. Run migrate_db.py first.")
 
     # Raise an exception if username or password is not verified.
     username = os.environ.get('USERNAME')
@@ -80,7 +111,20 @@ def main():
     audiobooks.db.begin_transaction()
     exception_occurred = False
     try:
-        audiobooks.audible_processor.save_data(username, args.csv_file)
+        start = time.perf_counter()
+        if args.bulk:
+            workers = args.workers
+            if workers == 0:
+                workers = os.cpu_count()
+            report = audiobooks.audible_processor.save_data_bulk(
+                username, args.csv_file, args.chunk_size, print_progress, workers)
+        else:
+            report = audiobooks.audible_processor.save_data(username, args.csv_file)
+        seconds = time.perf_counter() - start
+        print(f"Saved {report['rows']} CSV rows in {seconds:.2f} s ({report['rows'] / seconds:.0f} rows/s).")
+        for role in ("authors", "translators", "narrators"):
+            counts = report[role]
+            print(f"  {role}: {counts['distinct']} distinct names in {counts['occurrences']} occurrences")
         # Commit or roll back database changes. If the rollback is successful,
         # the size of the database file will be 0 bytes.
         if args.transaction == "commit":
@@ -100,6 +144,9 @@ def main():
         traceback.print_exc(file=sys.stdout)
         exception_occurred = True
     finally:
+        summary = audiobooks.db.query_log.finish_request(os.path.basename(__file__))
+        if summary is not None:
+            print(f"Executed {summary['queries']} statements in {summary['sql_ms']:.0f} ms.")
         audiobooks.db.close()
 
     if exception_occurred:
@@ -0,0 +1,101 @@
+"""
+Test that a book's authors, narrators, and translators are returned in the
+order in which they were saved, even though the indexes on the book_author,
+book_narrator, and book_translator tables are ordered by person ID.
+
+Run from the src directory with:
+
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import audiobooks
+
+
+class BookPeopleOrderTest(unittest.TestCase):
+
+    def setUp(self):
+        audiobooks.db.connect(db_file=":memory:")
+        audiobooks.db.begin_transaction()
+        audiobooks.db.create_schema()
+        audiobooks.data.reset_cache()
+
+    def tearDown(self):
+        audiobooks.data.reset_cache()
+        audiobooks.db.rollback()
+        audiobooks.db.close()
+
+    def save_book(self, title, people, save_person, save_book_person):
+        """
+        Save the people in order, then save the book with the people in
+        reverse order, so that the save order differs from the ID order.
+        Return the book ID and the people's IDs in the book's save order.
+        """
+        person_ids = [save_person(surname, forename) for (surname, forename) in people]
+        book_id = audiobooks.db.book.save(title, None, None, 1, 0)
+        person_ids.reverse()
+        for person_id in person_ids:
+            save_book_person(book_id, person_id)
+        return (book_id, person_ids)
+
+    def test_indexes_exist(self):
+        rows = audiobooks.db.conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index'").fetchall()
+        names = {name for (name,) in rows}
+        for index in (
+                "idx_book_author_book_id_author_id",
+                "idx_book_narrator_book_id_narrator_id",
+                "idx_book_translator_book_id_translator_id"):
+            self.assertIn(index, names)
+
+    def test_authors_in_save_order(self):
+        (book_id, author_ids) = self.save_book(
+            "Co-Authored", [("Sur1", "Fore1"), ("Sur2", "Fore2"), ("Sur3", "Fore3")],
+            audiobooks.db.author.save, audiobooks.db.book_author.save)
+        rows = audiobooks.db.author.select_ids_for_book(book_id)
+        self.assertEqual([author_id for (author_id,) in rows], author_ids)
+
+        # The detail page and the list pages agree, however the identity map
+        # was filled.
+        book = audiobooks.data.get_book(book_id)
+        self.assertEqual([author["id"] for author in book["authors"]], author_ids)
+        audiobooks.data.reset_cache()
+        (book,) = audiobooks.data.get_books()
+        self.assertEqual([author["id"] for author in book["authors"]], author_ids)
+        book = audiobooks.data.get_book(book_id)
+        self.assertEqual([author["id"] for author in book["authors"]], author_ids)
+
+    def test_narrators_in_save_order(self):
+        (book_id, narrator_ids) = self.save_book(
+            "Narrated", [("Sur1", "Fore1"), ("Sur2", "Fore2")],
+            audiobooks.db.narrator.save, audiobooks.db.book_narrator.save)
+        rows = audiobooks.db.narrator.select_ids_for_book(book_id)
+        self.assertEqual([narrator_id for (narrator_id,) in rows], narrator_ids)
+
+    def test_translators_in_save_order(self):
+        (book_id, translator_ids) = self.save_book(
+            "Translated", [("Sur1", "Fore1"), ("Sur2", "Fore2")],
+            audiobooks.db.translator.save, audiobooks.db.book_translator.save)
+        rows = audiobooks.db.translator.select_ids_for_book(book_id)
+        self.assertEqual([translator_id for (translator_id,) in rows], translator_ids)
+
+    def test_books_in_save_order(self):
+        author_id = audiobooks.db.author.save("Sur1", "Fore1")
+        book_ids = [
+            audiobooks.db.book.save(title, None, None, 1, 0)
+            for title in ("Book A", "Book B", "Book C")
+        ]
+        book_ids.reverse()
+        for book_id in book_ids:
+            audiobooks.db.book_author.save(book_id, author_id)
+        rows = audiobooks.db.book.select_ids_for_author(author_id)
+        self.assertEqual([book_id for (book_id,) in rows], book_ids)
+
+
+if __name__ == "__main__":
+    unittest.main()
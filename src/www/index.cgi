@@ -1,58 +1,101 @@
 #!/Users/halto/src/conradhalling/audiobooks/venv310/bin/python3
 
+import time
+
+# Record the CPU time used to start the interpreter, the start time of the
+# request, and the phases before the audiobooks package is imported, for the
+# optional timing log.
+startup_cpu_time = time.process_time()
+start_time = time.perf_counter()
+startup_phases = {}
+
 import cgi
 import cgitb
+import logging
+logger = logging.getLogger(__name__)
 import os
 import sys
 
 # Load environment variables from the .env file. The variables are:
-#   AUDIOBOOKS_DB           # Full path to the SQLite3 database file
-#   AUDIOBOOKS_ENVIRONMENT  # 'PRODUCTION' or 'TEST'
-#   AUDIOBOOKS_PYTHONPATH   # Path to the parent directory of the audiobooks package
-#   AUDIOBOOKS_WEBDIR       # Full URL path to the directory containing index.cgi
+#   AUDIOBOOKS_CACHE_DIR      # Optional directory for cached pages
+#   AUDIOBOOKS_DB             # Full path to the SQLite3 database file
+#   AUDIOBOOKS_ENVIRONMENT    # 'PRODUCTION' or 'TEST'
+#   AUDIOBOOKS_PYTHONPATH     # Path to the parent directory of the audiobooks package
+#   AUDIOBOOKS_QUERY_LOG      # Optional file to which SQL statement summaries are appended
+#   AUDIOBOOKS_SLOW_QUERY_MS  # Optional duration at which SQL statements are logged as slow
+#   AUDIOBOOKS_TIMING_LOG     # Optional file to which request timings are appended
+#   AUDIOBOOKS_WEBDIR         # Full URL path to the directory containing index.cgi
 import dotenv
+phase_start = time.perf_counter()
 dotenv.load_dotenv()
+startup_phases["dotenv"] = time.perf_counter() - phase_start
 
 # Modify sys.path to find the audiobooks package.
 sys.path.append(os.environ.get('AUDIOBOOKS_PYTHONPATH'))
+phase_start = time.perf_counter()
 import audiobooks
+# The package imports its modules when they are first used, so use the display
+# module here to include the time to import it in the import phase.
+audiobooks.display
+startup_phases["import"] = time.perf_counter() - phase_start
 
 
 def main():
     """
     Carefully manage exceptions to make sure that the database file is closed.
 
-    Carefully manage HTTP Content-Type headers. Each display function prints
-    its own Content-Type header so the application can return HTML, an image,
-    CSV, JSON, etc.
+    Carefully manage HTTP Content-Type headers. Each display function returns
+    a response containing its own Content-Type header so the application can
+    return HTML, an image, CSV, JSON, etc.
     """
+    phase_start = time.perf_counter()
     audiobooks.db.connect(db_file=os.environ.get('AUDIOBOOKS_DB'))
+    startup_phases["connect"] = time.perf_counter() - phase_start
+    audiobooks.db.query_log.start_request()
+    audiobooks.timing.start_request(start_time, startup_phases, startup_cpu_time)
+    page = None
+    value = None
+    response = None
 
     try:
         fs = cgi.FieldStorage(keep_blank_values=True)
         if "404" in fs:
-            audiobooks.display.display_404_not_found()
+            page = "404"
         elif "about" in fs:
-            audiobooks.display.display_about()
+            page = "about"
         elif "author_id" in fs:
-            audiobooks.display.display_author(fs["author_id"].value)
+            page = "author_id"
+            value = fs["author_id"].value
         elif "authors" in fs:
-            audiobooks.display.display_authors()
+            page = "authors"
         elif "book_id" in fs:
-            audiobooks.display.display_book(fs["book_id"].value)
+            page = "book_id"
+            value = fs["book_id"].value
         elif "narrator_id" in fs:
-            audiobooks.display.display_narrator(fs["narrator_id"].value)
+            page = "narrator_id"
+            value = fs["narrator_id"].value
         elif "summaries" in fs:
-            audiobooks.display.display_summary()
+            page = "summaries"
         elif "translator_id" in fs:
-            audiobooks.display.display_translator(fs["translator_id"].value)
+            page = "translator_id"
+            value = fs["translator_id"].value
         else:
-            audiobooks.display.display_books()
+            page = "books"
+        # The books and authors pages are generated while they are written,
+        # so displaying and writing the page are timed as a single phase.
+        with audiobooks.timing.phase("render"):
+            response = audiobooks.display.display_page(page, value)
+            response.write_cgi()
 
     except Exception as exc:
+        # Once the headers and part of a streamed page have been written,
+        # another Content-Type header would end up in the page's body, so log
+        # the exception to the web server's error log and end the response.
+        if response is not None and response.headers_sent:
+            logger.exception("Error while writing the response to '%s'", os.environ.get('QUERY_STRING', ''))
         # Send the exception to the browser when AUDIOBOOKS_ENVIRONMENT is not
         # PRODUCTION.
-        if os.environ.get('AUDIOBOOKS_ENVIRONMENT') != 'PRODUCTION':
+        elif os.environ.get('AUDIOBOOKS_ENVIRONMENT') != 'PRODUCTION':
             # Send a Content-Type header before printing the exception.
             print("Content-Type: text/html; charset=utf-8\r\n\r\n", end="")
             print(cgitb.html(sys.exc_info()))
@@ -60,6 +103,9 @@ def main():
             raise(exc)
 
     finally:
+        audiobooks.timing.finish_request(page, value)
+        audiobooks.db.query_log.finish_request(os.environ.get('QUERY_STRING', ''))
+        audiobooks.data.reset_cache()
         audiobooks.db.close()
 
 